@@ -1,15 +1,38 @@
 # api/app.py
-from flask import Flask, request, jsonify
-import joblib
-import pandas as pd
+from flask import Flask, request, jsonify, g
 import numpy as np
 import os
+import io
+import csv
+import json
+import time
+
+from codificador import ErroValidacao
+from pacote_modelo import GerenciadorModelos, PASTA_MODELOS
+from microlote import MicroLote
+from simulacao import SimuladorHabitos, LimiteExcedido
+from cache_predicoes import CachePredicoes
+from telemetria import Metricas, configurar_log
 
 app = Flask(__name__)
 
-# Certifique-se de que os arquivos .pkl estão na mesma pasta que este arquivo
-modelo = joblib.load('modelo.pkl')
-scaler = joblib.load('scaler.pkl')
+# --- TELEMETRIA ---
+# Histogramas por etapa e contadores expostos em /metrics (formato Prometheus).
+# O log por requisição é opcional (PREDICT_LOG=1) e escrito por uma thread de fundo.
+metricas = Metricas(diretorio=os.environ.get('METRICAS_DIR'))
+metricas.descrever('requisicao_segundos', "Latência ponta a ponta por rota")
+metricas.descrever('etapa_segundos', "Latência por etapa do processamento")
+metricas.descrever('predicoes_total', "Predições por classe prevista")
+metricas.descrever('erros_total', "Erros por tipo de exceção")
+metricas.descrever('trocas_modelo_total', "Trocas a quente do modelo por resultado")
+log = configurar_log(detalhado=os.environ.get('PREDICT_LOG', '0') == '1')
+
+ETAPA_PARSE = (('etapa', 'parse_json'),)
+ETAPA_CODIFICACAO = (('etapa', 'codificacao'),)
+ETAPA_NORMALIZACAO = (('etapa', 'normalizacao'),)
+ETAPA_FLORESTA = (('etapa', 'floresta'),)
+ETAPA_EXPLICACAO = (('etapa', 'explicacao'),)
+ETAPA_SERIALIZACAO = (('etapa', 'serializacao'),)
 
 # Dicionário de mapeamento para tradução clínica
 target_map_real = {
@@ -22,63 +45,438 @@ target_map_real = {
     6: "Obesidade G. III"
 }
 
-# Lista exata de colunas que o modelo espera
-COLUNAS_MODELO = [
-    'Genero', 'Idade', 'Historico_Familiar_Excesso_De_Peso', 
-    'Consumo_Frequente_Alta_Caloria', 'Freq_Vegetais', 'Num_refeicoes', 
-    'Comes_Entre_Refeicoes', 'Fumante', 'Consumo_Agua', 'Monitora_Calorias', 
-    'Freq_Atividade_Fisica', 'Tempo_uso_dispositivos_eletronicos', 
-    'Consumo_Alcool', 'Transporte_Bike', 'Transporte_Motorbike', 
-    'Transporte_Public_Transportation', 'Transporte_Walking', 
-    'Score_Atletico', 'Possivel_Atleta'
-]
+# Limite de registros aceitos em uma única chamada de /predict/batch
+BATCH_MAX_REGISTROS = int(os.environ.get('BATCH_MAX_REGISTROS', 50000))
+
+# Contribuição de cada feature em cada predição (desligável por ?explicar=0 ou
+# EXPLICACAO_PADRAO=0). Predições explicadas passam pelo mesmo cache e micro-lote:
+# o cache guarda as probabilidades seguidas do resumo da explicação da linha.
+EXPLICACAO_PADRAO = os.environ.get('EXPLICACAO_PADRAO', '1') == '1'
+TAMANHO_BLOCO_EXPLICACAO = 4096
+
+
+def avaliar_matriz(X, pacote):
+    # Normaliza e avalia uma matriz (n_linhas, 19) já na ordem das colunas do pacote.
+    # A normalização repete StandardScaler.transform direto no array, sem a validação
+    # e a checagem de nomes de coluna do sklearn
+    t0 = time.perf_counter()
+    X_scaled = pacote.normalizar(X)
+    t1 = time.perf_counter()
+    probabilidades = pacote.predict_proba(X_scaled)
+    t2 = time.perf_counter()
+    metricas.observar('etapa_segundos', t1 - t0, ETAPA_NORMALIZACAO)
+    metricas.observar('etapa_segundos', t2 - t1, ETAPA_FLORESTA)
+    return probabilidades
+
+
+def explicar_matriz(X, pacote):
+    # Probabilidades e contribuições por feature na mesma travessia da floresta, em
+    # blocos. Cada linha sai como [probabilidades, efeito de cada feature no risco total,
+    # crédito de cada feature na classe prevista]: o que a resposta usa e o cache guarda
+    t0 = time.perf_counter()
+    X_scaled = pacote.normalizar(X)
+    t1 = time.perf_counter()
+    blocos = []
+    for i in range(0, len(X_scaled), TAMANHO_BLOCO_EXPLICACAO):
+        probabilidades, _, contribuicoes = pacote.explicar(X_scaled[i:i + TAMANHO_BLOCO_EXPLICACAO])
+        classe = np.argmax(probabilidades, axis=1)
+        blocos.append(np.hstack([
+            probabilidades,
+            contribuicoes[:, :, 2:].sum(axis=2),
+            contribuicoes[np.arange(len(classe)), :, classe],
+        ]))
+    t2 = time.perf_counter()
+    metricas.observar('etapa_segundos', t1 - t0, ETAPA_NORMALIZACAO)
+    metricas.observar('etapa_segundos', t2 - t1, ETAPA_EXPLICACAO)
+    return np.vstack(blocos)
+
+
+def avaliar_microlote(X):
+    # O lote inteiro usa o pacote ativo no momento da avaliação; cada linha volta
+    # junto com ele para que a resposta informe a versão que de fato a avaliou
+    pacote = modelos.ativo
+    return [(proba, pacote) for proba in avaliar_matriz(X, pacote)]
+
+
+def explicar_microlote(X):
+    pacote = modelos.ativo
+    return [(valor, pacote) for valor in explicar_matriz(X, pacote)]
+
+
+# Micro-lotes (opcional): junta requisições individuais que chegam quase ao mesmo
+# tempo em uma única avaliação da floresta, trocando alguns ms de latência por vazão.
+# Predições com e sem explicação formam lotes separados
+microlote = microlote_explicacao = None
+if os.environ.get('MICROLOTE_ATIVO', '0') == '1':
+    microlote, microlote_explicacao = (
+        MicroLote(
+            avaliar,
+            janela_ms=float(os.environ.get('MICROLOTE_JANELA_MS', 3.0)),
+            tamanho_max=int(os.environ.get('MICROLOTE_TAMANHO_MAX', 64)),
+        )
+        for avaliar in (avaliar_microlote, explicar_microlote)
+    )
+
+
+def preparar_pacote(novo, anterior):
+    # Roda antes da troca, fora do caminho das requisições. Cada versão tem o seu cache
+    # de probabilidades (CACHE_CAPACIDADE=0 desliga), pré-aquecido com os vetores mais
+    # usados da versão anterior (já explicados, se a explicação é o padrão), e o seu
+    # simulador de hábitos.
+    novo.cache = CachePredicoes(
+        capacidade=int(os.environ.get('CACHE_CAPACIDADE', 10000)),
+        ttl=float(os.environ.get('CACHE_TTL_S', 0)),
+    )
+    if anterior is not None and anterior.cache is not None and novo.cache.ativo and novo.colunas == anterior.colunas:
+        X = anterior.cache.vetores(int(os.environ.get('CACHE_AQUECIMENTO', 2000)))[::-1]
+        if len(X):
+            for linha, valor in zip(X, (explicar_matriz if EXPLICACAO_PADRAO else avaliar_matriz)(X, novo)):
+                novo.cache.guardar(linha, valor)
+
+    # Simulação de hábitos: a grade inteira de combinações passa pela floresta de uma vez,
+    # com o mesmo codificador do /predict (o risco "atual" é o que o /predict devolve)
+    novo.simulador = SimuladorHabitos(
+        novo.codificador,
+        lambda X: avaliar_matriz(X, novo),
+        lambda p: resumir_probabilidades(p, novo),
+        max_combinacoes=int(os.environ.get('SIMULACAO_MAX_COMBINACOES', 50000)),
+    )
+
+
+def registrar_troca(novo, anterior):
+    metricas.incrementar('trocas_modelo_total', (('resultado', 'sucesso'),))
+    log.warning("✅ Modelo trocado: %s -> %s", anterior.versao, novo.versao)
+
+
+def registrar_falha(assinatura, erro):
+    metricas.incrementar('trocas_modelo_total', (('resultado', 'erro'),))
+    log.warning("🛑 Nova versão do modelo recusada (%s): %s", assinatura, erro)
+
+
+# --- MODELO VERSIONADO ---
+# Modelo, scaler, esquema de features (COLUNAS_MODELO) e target map vêm de um pacote
+# versionado em MODELOS_DIR (pacote_modelo.py) ou, sem pacotes, dos .pkl desta pasta.
+# Quando o ponteiro MODELOS_DIR/ATUAL (ou um dos .pkl) muda, a nova versão é
+# carregada, verificada e aquecida por uma thread de fundo e trocada de uma vez; cada
+# requisição usa do início ao fim o pacote que estava ativo quando chegou.
+# A floresta compilada (floresta.joblib) é aberta via mmap, então os workers do
+# gunicorn compartilham as páginas do modelo em vez de duplicá-lo.
+# FLORESTA_COMPACTA aponta para a versão compactada (train/compactar.py) do mesmo
+# modelo; com pacotes, basta defini-la para usar a floresta_compacta.joblib do pacote.
+modelos = GerenciadorModelos(
+    pasta=PASTA_MODELOS,
+    arquivos_legados={
+        'caminho_modelo': 'modelo.pkl',
+        'caminho_scaler': 'scaler.pkl',
+        'caminho_target_map': 'target_map.pkl',
+        'caminho_artefato': os.environ.get('FLORESTA_ARTEFATO', 'floresta.joblib'),
+    },
+    compacta=os.environ.get('FLORESTA_COMPACTA'),
+    preparar=preparar_pacote,
+    intervalo=float(os.environ.get('MODELO_INTERVALO_S', 5)),
+    ao_trocar=registrar_troca,
+    ao_falhar=registrar_falha,
+)
+
+metricas.medidor('modelo_ativo', "Versão do modelo ativa neste worker (valor = carregado em, epoch)",
+                 lambda: modelos.ativo.carregado_em, rotulos=lambda: (('versao', modelos.ativo.versao),))
+metricas.medidor('cache_acertos', "Acertos do cache de predições neste worker", lambda: modelos.ativo.cache.acertos)
+metricas.medidor('cache_falhas', "Falhas do cache de predições neste worker", lambda: modelos.ativo.cache.falhas)
+metricas.medidor('cache_despejos', "Despejos LRU do cache neste worker", lambda: modelos.ativo.cache.despejos)
+metricas.medidor('cache_tamanho', "Entradas no cache de predições neste worker", lambda: len(modelos.ativo.cache))
+if microlote is not None:
+    for _prefixo, _lote in (('microlote', microlote), ('microlote_explicacao', microlote_explicacao)):
+        metricas.medidor(f'{_prefixo}_media_tamanho', "Tamanho médio dos micro-lotes neste worker",
+                         lambda lote=_lote: lote.estatisticas()["media_tamanho_lote"])
+        metricas.medidor(f'{_prefixo}_media_fila_ms', "Tempo médio em fila dos micro-lotes (ms) neste worker",
+                         lambda lote=_lote: lote.estatisticas()["media_fila_ms"])
+
+
+def resumir_probabilidades(probabilidades, pacote):
+    # Converte uma linha de predict_proba no payload clínico devolvido pela API
+    predicao_num = int(pacote.floresta.classes[np.argmax(probabilidades)])
+    resultado_texto = target_map_real.get(predicao_num, f"Classe {predicao_num}")
+    return {
+        "diagnostico": str(resultado_texto),
+        "confianca": float(np.max(probabilidades)),
+        "risco_total": float(np.sum(probabilidades[2:])),
+    }
+
+
+def resumir_explicacao(valor, pacote):
+    # Linha de explicar_matriz -> lista ordenada pelo peso no risco total;
+    # "diagnostico" é o crédito da feature na classe prevista
+    n_classes, n_features = len(pacote.floresta.classes), len(pacote.colunas)
+    risco = valor[n_classes:n_classes + n_features]
+    diagnostico = valor[n_classes + n_features:]
+    ordem = np.argsort(-np.abs(risco), kind='stable')
+    return {
+        "base_risco": float(pacote.floresta.base[2:].sum()),
+        "contribuicoes": [
+            {"feature": pacote.colunas[j], "risco_total": float(risco[j]), "diagnostico": float(diagnostico[j])}
+            for j in ordem
+        ],
+    }
+
+
+def resumir_linha(valor, pacote, explicar):
+    # Valor do cache (probabilidades, ou probabilidades + explicação) -> payload clínico
+    resumo = resumir_probabilidades(valor[:len(pacote.floresta.classes)], pacote)
+    if explicar:
+        resumo["explicacao"] = resumir_explicacao(valor, pacote)
+    return resumo
+
+
+def falta_no_cache(valor, pacote, explicar):
+    # Uma entrada só com probabilidades não serve a quem pediu a explicação
+    return valor is None or (explicar and len(valor) == len(pacote.floresta.classes))
+
+
+def deve_explicar(req):
+    valor = req.args.get('explicar')
+    if valor is None:
+        return EXPLICACAO_PADRAO
+    return valor.strip().lower() not in ('0', 'false', 'nao', 'não')
+
+
+def ler_registros_lote(req):
+    # Lê o corpo da requisição de lote em JSON (array), NDJSON ou CSV.
+    # Retorna uma lista de registros; linhas ilegíveis viram exceções na própria posição
+    # para que um registro ruim não derrube o lote inteiro.
+    content_type = (req.mimetype or '').lower()
+    corpo = req.get_data(as_text=True)
+
+    if content_type in ('application/x-ndjson', 'application/ndjson', 'application/jsonlines'):
+        registros = []
+        for linha in corpo.splitlines():
+            if not linha.strip():
+                continue
+            try:
+                registros.append(json.loads(linha))
+            except ValueError as e:
+                registros.append(ValueError(f"JSON inválido: {e}"))
+        return registros
+
+    if content_type in ('text/csv', 'application/csv'):
+        leitor = csv.DictReader(io.StringIO(corpo))
+        return [{k.strip(): v for k, v in linha.items() if k is not None} for linha in leitor]
+
+    dados = json.loads(corpo) if corpo.strip() else []
+    if isinstance(dados, dict) and 'registros' in dados:
+        dados = dados['registros']
+    if not isinstance(dados, list):
+        raise ValueError("O corpo deve ser um array JSON de registros")
+    return dados
+
 
 @app.route('/predict', methods=['POST'])
 def predict():
+    inicio = time.perf_counter()
     try:
         # Recebe os dados do formulário do Streamlit
         data = request.json 
-        input_df = pd.DataFrame([data])
+        t_parse = time.perf_counter()
+        pacote = g.pacote
         
-        # Garante a ordem correta das features e preenche vazios com 0
-        df_model = input_df.reindex(columns=COLUNAS_MODELO, fill_value=0)
-        
-        # Aplica a normalização (Scaler)
-        X_scaled = scaler.transform(df_model)
-        
-        # Realiza a predição da classe (o que a pessoa "é" agora)
-        predicao_bruta = modelo.predict(X_scaled)[0]
-        predicao_num = int(predicao_bruta) 
+        # Codifica na ordem correta das features (vazios viram 0), com validação estrita
+        linha = pacote.codificador.codificar(data)
+        t_codificacao = time.perf_counter()
+        metricas.observar('etapa_segundos', t_parse - inicio, ETAPA_PARSE)
+        metricas.observar('etapa_segundos', t_codificacao - t_parse, ETAPA_CODIFICACAO)
         
         # --- LÓGICA DE RISCO ACUMULADO ---
-        # Obtemos as probabilidades para cada uma das 7 categorias
-        probabilidades = modelo.predict_proba(X_scaled)[0] 
-        
-        # Mapeamento dos índices das probabilidades:
+        # Normalização (Scaler) + uma única passada na floresta devolvem as probabilidades
+        # das 7 categorias, diretamente ou via micro-lote:
         # [0: Abaixo, 1: Normal, 2: Sobrepeso I, 3: Sobrepeso II, 4: Obeso I, 5: Obeso II, 6: Obeso III]
-        
-        # Somamos as probabilidades de todos os estados acima do "Peso Normal" 
-        # Isso dá o "Risco Total" de não estar no peso ideal
-        risco_total = float(np.sum(probabilidades[2:])) 
-        
-        # Pegamos a confiança específica da classe que o modelo escolheu
-        confianca_classe = float(np.max(probabilidades))
-        
-        # Busca o nome clínico da categoria
-        resultado_texto = target_map_real.get(predicao_num, f"Classe {predicao_num}")
-        
-        print(f"✅ Predição: {resultado_texto} | Risco Total: {risco_total*100:.1f}%")
+        # A classe prevista é a de maior probabilidade (como em modelo.predict) e o
+        # "Risco Total" é a soma de todos os estados acima do "Peso Normal"
+        # Com explicação, probabilidades e contribuições saem da mesma travessia
+        explicar = deve_explicar(request)
+        valor = pacote.cache.obter(linha)
+        if falta_no_cache(valor, pacote, explicar):
+            lote = microlote_explicacao if explicar else microlote
+            if lote is not None:
+                valor, pacote = lote.submeter(linha)
+                g.pacote = pacote
+            else:
+                valor = (explicar_matriz if explicar else avaliar_matriz)(linha[np.newaxis, :], pacote)[0]
+            pacote.cache.guardar(linha, valor)
+        resumo = resumir_linha(valor, pacote, explicar)
+        resultado_texto, risco_total = resumo["diagnostico"], resumo["risco_total"]
+        metricas.incrementar('predicoes_total', (('classe', resultado_texto),))
+
+        log.info("✅ Predição: %s | Risco Total: %.1f%%", resultado_texto, risco_total * 100)
+
+        t_serializacao = time.perf_counter()
+        resposta = jsonify({**resumo, "versao_modelo": pacote.versao, "status": "sucesso"})
+        fim = time.perf_counter()
+        metricas.observar('etapa_segundos', fim - t_serializacao, ETAPA_SERIALIZACAO)
+        metricas.observar('requisicao_segundos', fim - inicio, (('rota', '/predict'),))
+        return resposta
+
+    except ErroValidacao as e:
+        return _responder_erro('/predict', e, 400)
+
+    except Exception as e:
+        return _responder_erro('/predict', e, 500)
+
+
+def _responder_erro(rota, erro, status):
+    metricas.incrementar('erros_total', (('rota', rota), ('tipo', type(erro).__name__)))
+    log.warning("🛑 ERRO NA API (%s): %s", rota, erro)
+    return jsonify({"erro": str(erro)}), status
+
+
+@app.before_request
+def fixar_pacote():
+    # O pacote ativo é lido uma única vez por requisição: uma troca no meio do
+    # caminho não mistura versões, e a requisição termina na versão em que começou
+    modelos.garantir_observador()
+    g.pacote = modelos.ativo
+
+
+@app.after_request
+def informar_versao(resposta):
+    pacote = g.get('pacote') or modelos.ativo
+    resposta.headers['X-Modelo-Versao'] = pacote.versao
+    return resposta
+
+
+@app.route('/predict/batch', methods=['POST'])
+def predict_batch():
+    inicio = time.perf_counter()
+    try:
+        registros = ler_registros_lote(request)
+    except Exception as e:
+        return _responder_erro('/predict/batch', e, 400)
+    t_parse = time.perf_counter()
+
+    if len(registros) > BATCH_MAX_REGISTROS:
+        return _responder_erro('/predict/batch', ValueError(
+            f"Lote excede o limite de {BATCH_MAX_REGISTROS} registros"), 413)
+
+    try:
+        pacote = g.pacote
+        resultados = [None] * len(registros)
+        linhas, indices_validos, erros = pacote.codificador.codificar_lote(registros)
+        t_codificacao = time.perf_counter()
+        metricas.observar('etapa_segundos', t_parse - inicio, ETAPA_PARSE)
+        metricas.observar('etapa_segundos', t_codificacao - t_parse, ETAPA_CODIFICACAO)
+        if erros:
+            metricas.incrementar('erros_total', (('rota', '/predict/batch'), ('tipo', 'ErroValidacao')), len(erros))
+        for i, mensagem in erros.items():
+            resultados[i] = {"indice": i, "erro": mensagem, "status": "erro"}
+
+        # Consulta o cache linha a linha; só as faltas seguem para a floresta
+        explicar = deve_explicar(request)
+        pendentes = []
+        for i, linha in zip(indices_validos, linhas):
+            valor = pacote.cache.obter(linha)
+            if falta_no_cache(valor, pacote, explicar):
+                pendentes.append((i, linha))
+            else:
+                resultados[i] = {"indice": i, **resumir_linha(valor, pacote, explicar), "status": "sucesso"}
+
+        if pendentes:
+            # Uma única normalização e uma única passada na floresta para todo o lote
+            # (com explicação, em blocos de TAMANHO_BLOCO_EXPLICACAO linhas)
+            valores = (explicar_matriz if explicar else avaliar_matriz)(
+                linhas if len(pendentes) == len(linhas) else np.vstack([linha for _, linha in pendentes]), pacote)
 
-        return jsonify({
-            "diagnostico": str(resultado_texto),
-            "confianca": confianca_classe,
-            "risco_total": risco_total,
+            for (i, linha), valor in zip(pendentes, valores):
+                pacote.cache.guardar(linha, valor)
+                resultados[i] = {"indice": i, **resumir_linha(valor, pacote, explicar), "status": "sucesso"}
+
+        for i in indices_validos:
+            metricas.incrementar('predicoes_total', (('classe', resultados[i]["diagnostico"]),))
+
+        n_erros = len(registros) - len(indices_validos)
+        log.info("✅ Lote: %d predições | %d erros", len(indices_validos), n_erros)
+
+        t_serializacao = time.perf_counter()
+        resposta = jsonify({
+            "resultados": resultados,
+            "total": len(registros),
+            "sucesso": len(indices_validos),
+            "erros": n_erros,
+            "versao_modelo": pacote.versao,
             "status": "sucesso"
         })
+        fim = time.perf_counter()
+        metricas.observar('etapa_segundos', fim - t_serializacao, ETAPA_SERIALIZACAO)
+        metricas.observar('requisicao_segundos', fim - inicio, (('rota', '/predict/batch'),))
+        return resposta
 
     except Exception as e:
-        print(f"🛑 ERRO NA API: {str(e)}")
-        return jsonify({"erro": str(e)}), 500
+        return _responder_erro('/predict/batch', e, 500)
+
+@app.route('/predict/simulacao', methods=['POST'])
+def predict_simulacao():
+    inicio = time.perf_counter()
+    try:
+        corpo = request.json
+        if not isinstance(corpo, dict):
+            raise ErroValidacao("Corpo deve ser um objeto JSON com 'paciente' e 'habitos'")
+        pacote = g.pacote
+        resultado = pacote.simulador.simular(corpo.get('paciente'), corpo.get('habitos'), top=corpo.get('top', 5))
+
+        metricas.incrementar('predicoes_total', (('classe', 'simulacao'),), resultado["combinacoes"])
+        log.info("✅ Simulação: %d combinações | risco atual %.1f%%",
+                 resultado["combinacoes"], resultado["atual"]["risco_total"] * 100)
+        resposta = jsonify({**resultado, "versao_modelo": pacote.versao, "status": "sucesso"})
+        metricas.observar('requisicao_segundos', time.perf_counter() - inicio, (('rota', '/predict/simulacao'),))
+        return resposta
+
+    except LimiteExcedido as e:
+        return _responder_erro('/predict/simulacao', e, 413)
+
+    except (ErroValidacao, ValueError, TypeError) as e:
+        return _responder_erro('/predict/simulacao', e, 400)
+
+    except Exception as e:
+        return _responder_erro('/predict/simulacao', e, 500)
+
+# Carga inicial e aquecimento (primeira inferência e tabela de contribuições das
+# folhas). Com preload_app no gunicorn isso acontece uma única vez, no processo pai;
+# as trocas seguintes são feitas pelo observador de cada worker.
+modelos.verificar_agora()
+encerrando = False
+
+
+def marcar_encerrando():
+    # Chamado pelo gunicorn ao receber SIGTERM: /ready passa a falhar para que o
+    # balanceador pare de enviar tráfego enquanto as requisições em curso terminam
+    global encerrando
+    encerrando = True
+
+
+@app.route('/health', methods=['GET'])
+def health():
+    return jsonify({"status": "vivo"})
+
+
+@app.route('/ready', methods=['GET'])
+def ready():
+    if encerrando:
+        return jsonify({"status": "encerrando"}), 503
+    pacote = g.pacote
+    return jsonify({"status": "pronto", "pid": os.getpid(), "arvores": pacote.floresta.n_arvores,
+                    "versao_modelo": pacote.versao})
+
+
+@app.route('/metrics', methods=['GET'])
+def metrics():
+    return metricas.exportar(), 200, {'Content-Type': 'text/plain; version=0.0.4; charset=utf-8'}
+
+
+@app.route('/stats', methods=['GET'])
+def stats():
+    return jsonify({
+        "microlote": microlote.estatisticas() if microlote is not None else {"ativo": False},
+        "microlote_explicacao": microlote_explicacao.estatisticas() if microlote is not None else {"ativo": False},
+        "cache": g.pacote.cache.estatisticas(),
+        "modelo": modelos.estatisticas(),
+    })
 
 if __name__ == '__main__':
     # host='0.0.0.0' permite que o Docker acesse a porta
@@ -0,0 +1,100 @@
+# api/cache_predicoes.py
+# Cache em memória de probabilidades por vetor de features.
+#
+# As entradas do /predict têm baixa cardinalidade (flags binárias, frequências 0–3,
+# one-hot de transporte e sliders quantizados), então o mesmo vetor se repete muito.
+# A chave é o vetor já na ordem de COLUNAS_MODELO, canonicalizado em float64
+# (arredondado e sem -0.0). Despejo LRU por capacidade e TTL opcional. Não há
+# invalidação interna: cada versão do modelo tem o seu próprio cache (a API cria um
+# por pacote, o Streamlit guarda um por versão/assinatura dos arquivos do modelo).
+# Usado pela API (api/app.py) e pela inferência local do Streamlit (streamlit/main.py).
+import threading
+import time
+from collections import OrderedDict
+
+import numpy as np
+
+
+class CachePredicoes:
+
+    def __init__(self, capacidade=10000, ttl=None, casas_decimais=9):
+        self.capacidade = int(capacidade)
+        self.ttl = ttl if ttl else None
+        self.casas_decimais = casas_decimais
+
+        self._dados = OrderedDict()
+        self._trava = threading.Lock()
+
+        self.acertos = 0
+        self.falhas = 0
+        self.despejos = 0
+        self.expirados = 0
+
+    @property
+    def ativo(self):
+        return self.capacidade > 0
+
+    def chave(self, linha):
+        canonico = np.round(np.asarray(linha, dtype=np.float64), self.casas_decimais) + 0.0
+        return canonico.tobytes()
+
+    def obter(self, linha):
+        if not self.ativo:
+            return None
+        chave = self.chave(linha)
+        with self._trava:
+            item = self._dados.get(chave)
+            if item is None:
+                self.falhas += 1
+                return None
+            valor, expira_em = item
+            if expira_em is not None and time.monotonic() >= expira_em:
+                del self._dados[chave]
+                self.expirados += 1
+                self.falhas += 1
+                return None
+            self._dados.move_to_end(chave)
+            self.acertos += 1
+            return valor
+
+    def guardar(self, linha, valor):
+        if not self.ativo:
+            return
+        chave = self.chave(linha)
+        expira_em = time.monotonic() + self.ttl if self.ttl else None
+        with self._trava:
+            # Cópia própria: uma linha de uma matriz de lote manteria o lote inteiro vivo
+            self._dados[chave] = (np.array(valor, copy=True), expira_em)
+            self._dados.move_to_end(chave)
+            while len(self._dados) > self.capacidade:
+                self._dados.popitem(last=False)
+                self.despejos += 1
+
+    def vetores(self, limite=None):
+        # Vetores das entradas mais recentes (do mais para o menos usado), para
+        # pré-aquecer o cache de um modelo novo com o tráfego atual
+        with self._trava:
+            chaves = list(reversed(self._dados))[:limite]
+        if not chaves:
+            return np.empty((0, 0))
+        return np.frombuffer(b''.join(chaves), dtype=np.float64).reshape(len(chaves), -1)
+
+    def __len__(self):
+        return len(self._dados)
+
+    def limpar(self):
+        with self._trava:
+            self._dados.clear()
+
+    def estatisticas(self):
+        consultas = self.acertos + self.falhas
+        return {
+            "capacidade": self.capacidade,
+            "ttl_s": self.ttl,
+            "tamanho": len(self),
+            "acertos": self.acertos,
+            "falhas": self.falhas,
+            "despejos": self.despejos,
+            "expirados": self.expirados,
+            "taxa_acerto": self.acertos / consultas if consultas else 0.0,
+        }
@@ -0,0 +1,352 @@
+# api/codificador.py
+# Codificação única das features do modelo, compartilhada pela API e pelo Streamlit.
+#
+# O esquema (ordem das colunas, mapas binários e ordinais e one-hot de transporte) é
+# compilado uma vez em uma lista de conversores. Cada registro (dict) é escrito
+# diretamente em um buffer float64 preallocado, com validação estrita de tipo e faixa,
+# sem montar DataFrames.
+#
+# Score_Atletico e Possivel_Atleta ausentes valem 0, como no reindex(fill_value=0)
+# original da API. Com derivar_atleticas=True (pontuação em massa do dataset original)
+# são calculados pela mesma regra do formulário do Streamlit (perfil_atletico).
+import math
+
+import numpy as np
+import pandas as pd
+
+# Lista exata de colunas que o modelo espera
+COLUNAS_MODELO = [
+    'Genero', 'Idade', 'Historico_Familiar_Excesso_De_Peso',
+    'Consumo_Frequente_Alta_Caloria', 'Freq_Vegetais', 'Num_refeicoes',
+    'Comes_Entre_Refeicoes', 'Fumante', 'Consumo_Agua', 'Monitora_Calorias',
+    'Freq_Atividade_Fisica', 'Tempo_uso_dispositivos_eletronicos',
+    'Consumo_Alcool', 'Transporte_Bike', 'Transporte_Motorbike',
+    'Transporte_Public_Transportation', 'Transporte_Walking',
+    'Score_Atletico', 'Possivel_Atleta'
+]
+
+# Colunas do dataset original (Obesity.csv) -> nomes usados pelo modelo, como no ETL
+MAPA_COLUNAS_ORIGINAIS = {
+    'Gender': 'Genero', 'Age': 'Idade', 'Height': 'Altura', 'Weight': 'Peso',
+    'family_history': 'Historico_Familiar_Excesso_De_Peso',
+    'family_history_with_overweight': 'Historico_Familiar_Excesso_De_Peso',
+    'FAVC': 'Consumo_Frequente_Alta_Caloria', 'FCVC': 'Freq_Vegetais',
+    'NCP': 'Num_refeicoes', 'CAEC': 'Comes_Entre_Refeicoes', 'SMOKE': 'Fumante',
+    'CH2O': 'Consumo_Agua', 'SCC': 'Monitora_Calorias', 'FAF': 'Freq_Atividade_Fisica',
+    'TUE': 'Tempo_uso_dispositivos_eletronicos', 'CALC': 'Consumo_Alcool',
+    'MTRANS': 'Transporte', 'Obesity': 'Obesidade', 'NObeyesdad': 'Obesidade',
+}
+
+# Rótulos aceitos para campos binários (formulário em português e dataset original)
+MAPA_BINARIO = {"Sim": 1, "Não": 0, "yes": 1, "no": 0, "Masculino": 1, "Feminino": 0, "Male": 1, "Female": 0}
+
+# Escala de frequência (CAEC/CALC)
+MAPA_FREQ = {
+    "Não": 0, "Não bebo": 0, "Às vezes": 1, "Freq.": 2, "Sempre": 3,
+    "no": 0, "Sometimes": 1, "Frequently": 2, "Always": 3,
+}
+
+# Meio de transporte -> coluna one-hot (Automóvel é a categoria de referência)
+MAPA_TRANSPORTE = {
+    "Bicicleta": 'Transporte_Bike', "Bike": 'Transporte_Bike',
+    "Moto": 'Transporte_Motorbike', "Motorbike": 'Transporte_Motorbike',
+    "Transp. Público": 'Transporte_Public_Transportation', "Public_Transportation": 'Transporte_Public_Transportation',
+    "Caminhada": 'Transporte_Walking', "Walking": 'Transporte_Walking',
+    "Automóvel": None, "Automobile": None,
+}
+
+# Faixas válidas das features numéricas (limites do formulário e do dataset)
+FAIXAS = {
+    'Idade': (0, 130),
+    'Freq_Vegetais': (1, 3),
+    'Num_refeicoes': (1, 4),
+    'Consumo_Agua': (1, 3),
+    'Freq_Atividade_Fisica': (0, 3),
+    'Tempo_uso_dispositivos_eletronicos': (0, 24),
+    'Score_Atletico': (0, 4.5),
+}
+
+COLUNAS_BINARIAS = {
+    'Genero', 'Historico_Familiar_Excesso_De_Peso', 'Consumo_Frequente_Alta_Caloria',
+    'Fumante', 'Monitora_Calorias', 'Transporte_Bike', 'Transporte_Motorbike',
+    'Transporte_Public_Transportation', 'Transporte_Walking', 'Possivel_Atleta',
+}
+COLUNAS_ORDINAIS = {'Comes_Entre_Refeicoes', 'Consumo_Alcool'}
+
+
+class ErroValidacao(ValueError):
+    pass
+
+
+def _numero(coluna, valor):
+    if isinstance(valor, bool):
+        return float(valor)
+    if isinstance(valor, (int, float, np.integer, np.floating)):
+        numero = float(valor)
+    elif isinstance(valor, str):
+        try:
+            numero = float(valor)
+        except ValueError:
+            raise ErroValidacao(f"Valor não numérico em '{coluna}': {valor!r}")
+    else:
+        raise ErroValidacao(f"Tipo inválido em '{coluna}': {type(valor).__name__}")
+    if not math.isfinite(numero):
+        raise ErroValidacao(f"Valor inválido em '{coluna}': {valor!r}")
+    return numero
+
+
+def _conversor_binario(coluna):
+    def converter(valor):
+        if isinstance(valor, str) and valor in MAPA_BINARIO:
+            return float(MAPA_BINARIO[valor])
+        numero = _numero(coluna, valor)
+        if numero not in (0.0, 1.0):
+            raise ErroValidacao(f"'{coluna}' deve ser 0 ou 1, recebido {valor!r}")
+        return numero
+    return converter
+
+
+def _conversor_ordinal(coluna):
+    def converter(valor):
+        if isinstance(valor, str) and valor in MAPA_FREQ:
+            return float(MAPA_FREQ[valor])
+        numero = _numero(coluna, valor)
+        if numero not in (0.0, 1.0, 2.0, 3.0):
+            raise ErroValidacao(f"'{coluna}' deve ser 0, 1, 2 ou 3, recebido {valor!r}")
+        return numero
+    return converter
+
+
+def _conversor_faixa(coluna, minimo, maximo):
+    def converter(valor):
+        numero = _numero(coluna, valor)
+        if not minimo <= numero <= maximo:
+            raise ErroValidacao(f"'{coluna}' fora da faixa [{minimo}, {maximo}]: {valor!r}")
+        return numero
+    return converter
+
+
+def renomear_original(registro):
+    # Registro com as colunas do dataset original (Gender, FAVC, MTRANS...) -> nomes do modelo
+    return {MAPA_COLUNAS_ORIGINAIS.get(k, k): v for k, v in registro.items()}
+
+
+def _vazio(valor):
+    return valor is None or (isinstance(valor, str) and not valor.strip())
+
+
+def _imc(registro):
+    if not _vazio(registro.get('IMC')):
+        return _numero('IMC', registro['IMC'])
+    peso, altura = registro.get('Peso'), registro.get('Altura')
+    if _vazio(peso) or _vazio(altura):
+        return None
+    peso, altura = _numero('Peso', peso), _numero('Altura', altura)
+    if altura <= 0:
+        raise ErroValidacao(f"'Altura' deve ser positiva: {altura!r}")
+    return peso / (altura ** 2)
+
+
+def perfil_atletico(registro):
+    # Features derivadas do formulário do Streamlit: Score_Atletico = FAF * 1.5 e
+    # Possivel_Atleta quando FAF >= 2 com IMC >= 25
+    faf = registro.get('Freq_Atividade_Fisica')
+    faf = 0.0 if _vazio(faf) else _numero('Freq_Atividade_Fisica', faf)
+    imc = _imc(registro)
+    return {
+        'Score_Atletico': faf * 1.5,
+        'Possivel_Atleta': 1 if (imc is not None and faf >= 2 and imc >= 25) else 0,
+    }
+
+
+class CodificadorFeatures:
+
+    def __init__(self, colunas=COLUNAS_MODELO, derivar_atleticas=False):
+        self.colunas = list(colunas)
+        self.derivar_atleticas = derivar_atleticas
+        self.n_features = len(self.colunas)
+        self.indice = {c: i for i, c in enumerate(self.colunas)}
+
+        # Esquema compilado: (índice, nome, conversor) na ordem do modelo, e a mesma
+        # regra em forma de (rótulos, valores permitidos, faixa) para a versão vetorizada
+        self._campos = []
+        self._regras = []
+        for i, coluna in enumerate(self.colunas):
+            if coluna in COLUNAS_BINARIAS:
+                conversor = _conversor_binario(coluna)
+                regra = (MAPA_BINARIO, (0.0, 1.0), None)
+            elif coluna in COLUNAS_ORDINAIS:
+                conversor = _conversor_ordinal(coluna)
+                regra = (MAPA_FREQ, (0.0, 1.0, 2.0, 3.0), None)
+            elif coluna in FAIXAS:
+                conversor = _conversor_faixa(coluna, *FAIXAS[coluna])
+                regra = (None, None, FAIXAS[coluna])
+            else:
+                conversor = lambda valor, coluna=coluna: _numero(coluna, valor)
+                regra = (None, None, None)
+            self._campos.append((i, coluna, conversor))
+            self._regras.append((i, coluna) + regra)
+
+        self._i_faf = self.indice.get('Freq_Atividade_Fisica')
+        self._i_score = self.indice.get('Score_Atletico')
+        self._i_atleta = self.indice.get('Possivel_Atleta')
+        self._i_transporte = [self.indice[c] for c in set(MAPA_TRANSPORTE.values()) if c in self.indice]
+
+    def codificar(self, registro, saida=None):
+        # Escreve um registro no vetor `saida` (ou em um novo) na ordem de COLUNAS_MODELO.
+        # Colunas ausentes valem 0, como no reindex(fill_value=0) original da API.
+        if not isinstance(registro, dict):
+            raise ErroValidacao("Registro deve ser um objeto JSON")
+        if saida is None:
+            saida = np.empty(self.n_features, dtype=np.float64)
+        saida.fill(0.0)
+
+        presentes = set()
+        for i, coluna, conversor in self._campos:
+            valor = registro.get(coluna)
+            if _vazio(valor):
+                continue
+            saida[i] = conversor(valor)
+            presentes.add(coluna)
+
+        # Transporte como rótulo único ("Caminhada", "Public_Transportation", ...)
+        transporte = registro.get('Transporte')
+        if not _vazio(transporte):
+            if transporte not in MAPA_TRANSPORTE:
+                raise ErroValidacao(f"Transporte desconhecido: {transporte!r}")
+            for i in self._i_transporte:
+                saida[i] = 0.0
+            coluna = MAPA_TRANSPORTE[transporte]
+            if coluna in self.indice:
+                saida[self.indice[coluna]] = 1.0
+
+        # Features derivadas do perfil atlético, quando não informadas
+        if self.derivar_atleticas and self._i_faf is not None:
+            faf = saida[self._i_faf]
+            if self._i_score is not None and 'Score_Atletico' not in presentes:
+                saida[self._i_score] = faf * 1.5
+            if self._i_atleta is not None and 'Possivel_Atleta' not in presentes:
+                imc = _imc(registro)
+                saida[self._i_atleta] = 1.0 if (imc is not None and faf >= 2 and imc >= 25) else 0.0
+
+        return saida
+
+    def codificar_lote(self, registros):
+        # Codifica vários registros em um único buffer (n, n_features).
+        # Retorna a matriz apenas com as linhas válidas, seus índices originais e
+        # um dicionário {índice: mensagem} com os registros rejeitados.
+        X = np.empty((len(registros), self.n_features), dtype=np.float64)
+        validos, erros = [], {}
+        for i, registro in enumerate(registros):
+            try:
+                if isinstance(registro, Exception):
+                    raise registro
+                self.codificar(registro, saida=X[len(validos)])
+                validos.append(i)
+            except Exception as e:
+                erros[i] = str(e)
+        return X[:len(validos)], validos, erros
+
+    def codificar_tabela(self, df):
+        # Versão vetorizada de codificar_lote para DataFrames grandes (pontuação em massa):
+        # mesmas regras e mensagens, aplicadas coluna a coluna em vez de linha a linha.
+        n = len(df)
+        X = np.zeros((n, self.n_features), dtype=np.float64)
+        erros = np.full(n, None, dtype=object)
+        presentes = {}
+
+        def marcar(mascara, mensagem):
+            for j in np.flatnonzero(mascara & pd.isna(erros)):
+                erros[j] = mensagem(j)
+
+        for i, coluna, rotulos, permitidos, faixa in self._regras:
+            if coluna not in df.columns:
+                continue
+            bruto = df[coluna].reset_index(drop=True)
+            vazio = _vazios(bruto)
+            numero = pd.to_numeric(bruto.where(~vazio), errors='coerce')
+            if rotulos is not None and not pd.api.types.is_numeric_dtype(bruto):
+                numero = bruto.map(rotulos).astype(np.float64).fillna(numero)
+            valores = numero.to_numpy(dtype=np.float64)
+
+            nao_numerico = ~vazio & np.isnan(valores)
+            marcar(nao_numerico, lambda j: f"Valor não numérico em '{coluna}': {bruto.iat[j]!r}")
+            infinito = ~vazio & np.isinf(valores)
+            marcar(infinito, lambda j: f"Valor inválido em '{coluna}': {bruto.iat[j]!r}")
+            ok = ~vazio & np.isfinite(valores)
+
+            if permitidos is not None:
+                fora = ok & ~np.isin(valores, permitidos)
+                opcoes = ", ".join(str(int(v)) for v in permitidos)
+                opcoes = opcoes.replace(", " + str(int(permitidos[-1])), " ou " + str(int(permitidos[-1])))
+                marcar(fora, lambda j: f"'{coluna}' deve ser {opcoes}, recebido {bruto.iat[j]!r}")
+            elif faixa is not None:
+                minimo, maximo = faixa
+                fora = ok & ((valores < minimo) | (valores > maximo))
+                marcar(fora, lambda j: f"'{coluna}' fora da faixa [{minimo}, {maximo}]: {bruto.iat[j]!r}")
+
+            X[:, i] = np.where(ok, valores, 0.0)
+            presentes[coluna] = ~vazio
+
+        if 'Transporte' in df.columns:
+            bruto = df['Transporte'].reset_index(drop=True)
+            informado = ~_vazios(bruto)
+            destino = bruto.map(lambda v: MAPA_TRANSPORTE.get(v, '?'))
+            desconhecido = informado & (destino == '?').to_numpy()
+            marcar(desconhecido, lambda j: f"Transporte desconhecido: {bruto.iat[j]!r}")
+            for i in self._i_transporte:
+                X[informado, i] = 0.0
+            for coluna in set(MAPA_TRANSPORTE.values()):
+                if coluna in self.indice:
+                    X[informado & (destino == coluna).to_numpy(), self.indice[coluna]] = 1.0
+
+        if self.derivar_atleticas and self._i_faf is not None:
+            faf = X[:, self._i_faf]
+            nenhum = np.zeros(n, dtype=bool)
+            if self._i_score is not None:
+                derivar = ~presentes.get('Score_Atletico', nenhum)
+                X[derivar, self._i_score] = faf[derivar] * 1.5
+            if self._i_atleta is not None:
+                derivar = ~presentes.get('Possivel_Atleta', nenhum)
+                imc = self._imc_tabela(df, derivar, marcar)
+                with np.errstate(invalid='ignore'):
+                    atleta = (faf >= 2) & (imc >= 25)
+                X[derivar, self._i_atleta] = atleta[derivar].astype(np.float64)
+
+        validos = np.flatnonzero(pd.isna(erros))
+        mensagens = {int(j): erros[j] for j in np.flatnonzero(~pd.isna(erros))}
+        return X[validos], validos, mensagens
+
+    def _imc_tabela(self, df, derivar, marcar):
+        # IMC informado ou Peso/Altura, validados só nas linhas em que Possivel_Atleta é derivado
+        n = len(df)
+        imc = np.full(n, np.nan)
+        vazio = np.ones(n, dtype=bool)
+        if 'IMC' in df.columns:
+            vazio, imc = _numeros_tabela(df['IMC'], 'IMC', derivar, marcar)
+        if 'Peso' in df.columns and 'Altura' in df.columns:
+            usar = derivar & vazio
+            sem_peso, peso = _numeros_tabela(df['Peso'], 'Peso', usar, marcar)
+            usar &= ~sem_peso
+            sem_altura, altura = _numeros_tabela(df['Altura'], 'Altura', usar, marcar)
+            usar &= ~sem_altura
+            marcar(usar & (altura <= 0), lambda j: f"'Altura' deve ser positiva: {float(altura[j])!r}")
+            with np.errstate(divide='ignore', invalid='ignore'):
+                imc = np.where(usar & (altura > 0), peso / altura ** 2, imc)
+        return imc
+
+
+def _numeros_tabela(serie, coluna, mascara, marcar):
+    serie = serie.reset_index(drop=True)
+    vazio = _vazios(serie)
+    valores = pd.to_numeric(serie.where(~vazio), errors='coerce').to_numpy(dtype=np.float64)
+    marcar(mascara & ~vazio & np.isnan(valores), lambda j: f"Valor não numérico em '{coluna}': {serie.iat[j]!r}")
+    marcar(mascara & ~vazio & np.isinf(valores), lambda j: f"Valor inválido em '{coluna}': {serie.iat[j]!r}")
+    return vazio, valores
+
+
+def _vazios(serie):
+    vazio = np.array(serie.isna(), dtype=bool)
+    if not pd.api.types.is_numeric_dtype(serie):
+        vazio |= serie.map(lambda v: isinstance(v, str) and not v.strip()).to_numpy(dtype=bool)
+    return vazio
@@ -0,0 +1,385 @@
+# api/floresta.py
+# Avaliador compilado do RandomForestClassifier treinado (modelo.pkl).
+#
+# No carregamento, todas as árvores da floresta são achatadas em vetores NumPy
+# contíguos (feature, limiar, filhos e distribuição de classes das folhas).
+# A inferência percorre todas as árvores e todas as linhas ao mesmo tempo, nível
+# por nível, sem passar pela validação nem pelo despacho do joblib do sklearn.
+# As probabilidades são bit a bit idênticas às de modelo.predict_proba.
+#
+# A mesma estrutura também representa a floresta compactada (train/compactar.py):
+# menos árvores, folhas redundantes fundidas, limiares float32 e distribuições das
+# folhas quantizadas em inteiros (`escala`).
+#
+# `explicar` devolve, junto com as probabilidades, a contribuição de cada feature
+# pelo caminho percorrido em cada árvore (atribuição de Saabas): a cada nó, a
+# variação da distribuição de classes entre o nó e o filho escolhido é creditada à
+# feature testada. Base + soma das contribuições = probabilidades da floresta.
+# A tabela dessas contribuições por folha também pode ser gravada ao lado do
+# artefato da floresta e mapeada em memória, compartilhada entre os workers.
+import os
+import time
+import hashlib
+import argparse
+
+import joblib
+import numpy as np
+
+
+def sha256_arquivo(caminho):
+    h = hashlib.sha256()
+    with open(caminho, 'rb') as f:
+        for bloco in iter(lambda: f.read(1 << 20), b''):
+            h.update(bloco)
+    return h.hexdigest()
+
+
+def caminho_explicacao(caminho_floresta):
+    # floresta.joblib -> floresta_explicacao.joblib (idem para a floresta compactada)
+    raiz, extensao = os.path.splitext(caminho_floresta)
+    return f"{raiz}_explicacao{extensao}"
+
+
+def gravar_artefato(estado, caminho):
+    # Grava num temporário e renomeia: workers que já mapeiam a versão anterior do
+    # arquivo continuam lendo as páginas dela, nunca um arquivo truncado
+    temporario = f"{caminho}.{os.getpid()}.tmp"
+    try:
+        joblib.dump(estado, temporario)
+        os.replace(temporario, caminho)
+    except BaseException:
+        if os.path.exists(temporario):
+            os.remove(temporario)
+        raise
+
+
+class FlorestaCompilada:
+
+    # Acima deste número de linhas a travessia é feita em blocos de linhas x árvores
+    # (medido com o modelo de produção, em 10k linhas: ~170 ms contra ~250 ms da travessia
+    # única, ainda atrás dos ~115 ms do predict_proba do sklearn; por isso os lotes
+    # grandes da API usam o apply() do sklearn para achar as folhas, ver pacote_modelo.py)
+    LINHAS_TRAVESSIA_UNICA = 512
+    BLOCO_LINHAS = 2048
+    BLOCO_ARVORES = 32
+
+    def __init__(self, feature, limiar, filhos, valores, raizes, classes, profundidade, n_features, escala=None):
+        # Índices sempre em intp: o artefato compacto os grava em tipos menores, mas a
+        # indexação do NumPy com outros tipos converte a cada nível da travessia
+        feature, filhos, raizes = (np.asarray(a).astype(np.intp, copy=False) for a in (feature, filhos, raizes))
+        self.feature = feature            # (n_nos,) índice da feature testada em cada nó
+        self.limiar = limiar              # (n_nos,) limiar float64 (ou float32), +inf nas folhas
+        self.filhos = filhos              # (n_nos, 2) [esquerda, direita]; folhas apontam para si mesmas
+        self._filhos_plano = np.ascontiguousarray(filhos).reshape(-1)   # filho de (nó, lado) em 2 * nó + lado
+        self.valores = valores            # (n_nos, n_classes) distribuição normalizada de classes
+        self.raizes = raizes              # (n_arvores,) índice global da raiz de cada árvore
+        self.classes = classes            # rótulos na ordem das colunas de probabilidade
+        self.profundidade = int(profundidade)
+        self.n_features = int(n_features)
+        self.escala = escala              # None, ou valores quantizados como round(p * escala)
+        self._contribuicoes_folhas = None # preenchidos por preparar_explicacao()
+        self._linha_folha = None
+        self._base = None
+
+    @property
+    def n_arvores(self):
+        return len(self.raizes)
+
+    @classmethod
+    def from_sklearn(cls, modelo):
+        features, limiares, filhos, valores, raizes = [], [], [], [], []
+        deslocamento = 0
+        profundidade = 0
+
+        for estimador in modelo.estimators_:
+            arvore = estimador.tree_
+            n = arvore.node_count
+            folha = arvore.children_left == -1
+            idx = np.arange(n, dtype=np.intp)
+
+            esquerda = np.where(folha, idx, arvore.children_left) + deslocamento
+            direita = np.where(folha, idx, arvore.children_right) + deslocamento
+
+            # Desde o sklearn 1.4, tree_.value já guarda as frações de classe por nó,
+            # exatamente o que DecisionTreeClassifier.predict_proba devolve
+            valor = arvore.value[:, 0, :modelo.n_classes_].astype(np.float64)
+
+            features.append(np.where(folha, 0, arvore.feature).astype(np.intp))
+            limiares.append(np.where(folha, np.inf, arvore.threshold).astype(np.float64))
+            filhos.append(np.column_stack([esquerda, direita]).astype(np.intp))
+            valores.append(valor)
+            raizes.append(deslocamento)
+
+            deslocamento += n
+            profundidade = max(profundidade, arvore.max_depth)
+
+        return cls(
+            feature=np.ascontiguousarray(np.concatenate(features)),
+            limiar=np.ascontiguousarray(np.concatenate(limiares)),
+            filhos=np.ascontiguousarray(np.concatenate(filhos)),
+            valores=np.ascontiguousarray(np.concatenate(valores)),
+            raizes=np.asarray(raizes, dtype=np.intp),
+            classes=np.asarray(modelo.classes_),
+            profundidade=profundidade,
+            n_features=modelo.n_features_in_,
+        )
+
+    # --- ARTEFATO MAPEADO EM MEMÓRIA ---
+    # Os vetores são gravados sem compressão pelo joblib, o que permite abri-los com
+    # mmap_mode='r': todos os workers compartilham as mesmas páginas do arquivo em vez
+    # de manter cada um a sua cópia da floresta.
+    def salvar(self, caminho, origem=None):
+        estado = {k: v for k, v in self.__dict__.items() if not k.startswith('_')}
+        gravar_artefato(dict(estado, origem=origem), caminho)
+
+    @classmethod
+    def carregar(cls, caminho, mmap=True):
+        estado = joblib.load(caminho, mmap_mode='r' if mmap else None)
+        estado.pop('origem', None)
+        return cls(**estado)
+
+    @classmethod
+    def carregar_ou_compilar(cls, caminho_modelo, caminho_artefato):
+        # Reaproveita o artefato compilado se ele veio deste mesmo modelo.pkl;
+        # caso contrário compila a partir do sklearn e tenta gravar para as próximas cargas
+        origem = sha256_arquivo(caminho_modelo)
+        if os.path.exists(caminho_artefato):
+            try:
+                if joblib.load(caminho_artefato, mmap_mode='r').get('origem') == origem:
+                    return cls.carregar(caminho_artefato)
+            except Exception:
+                pass
+
+        floresta = cls.from_sklearn(joblib.load(caminho_modelo))
+        try:
+            floresta.salvar(caminho_artefato, origem=origem)
+            return cls.carregar(caminho_artefato)
+        except OSError:
+            # Sistema de arquivos somente leitura: segue com a cópia em memória
+            return floresta
+
+    @classmethod
+    def carregar_verificada(cls, caminho_artefato, caminho_modelo):
+        # Artefato gerado fora da API (ex.: a floresta compactada), aceito apenas se
+        # veio deste mesmo modelo.pkl
+        if joblib.load(caminho_artefato, mmap_mode='r').get('origem') != sha256_arquivo(caminho_modelo):
+            raise ValueError(f"{caminho_artefato} não foi gerado a partir de {caminho_modelo}")
+        return cls.carregar(caminho_artefato)
+
+    def _entrada(self, X):
+        X = np.asarray(X)
+        if X.ndim == 1:
+            X = X[np.newaxis, :]
+        if X.shape[1] != self.n_features:
+            raise ValueError(f"Esperadas {self.n_features} features, recebidas {X.shape[1]}")
+
+        # O sklearn converte a entrada para float32 antes de comparar com o limiar float64;
+        # com limiares float32 (floresta compactada) a comparação fica toda em float32
+        return np.asarray(X, dtype=np.float32).astype(self.limiar.dtype, copy=False).ravel(), X.shape[0]
+
+    def folhas(self, X):
+        # Retorna o índice global da folha alcançada em cada árvore: (n_arvores, n_linhas)
+        X_plano, n_linhas = self._entrada(X)
+        if n_linhas <= self.LINHAS_TRAVESSIA_UNICA:
+            return self._percorrer(X_plano, np.arange(n_linhas, dtype=np.intp), self.raizes)
+
+        # Lotes grandes: a travessia de todas as árvores x todas as linhas de uma vez gera
+        # vetores de milhões de posições e perde o cache; blocos fixos de linhas x árvores
+        # mantêm os índices e as árvores do bloco no cache
+        nos = np.empty((self.n_arvores, n_linhas), dtype=np.intp)
+        for inicio in range(0, n_linhas, self.BLOCO_LINHAS):
+            linhas = np.arange(inicio, min(inicio + self.BLOCO_LINHAS, n_linhas), dtype=np.intp)
+            for k in range(0, self.n_arvores, self.BLOCO_ARVORES):
+                nos[k:k + self.BLOCO_ARVORES, inicio:inicio + len(linhas)] = self._percorrer(
+                    X_plano, linhas, self.raizes[k:k + self.BLOCO_ARVORES])
+        return nos
+
+    def _percorrer(self, X_plano, linhas, raizes):
+        # Folhas alcançadas pelas `linhas` nas árvores de `raizes`: (len(raizes), len(linhas))
+        base = np.tile(linhas * self.n_features, len(raizes))
+        nos = np.repeat(raizes, len(linhas))
+
+        for _ in range(self.profundidade):
+            direita = X_plano[base + self.feature[nos]] > self.limiar[nos]
+            nos = self._filhos_plano[(nos << 1) + direita]
+
+        return nos.reshape(len(raizes), len(linhas))
+
+    def proba_folhas(self, nos):
+        # Probabilidades a partir das folhas (n_arvores, n_linhas), venham elas de folhas()
+        # ou do apply() do sklearn. Soma sequencial árvore a árvore, na mesma ordem do
+        # sklearn, e depois a média; em lotes grandes a soma é acumulada árvore por árvore
+        # para não materializar (n_arvores, n_linhas, n_classes)
+        if nos.shape[1] <= self.LINHAS_TRAVESSIA_UNICA:
+            proba = np.add.reduce(self.valores[nos], axis=0, dtype=np.float64)
+        else:
+            proba = np.zeros((nos.shape[1], self.valores.shape[1]))
+            folhas = np.empty(proba.shape, dtype=self.valores.dtype)
+            for nos_arvore in nos:
+                np.take(self.valores, nos_arvore, axis=0, out=folhas)
+                proba += folhas
+        if self.escala is None:
+            proba /= self.n_arvores
+        else:
+            # Distribuições quantizadas não somam exatamente `escala`: renormaliza por linha
+            proba /= proba.sum(axis=1, keepdims=True)
+        return proba
+
+    def predict_proba(self, X):
+        return self.proba_folhas(self.folhas(X))
+
+    def predict(self, X):
+        return self.classes.take(np.argmax(self.predict_proba(X), axis=1), axis=0)
+
+    # --- ATRIBUIÇÃO POR CAMINHO ---
+    def _distribuicoes(self):
+        valores = np.asarray(self.valores, dtype=np.float64)
+        return valores / self.escala if self.escala is not None else valores
+
+    def preparar_explicacao(self):
+        # Cada folha tem um único caminho a partir da raiz, então o crédito de cada
+        # feature até ela é fixo: calculado uma vez, nível a nível, para todas as folhas.
+        # Guarda (n_folhas, n_features * n_classes) e o índice de cada nó nessa tabela.
+        if self._contribuicoes_folhas is None:
+            valores = self._distribuicoes()
+            n_nos, n_classes = valores.shape
+            acumulado = np.zeros((n_nos, self.n_features, n_classes))
+            internos = self.filhos[:, 0] != np.arange(n_nos)
+
+            nos = self.raizes[internos[self.raizes]]
+            while len(nos):
+                for lado in (0, 1):
+                    filhos = self.filhos[nos, lado]
+                    acumulado[filhos] = acumulado[nos]
+                    acumulado[filhos, self.feature[nos]] += valores[filhos] - valores[nos]
+                nos = self.filhos[nos].ravel()
+                nos = nos[internos[nos]]
+
+            folhas = np.flatnonzero(~internos)
+            self._linha_folha = np.full(n_nos, -1, dtype=np.intp)
+            self._linha_folha[folhas] = np.arange(len(folhas))
+            self._contribuicoes_folhas = acumulado[folhas].reshape(len(folhas), -1)
+            self._base = valores[self.raizes].mean(axis=0)
+        return self._contribuicoes_folhas
+
+    @property
+    def base(self):
+        # Distribuição média das raízes: o ponto de partida das contribuições
+        self.preparar_explicacao()
+        return self._base
+
+    def assinatura(self):
+        # Impressão digital da estrutura e das folhas: identifica a floresta de que uma
+        # tabela de explicação gravada foi calculada
+        h = hashlib.sha256()
+        for vetor in (self.raizes, self.feature, self.limiar, self.filhos, self.valores):
+            vetor = np.ascontiguousarray(vetor)
+            h.update(str(vetor.dtype).encode())
+            h.update(vetor.tobytes())
+        h.update(repr(self.escala).encode())
+        return h.hexdigest()
+
+    def salvar_explicacao(self, caminho):
+        self.preparar_explicacao()
+        gravar_artefato({
+            "contribuicoes_folhas": self._contribuicoes_folhas,
+            "linha_folha": self._linha_folha,
+            "base": self._base,
+            "origem": self.assinatura(),
+        }, caminho)
+
+    def carregar_explicacao(self, caminho):
+        # Tabela mapeada em memória (mmap_mode='r'), aceita só se veio desta floresta
+        estado = joblib.load(caminho, mmap_mode='r')
+        if estado.get('origem') != self.assinatura():
+            raise ValueError(f"{caminho} não foi calculado a partir desta floresta")
+        self._contribuicoes_folhas = estado["contribuicoes_folhas"]
+        self._linha_folha = estado["linha_folha"]
+        self._base = estado["base"]
+
+    def carregar_ou_preparar_explicacao(self, caminho):
+        # Como carregar_ou_compilar: reaproveita a tabela gravada; senão calcula e tenta
+        # gravar para os outros workers e as próximas cargas
+        try:
+            self.carregar_explicacao(caminho)
+            return
+        except Exception:
+            pass
+        self.preparar_explicacao()
+        try:
+            self.salvar_explicacao(caminho)
+            self.carregar_explicacao(caminho)
+        except OSError:
+            # Sistema de arquivos somente leitura: segue com a tabela em memória
+            pass
+
+    def explicar(self, X, tamanho_bloco=8):
+        # Retorna (probabilidades, base, contribuições): base (n_classes,) é a média das
+        # raízes e contribuições (n_linhas, n_features, n_classes) o crédito de cada feature.
+        # Uma única travessia dá as folhas; a explicação é a soma das linhas da tabela
+        # dessas folhas, em blocos de linhas para limitar o temporário.
+        return self.explicar_folhas(self.folhas(X), tamanho_bloco)
+
+    def explicar_folhas(self, nos, tamanho_bloco=8):
+        tabela = self.preparar_explicacao()
+        linhas = self._linha_folha[nos]
+        n_linhas = nos.shape[1]
+
+        contribuicoes = np.empty((n_linhas, tabela.shape[1]))
+        for i in range(0, n_linhas, tamanho_bloco):
+            np.add.reduce(tabela[linhas[:, i:i + tamanho_bloco]], axis=0, out=contribuicoes[i:i + tamanho_bloco])
+        contribuicoes /= self.n_arvores
+        return self.proba_folhas(nos), self._base, contribuicoes.reshape(n_linhas, self.n_features, -1)
+
+
+# --- VERIFICAÇÃO E LATÊNCIA (python floresta.py) ---
+def _percentis(tempos):
+    tempos = np.asarray(tempos) * 1e6
+    return {"p50_us": float(np.percentile(tempos, 50)), "p99_us": float(np.percentile(tempos, 99))}
+
+
+def main():
+    import pandas as pd
+
+    parser = argparse.ArgumentParser(description="Compara a floresta compilada com o sklearn")
+    parser.add_argument('--modelo', default='modelo.pkl')
+    parser.add_argument('--scaler', default='scaler.pkl')
+    parser.add_argument('--dados', default='../data/dados_limpos.csv')
+    parser.add_argument('--amostras', type=int, default=500, help="Linhas usadas na medição de latência")
+    args = parser.parse_args()
+
+    modelo = joblib.load(args.modelo)
+    scaler = joblib.load(args.scaler)
+    floresta = FlorestaCompilada.from_sklearn(modelo)
+
+    df = pd.read_csv(args.dados)
+    X_scaled = scaler.transform(df[list(scaler.feature_names_in_)])
+
+    esperado = modelo.predict_proba(X_scaled)
+    obtido = floresta.predict_proba(X_scaled)
+    identico = np.array_equal(esperado, obtido)
+    print(f"Probabilidades bit a bit idênticas em {len(X_scaled)} linhas: {identico}")
+    if not identico:
+        print(f"   Diferença máxima: {np.max(np.abs(esperado - obtido)):.3e}")
+
+    linhas = X_scaled[:args.amostras]
+    tempos_sklearn, tempos_compilada = [], []
+    for linha in linhas:
+        linha = linha[np.newaxis, :]
+        t0 = time.perf_counter()
+        modelo.predict(linha)
+        modelo.predict_proba(linha)
+        tempos_sklearn.append(time.perf_counter() - t0)
+
+        t0 = time.perf_counter()
+        floresta.predict_proba(linha)
+        tempos_compilada.append(time.perf_counter() - t0)
+
+    sk, fc = _percentis(tempos_sklearn), _percentis(tempos_compilada)
+    print(f"sklearn  (predict + predict_proba): p50 {sk['p50_us']:.0f} µs | p99 {sk['p99_us']:.0f} µs")
+    print(f"compilada (predict_proba)         : p50 {fc['p50_us']:.0f} µs | p99 {fc['p99_us']:.0f} µs")
+    return 0 if identico else 1
+
+
+if __name__ == '__main__':
+    raise SystemExit(main())
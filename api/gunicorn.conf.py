@@ -0,0 +1,64 @@
+# api/gunicorn.conf.py
+# Modo de produção: pool de workers pré-forkados, um por núcleo.
+# O app é carregado uma única vez no processo pai (preload_app) e os workers
+# herdam modelo e scaler por copy-on-write; a floresta compilada fica em um
+# artefato mapeado em memória, compartilhado por todos eles.
+import os
+import signal
+import multiprocessing
+
+bind = f"0.0.0.0:{os.environ.get('PORT', 5000)}"
+workers = int(os.environ.get('WEB_CONCURRENCY', multiprocessing.cpu_count()))
+worker_class = 'gthread'
+threads = int(os.environ.get('GUNICORN_THREADS', 4))
+preload_app = True
+
+# Encerramento gracioso: após o SIGTERM cada worker para de aceitar conexões e
+# tem até graceful_timeout segundos para concluir as requisições em andamento
+graceful_timeout = int(os.environ.get('GUNICORN_GRACEFUL_TIMEOUT', 30))
+timeout = int(os.environ.get('GUNICORN_TIMEOUT', 60))
+keepalive = 5
+
+accesslog = None
+errorlog = '-'
+loglevel = os.environ.get('GUNICORN_LOG_LEVEL', 'info')
+
+
+def on_starting(server):
+    # Retratos de métricas (e a base) de uma execução anterior não devem somar com os atuais
+    diretorio = os.environ.get('METRICAS_DIR')
+    if diretorio and os.path.isdir(diretorio):
+        for nome in os.listdir(diretorio):
+            if nome.endswith('.json') or nome.endswith('.tmp'):
+                os.remove(os.path.join(diretorio, nome))
+
+
+def worker_exit(server, worker):
+    # No próprio worker, ao sair: publica as contagens desde o último retrato periódico
+    import app
+
+    app.metricas.publicar_final()
+
+
+def child_exit(server, worker):
+    # No mestre, depois que um worker morre ou é reciclado: o retrato dele é somado à
+    # base comum e o arquivo do pid é apagado, para não se acumularem no diretório
+    diretorio = os.environ.get('METRICAS_DIR')
+    if diretorio and os.path.isdir(diretorio):
+        from telemetria import incorporar_processo
+
+        incorporar_processo(diretorio, worker.pid)
+
+
+def post_worker_init(worker):
+    # Marca o app como "encerrando" antes de repassar o SIGTERM ao gunicorn,
+    # para que /ready responda 503 durante o esvaziamento do worker
+    import app
+
+    encerrar_original = worker.handle_exit
+
+    def handle_exit(sig, frame):
+        app.marcar_encerrando()
+        encerrar_original(sig, frame)
+
+    signal.signal(signal.SIGTERM, handle_exit)
@@ -0,0 +1,97 @@
+# api/microlote.py
+# Agrupador de micro-lotes para requisições de um único registro.
+#
+# Cada chamada de submeter() entrega uma linha já codificada e fica bloqueada até o
+# resultado chegar. Uma thread de fundo junta as linhas que chegam dentro da janela
+# configurada (ou até o tamanho máximo do lote), executa a função de avaliação uma
+# única vez sobre a matriz empilhada e devolve a cada chamador a sua própria linha.
+import os
+import queue
+import threading
+import time
+from concurrent.futures import Future
+
+import numpy as np
+
+
+class MicroLote:
+
+    def __init__(self, avaliar, janela_ms=3.0, tamanho_max=64):
+        if tamanho_max < 1:
+            raise ValueError("tamanho_max deve ser >= 1")
+        self.avaliar = avaliar
+        self.janela = janela_ms / 1000.0
+        self.tamanho_max = int(tamanho_max)
+
+        self._fila = queue.Queue()
+        self._thread = None
+        self._pid = None
+        self._trava = threading.Lock()
+
+        # Contadores (atualizados apenas pela thread de fundo)
+        self._lotes = 0
+        self._linhas = 0
+        self._tempo_fila = 0.0
+        self._tempo_avaliacao = 0.0
+
+    def _garantir_thread(self):
+        # Threads não sobrevivem a um fork: cada processo inicia a sua na primeira chamada
+        if self._thread is not None and self._pid == os.getpid():
+            return
+        with self._trava:
+            if self._thread is not None and self._pid == os.getpid():
+                return
+            self._fila = queue.Queue()
+            self._pid = os.getpid()
+            self._thread = threading.Thread(target=self._laco, name="microlote", daemon=True)
+            self._thread.start()
+
+    def submeter(self, linha, timeout=None):
+        self._garantir_thread()
+        futuro = Future()
+        self._fila.put((np.asarray(linha, dtype=np.float64), time.perf_counter(), futuro))
+        return futuro.result(timeout=timeout)
+
+    def _coletar(self):
+        itens = [self._fila.get()]
+        prazo = time.perf_counter() + self.janela
+        while len(itens) < self.tamanho_max:
+            restante = prazo - time.perf_counter()
+            if restante <= 0:
+                break
+            try:
+                itens.append(self._fila.get(timeout=restante))
+            except queue.Empty:
+                break
+        return itens
+
+    def _laco(self):
+        while True:
+            itens = self._coletar()
+            inicio = time.perf_counter()
+            try:
+                resultados = self.avaliar(np.vstack([linha for linha, _, _ in itens]))
+            except Exception as e:
+                for _, _, futuro in itens:
+                    futuro.set_exception(e)
+            else:
+                for (_, _, futuro), resultado in zip(itens, resultados):
+                    futuro.set_result(resultado)
+
+            self._lotes += 1
+            self._linhas += len(itens)
+            self._tempo_fila += sum(inicio - chegada for _, chegada, _ in itens)
+            self._tempo_avaliacao += time.perf_counter() - inicio
+
+    def estatisticas(self):
+        lotes, linhas = self._lotes, self._linhas
+        return {
+            "janela_ms": self.janela * 1000.0,
+            "tamanho_max": self.tamanho_max,
+            "lotes": lotes,
+            "linhas": linhas,
+            "media_tamanho_lote": linhas / lotes if lotes else 0.0,
+            "media_fila_ms": self._tempo_fila / linhas * 1000.0 if linhas else 0.0,
+            "tempo_fila_total_s": self._tempo_fila,
+            "tempo_avaliacao_total_s": self._tempo_avaliacao,
+        }
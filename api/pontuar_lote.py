@@ -0,0 +1,240 @@
+# api/pontuar_lote.py
+# Pontuação em massa de arquivos CSV de pacientes, em blocos e com pool de processos.
+#
+# Aceita o CSV no formato original (Gender, FAVC, MTRANS...), no formato da API
+# (colunas em português, como no /predict) ou já limpo (dados_limpos.csv). Cada bloco
+# passa pela mesma codificação e normalização da API e é distribuído a um pool de
+# processos que herda o modelo carregado no processo pai (fork, copy-on-write).
+# Os resultados são gravados em CSV ou Parquet na ordem da entrada, com no máximo
+# alguns blocos em memória ao mesmo tempo, independentemente do tamanho do arquivo.
+#
+# Uso:
+#   python pontuar_lote.py ../data/Obesity.csv resultados.csv
+#   python pontuar_lote.py pacientes.csv resultados.parquet --processos 8 --tamanho-bloco 20000
+import os
+import sys
+import time
+import argparse
+import multiprocessing
+from collections import deque
+
+import joblib
+import numpy as np
+import pandas as pd
+
+from codificador import COLUNAS_MODELO, MAPA_COLUNAS_ORIGINAIS, CodificadorFeatures
+
+# Dicionário de mapeamento para tradução clínica (o mesmo da API)
+TARGET_MAP_REAL = {
+    0: "Abaixo do Peso",
+    1: "Peso Normal",
+    2: "Sobrepeso G. I",
+    3: "Sobrepeso G. II",
+    4: "Obesidade G. I",
+    5: "Obesidade G. II",
+    6: "Obesidade G. III"
+}
+
+# Tipos da saída Parquet, fixados antes do primeiro bloco: o esquema inferido de um
+# bloco sem rejeições teria 'erro' (todo nulo) com tipo null, e o bloco seguinte que
+# trouxesse uma mensagem não caberia nele. Colunas copiadas com --manter são texto.
+TIPOS_PARQUET = {
+    'linha': 'int64',
+    'classe': 'int64',
+    'diagnostico': 'string',
+    'confianca': 'float64',
+    'risco_total': 'float64',
+    'erro': 'string',
+}
+
+# Estado de cada processo. No fork os workers herdam o que o pai já carregou.
+_modelo = None
+_scaler = None
+_codificadores = None
+
+
+def carregar_artefatos(caminho_modelo, caminho_scaler):
+    global _modelo, _scaler, _codificadores
+    if _modelo is None:
+        _modelo = joblib.load(caminho_modelo)
+        # Um bloco por processo: o paralelismo vem do pool, não do joblib interno
+        _modelo.n_jobs = 1
+        _scaler = joblib.load(caminho_scaler)
+        # Formato da API: mesmas regras do /predict. Formato original: sem Score_Atletico
+        # e Possivel_Atleta, derivados como no formulário do Streamlit
+        _codificadores = {
+            'api': CodificadorFeatures(COLUNAS_MODELO),
+            'original': CodificadorFeatures(COLUNAS_MODELO, derivar_atleticas=True),
+        }
+
+
+def detectar_formato(colunas):
+    colunas = set(colunas)
+    if set(COLUNAS_MODELO) <= colunas:
+        return 'limpo'
+    if colunas & (set(MAPA_COLUNAS_ORIGINAIS) - {'Obesity'}):
+        return 'original'
+    return 'api'
+
+
+def pontuar_bloco(inicio, bloco, formato):
+    # Executado nos workers: codifica, normaliza e avalia um bloco de linhas
+    n = len(bloco)
+    erros = np.full(n, None, dtype=object)
+
+    if formato == 'limpo':
+        # dados_limpos.csv já está no espaço de features do treino: só valores ausentes
+        # ou não finitos são recusados, sem as faixas (FAIXAS) e domínios do /predict
+        X = bloco[COLUNAS_MODELO].to_numpy(dtype=np.float64)
+        validos = np.isfinite(X).all(axis=1)
+        erros[~validos] = "Valor ausente ou inválido"
+        X = X[validos]
+        indices_validos = np.flatnonzero(validos)
+    else:
+        if formato == 'original':
+            bloco = bloco.rename(columns=MAPA_COLUNAS_ORIGINAIS)
+        # Mesmas regras do /predict, aplicadas por coluna em vez de registro a registro
+        X, indices_validos, mensagens = _codificadores[formato].codificar_tabela(bloco)
+        for i, mensagem in mensagens.items():
+            erros[i] = mensagem
+
+    classe = np.full(n, -1, dtype=np.int64)
+    confianca = np.full(n, np.nan)
+    risco_total = np.full(n, np.nan)
+
+    if len(X):
+        # Mesma normalização e mesma regra de risco acumulado da API
+        X_scaled = (X - _scaler.mean_) / _scaler.scale_
+        probabilidades = _modelo.predict_proba(X_scaled)
+        classe[indices_validos] = _modelo.classes_[np.argmax(probabilidades, axis=1)]
+        confianca[indices_validos] = probabilidades.max(axis=1)
+        risco_total[indices_validos] = probabilidades[:, 2:].sum(axis=1)
+
+    diagnostico = pd.Series(classe).map(TARGET_MAP_REAL)
+    return pd.DataFrame({
+        "linha": np.arange(inicio, inicio + n),
+        "classe": classe,
+        "diagnostico": diagnostico.where(classe >= 0, None),
+        "confianca": confianca,
+        "risco_total": risco_total,
+        "erro": erros,
+    })
+
+
+def _tarefa(argumentos):
+    return pontuar_bloco(*argumentos)
+
+
+class GravadorResultados:
+
+    def __init__(self, caminho):
+        self.caminho = caminho
+        self.parquet = caminho.lower().endswith(('.parquet', '.pq'))
+        self._escritor = None
+        self._esquema = None
+        self._cabecalho = True
+
+    def escrever(self, df):
+        if self.parquet:
+            try:
+                import pyarrow as pa
+                import pyarrow.parquet as pq
+            except ImportError:
+                raise SystemExit("Saída Parquet requer o pacote pyarrow (pip install pyarrow)")
+            if self._esquema is None:
+                self._esquema = pa.schema([(c, getattr(pa, TIPOS_PARQUET.get(c, 'string'))()) for c in df.columns])
+                self._escritor = pq.ParquetWriter(self.caminho, self._esquema)
+            extras = [c for c in df.columns if c not in TIPOS_PARQUET]
+            if extras:
+                df = df.assign(**{c: df[c].astype('string') for c in extras})
+            self._escritor.write_table(pa.Table.from_pandas(df, schema=self._esquema, preserve_index=False))
+        else:
+            df.to_csv(self.caminho, mode='w' if self._cabecalho else 'a', header=self._cabecalho, index=False)
+            self._cabecalho = False
+
+    def fechar(self):
+        if self._escritor is not None:
+            self._escritor.close()
+
+
+def pontuar_arquivo(entrada, saida, formato='auto', tamanho_bloco=10000, processos=None,
+                    manter=(), caminho_modelo='modelo.pkl', caminho_scaler='scaler.pkl'):
+    processos = processos or os.cpu_count() or 1
+    carregar_artefatos(caminho_modelo, caminho_scaler)
+
+    leitor = pd.read_csv(entrada, chunksize=tamanho_bloco, skipinitialspace=True)
+    gravador = GravadorResultados(saida)
+    total = 0
+
+    def blocos():
+        nonlocal formato
+        inicio = 0
+        for bloco in leitor:
+            bloco.columns = bloco.columns.str.strip()
+            if formato == 'auto':
+                formato = detectar_formato(bloco.columns)
+            yield inicio, bloco, formato
+            inicio += len(bloco)
+
+    def gravar(bloco, resultado):
+        if manter:
+            extras = bloco[list(manter)].reset_index(drop=True)
+            resultado = pd.concat([resultado, extras], axis=1)
+        gravador.escrever(resultado)
+
+    try:
+        if processos == 1:
+            for inicio, bloco, fmt in blocos():
+                gravar(bloco, pontuar_bloco(inicio, bloco, fmt))
+                total += len(bloco)
+        else:
+            # Fork: os workers herdam modelo e scaler já carregados, sem novo unpickle
+            metodo = 'fork' if 'fork' in multiprocessing.get_all_start_methods() else None
+            contexto = multiprocessing.get_context(metodo)
+            with contexto.Pool(processos, initializer=carregar_artefatos,
+                               initargs=(caminho_modelo, caminho_scaler)) as pool:
+                # No máximo 2 blocos por processo em voo: memória constante e ordem preservada
+                pendentes = deque()
+                for inicio, bloco, fmt in blocos():
+                    pendentes.append((bloco, pool.apply_async(_tarefa, ((inicio, bloco, fmt),))))
+                    if len(pendentes) >= 2 * processos:
+                        b, r = pendentes.popleft()
+                        gravar(b, r.get())
+                        total += len(b)
+                while pendentes:
+                    b, r = pendentes.popleft()
+                    gravar(b, r.get())
+                    total += len(b)
+    finally:
+        gravador.fechar()
+    return total
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Pontuação em massa de pacientes a partir de CSV")
+    parser.add_argument('entrada', help="CSV no formato original, da API ou dados_limpos.csv")
+    parser.add_argument('saida', help="Arquivo de saída (.csv ou .parquet)")
+    parser.add_argument('--formato', choices=['auto', 'original', 'api', 'limpo'], default='auto',
+                        help="'original' e 'api' passam pelas validações do /predict; 'limpo' "
+                             "(dados_limpos.csv) só recusa valores ausentes ou não finitos, sem "
+                             "conferir as faixas de FAIXAS nem os domínios das colunas")
+    parser.add_argument('--tamanho-bloco', type=int, default=10000)
+    parser.add_argument('--processos', type=int, default=None, help="Padrão: número de núcleos")
+    parser.add_argument('--manter', default='', help="Colunas da entrada copiadas para a saída (separadas por vírgula)")
+    parser.add_argument('--modelo', default='modelo.pkl')
+    parser.add_argument('--scaler', default='scaler.pkl')
+    args = parser.parse_args()
+
+    inicio = time.perf_counter()
+    total = pontuar_arquivo(
+        args.entrada, args.saida, formato=args.formato, tamanho_bloco=args.tamanho_bloco,
+        processos=args.processos, manter=[c for c in args.manter.split(',') if c],
+        caminho_modelo=args.modelo, caminho_scaler=args.scaler,
+    )
+    duracao = time.perf_counter() - inicio
+    print(f"✅ {total} linhas pontuadas em {duracao:.1f}s ({total / duracao:.0f} linhas/s) -> {args.saida}",
+          file=sys.stderr)
+
+
+if __name__ == '__main__':
+    main()
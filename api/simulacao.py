@@ -0,0 +1,168 @@
+# api/simulacao.py
+# Simulação "e se" de mudanças de hábitos para um paciente.
+#
+# A partir de um registro e dos hábitos modificáveis (cada um com os valores a
+# testar), a grade completa de vetores contrafactuais é montada direto na matriz de
+# features: cada valor é codificado uma única vez e as combinações são só cópias de
+# colunas. Todas as linhas passam pela floresta em uma avaliação vetorizada, e o
+# resultado resume o risco_total de cada mudança isolada e das melhores combinações.
+import numpy as np
+
+from codificador import FAIXAS, ErroValidacao
+
+
+def _grade(coluna, passo=1):
+    # Valores inteiros da faixa válida da feature (FAIXAS, a mesma dos sliders)
+    minimo, maximo = FAIXAS[coluna]
+    return list(range(int(minimo), int(maximo) + 1, passo))
+
+
+# Valores testados por padrão para cada hábito modificável (rótulos do formulário)
+VALORES_HABITOS = {
+    'Consumo_Agua': _grade('Consumo_Agua'),
+    'Freq_Atividade_Fisica': _grade('Freq_Atividade_Fisica'),
+    'Tempo_uso_dispositivos_eletronicos': _grade('Tempo_uso_dispositivos_eletronicos', passo=4),
+    'Consumo_Frequente_Alta_Caloria': ["Não", "Sim"],
+    'Freq_Vegetais': _grade('Freq_Vegetais'),
+    'Transporte': ["Automóvel", "Transp. Público", "Caminhada", "Bicicleta", "Moto"],
+    'Num_refeicoes': _grade('Num_refeicoes'),
+    'Comes_Entre_Refeicoes': ["Não", "Às vezes", "Freq.", "Sempre"],
+    'Consumo_Alcool': ["Não bebo", "Às vezes", "Freq.", "Sempre"],
+    'Fumante': ["Não", "Sim"],
+    'Monitora_Calorias': ["Não", "Sim"],
+}
+
+# Hábitos simulados quando a requisição não escolhe nenhum
+HABITOS_PADRAO = [
+    'Consumo_Agua', 'Freq_Atividade_Fisica', 'Tempo_uso_dispositivos_eletronicos',
+    'Consumo_Frequente_Alta_Caloria', 'Freq_Vegetais', 'Transporte',
+]
+
+
+class LimiteExcedido(ValueError):
+    pass
+
+
+class SimuladorHabitos:
+
+    def __init__(self, codificador, avaliar, resumir, max_combinacoes=50000, tamanho_bloco=4096):
+        self.codificador = codificador
+        self.avaliar = avaliar                  # matriz (n, n_features) -> probabilidades
+        self.resumir = resumir                  # linha de probabilidades -> payload clínico
+        self.max_combinacoes = max_combinacoes
+        self.tamanho_bloco = tamanho_bloco
+
+    def _opcoes(self, habitos):
+        if habitos is None:
+            habitos = HABITOS_PADRAO
+        if isinstance(habitos, (list, tuple)):
+            habitos = {h: None for h in habitos}
+        if not isinstance(habitos, dict) or not habitos:
+            raise ErroValidacao("'habitos' deve ser uma lista de nomes ou um objeto {hábito: [valores]}")
+
+        opcoes = {}
+        for habito, valores in habitos.items():
+            if habito not in VALORES_HABITOS:
+                raise ErroValidacao(f"Hábito não modificável: {habito!r}")
+            if valores is None:
+                valores = VALORES_HABITOS[habito]
+            if not isinstance(valores, list) or not valores:
+                raise ErroValidacao(f"Valores de '{habito}' devem ser uma lista não vazia")
+            opcoes[habito] = valores
+        return opcoes
+
+    def _variacoes(self, paciente, base, habito, valores):
+        # Codifica cada valor uma vez; a opção 0 é sempre o valor atual do paciente.
+        # Valores que resultam no mesmo vetor (ex.: o próprio valor atual) são descartados.
+        rotulos, vetores, vistos = [paciente.get(habito)], [base], {base.tobytes()}
+        for valor in valores:
+            vetor = self.codificador.codificar({**paciente, habito: valor})
+            if vetor.tobytes() in vistos:
+                continue
+            vistos.add(vetor.tobytes())
+            rotulos.append(valor)
+            vetores.append(vetor)
+        vetores = np.array(vetores)
+        # Colunas afetadas pelo hábito (o transporte, por exemplo, muda várias one-hot)
+        colunas = np.flatnonzero((vetores != base).any(axis=0))
+        return rotulos, vetores[:, colunas], colunas
+
+    def montar_grade(self, paciente, habitos=None):
+        if not isinstance(paciente, dict):
+            raise ErroValidacao("'paciente' deve ser um objeto JSON")
+        opcoes = self._opcoes(habitos)
+        base = self.codificador.codificar(paciente)
+
+        nomes, rotulos, blocos, colunas_por_habito = [], [], [], []
+        usadas = set()
+        for habito, valores in opcoes.items():
+            r, b, colunas = self._variacoes(paciente, base, habito, valores)
+            if usadas & set(colunas):
+                raise ErroValidacao(f"'{habito}' altera as mesmas features de outro hábito simulado")
+            usadas |= set(colunas)
+            nomes.append(habito)
+            rotulos.append(r)
+            blocos.append(b)
+            colunas_por_habito.append(colunas)
+
+        forma = tuple(len(r) for r in rotulos)
+        n = int(np.prod(forma))
+        if n > self.max_combinacoes:
+            raise LimiteExcedido(f"Simulação geraria {n} combinações (limite de {self.max_combinacoes})")
+
+        # Linha k da grade = índice multidimensional das opções; a linha 0 é o paciente atual
+        indices = np.indices(forma).reshape(len(forma), n)
+        X = np.repeat(base[np.newaxis, :], n, axis=0)
+        for j, colunas in enumerate(colunas_por_habito):
+            if len(colunas):
+                X[:, colunas] = blocos[j][indices[j]]
+        return X, indices, nomes, rotulos
+
+    def simular(self, paciente, habitos=None, top=5):
+        if isinstance(top, bool) or not isinstance(top, int) or top < 1:
+            raise ErroValidacao(f"'top' deve ser um inteiro maior ou igual a 1, recebido {top!r}")
+        X, indices, nomes, rotulos = self.montar_grade(paciente, habitos)
+
+        probabilidades = np.vstack([
+            self.avaliar(X[i:i + self.tamanho_bloco]) for i in range(0, len(X), self.tamanho_bloco)
+        ])
+        risco = probabilidades[:, 2:].sum(axis=1)
+        risco_atual = float(risco[0])
+
+        # Mudanças isoladas: um hábito alterado, os demais no valor atual
+        forma = tuple(len(r) for r in rotulos)
+        mudancas = []
+        for j, habito in enumerate(nomes):
+            for opcao in range(1, forma[j]):
+                posicao = [0] * len(forma)
+                posicao[j] = opcao
+                k = int(np.ravel_multi_index(posicao, forma))
+                mudancas.append({
+                    "habito": habito,
+                    "de": rotulos[j][0],
+                    "para": rotulos[j][opcao],
+                    "risco_total": float(risco[k]),
+                    "delta": float(risco[k] - risco_atual),
+                })
+        mudancas.sort(key=lambda m: m["delta"])
+
+        # Melhores combinações: menor risco e, no empate, menos hábitos alterados
+        n_alteracoes = (indices != 0).sum(axis=0)
+        ordem = np.lexsort((n_alteracoes, risco))
+        melhores = []
+        for k in ordem[:top + 1]:
+            if k == 0 or risco[k] >= risco_atual or len(melhores) == top:
+                continue
+            melhores.append({
+                "alteracoes": {nomes[j]: rotulos[j][indices[j, k]] for j in range(len(nomes)) if indices[j, k]},
+                **self.resumir(probabilidades[k]),
+                "delta": float(risco[k] - risco_atual),
+            })
+
+        return {
+            "atual": self.resumir(probabilidades[0]),
+            "mudancas": mudancas,
+            "melhores": melhores,
+            "combinacoes": int(len(X)),
+            "habitos": {h: r[1:] for h, r in zip(nomes, rotulos)},
+        }
@@ -0,0 +1,305 @@
+# api/telemetria.py
+# Métricas de latência por etapa e contadores no formato texto do Prometheus,
+# além do log opcional e assíncrono das predições.
+#
+# Cada thread acumula as suas próprias observações (sem travas no caminho quente);
+# os acumuladores só são somados quando /metrics é consultado, e os de threads que já
+# terminaram são incorporados a uma base comum e descartados. Com vários workers
+# do gunicorn, METRICAS_DIR faz cada processo publicar periodicamente o seu retrato
+# em disco para que qualquer worker consiga responder com o agregado de todos. Quando
+# um worker termina, o processo mestre incorpora o retrato dele a base.json e apaga o
+# arquivo (incorporar_processo). Medidores (gauges) não vão para o disco: cada worker
+# exporta só os seus, com o rótulo pid, então só aparecem processos vivos.
+import os
+import atexit
+import json
+import glob
+import queue
+import logging
+import threading
+import time
+from bisect import bisect_left
+from logging.handlers import QueueHandler, QueueListener
+
+# Limites dos buckets de latência, em segundos
+BUCKETS = (0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5)
+
+# Retrato acumulado dos workers que já terminaram, em METRICAS_DIR
+BASE = 'base.json'
+
+
+class _Acumulador:
+
+    def __init__(self):
+        self.histogramas = {}   # (nome, rótulos) -> [contagens por bucket..., +Inf, soma]
+        self.contadores = {}    # (nome, rótulos) -> valor
+
+    def somar(self, outro):
+        for chave, valores in list(outro.histogramas.items()):
+            total = self.histogramas.setdefault(chave, [0] * len(valores[:-1]) + [0.0])
+            for i, v in enumerate(valores):
+                total[i] += v
+        for chave, valor in list(outro.contadores.items()):
+            self.contadores[chave] = self.contadores.get(chave, 0) + valor
+
+
+class Metricas:
+
+    def __init__(self, prefixo='preditor', diretorio=None, intervalo_publicacao=5.0):
+        self.prefixo = prefixo
+        self.diretorio = diretorio
+        self.intervalo_publicacao = intervalo_publicacao
+        self._ajuda = {}
+        self._medidores = {}
+        self._local = threading.local()
+        self._acumuladores = []     # (thread, acumulador) das threads vivas
+        self._base = _Acumulador()  # soma das threads que já terminaram
+        self._trava = threading.Lock()
+        self._pid_publicador = None
+        self._processo = None       # identifica o retrato deste processo (pid + início)
+
+    def descrever(self, nome, ajuda):
+        self._ajuda[nome] = ajuda
+
+    def _acumulador(self):
+        acumulador = getattr(self._local, 'acumulador', None)
+        if acumulador is None:
+            acumulador = _Acumulador()
+            self._local.acumulador = acumulador
+            with self._trava:
+                self._acumuladores.append((threading.current_thread(), acumulador))
+            self._garantir_publicador()
+        return acumulador
+
+    # --- CAMINHO QUENTE ---
+    def observar(self, nome, segundos, rotulos=()):
+        historico = self._acumulador().histogramas
+        chave = (nome, rotulos)
+        valores = historico.get(chave)
+        if valores is None:
+            valores = historico[chave] = [0] * (len(BUCKETS) + 1) + [0.0]
+        valores[bisect_left(BUCKETS, segundos)] += 1
+        valores[-1] += segundos
+
+    def incrementar(self, nome, rotulos=(), valor=1):
+        contadores = self._acumulador().contadores
+        chave = (nome, rotulos)
+        contadores[chave] = contadores.get(chave, 0) + valor
+
+    def medidor(self, nome, ajuda, funcao, rotulos=None):
+        # Valor instantâneo lido apenas na coleta (ex.: tamanho do cache); `rotulos`,
+        # se dado, é uma função que devolve rótulos extras no momento da coleta
+        self._ajuda[nome] = ajuda
+        self._medidores[nome] = (funcao, rotulos)
+
+    # --- COLETA ---
+    def retrato(self):
+        # Soma os acumuladores de todas as threads deste processo. Threads encerradas
+        # não escrevem mais: as suas contagens vão para a base e o acumulador é solto
+        total = _Acumulador()
+        with self._trava:
+            vivos = []
+            for thread, acumulador in self._acumuladores:
+                if thread.is_alive():
+                    vivos.append((thread, acumulador))
+                else:
+                    self._base.somar(acumulador)
+            self._acumuladores = vivos
+            total.somar(self._base)
+        for _, acumulador in vivos:
+            total.somar(acumulador)
+        return total.histogramas, total.contadores
+
+    def _garantir_publicador(self):
+        if not self.diretorio or self._pid_publicador == os.getpid():
+            return
+        self._pid_publicador = os.getpid()
+        self._processo = f"{os.getpid()}-{time.time():.6f}"
+        threading.Thread(target=self._publicar_periodicamente, name="metricas", daemon=True).start()
+
+    def _publicar_periodicamente(self):
+        os.makedirs(self.diretorio, exist_ok=True)
+        while True:
+            time.sleep(self.intervalo_publicacao)
+            try:
+                self._publicar()
+            except OSError:
+                pass
+
+    def _publicar(self):
+        histogramas, contadores = self.retrato()
+        _gravar_retrato(os.path.join(self.diretorio, f"{os.getpid()}.json"), {
+            "processo": self._processo,
+            "histogramas": [[n, list(r), v] for (n, r), v in histogramas.items()],
+            "contadores": [[n, list(r), v] for (n, r), v in contadores.items()],
+        })
+
+    def publicar_final(self):
+        # Último retrato antes de o worker sair, para o mestre incorporar à base
+        if self.diretorio and self._pid_publicador == os.getpid():
+            try:
+                self._publicar()
+            except OSError:
+                pass
+
+    def _retratos_de_outros_processos(self):
+        if not self.diretorio:
+            return
+        # Os retratos dos workers são lidos antes da base: se um deles for incorporado no
+        # meio da leitura, a base nova o lista em "incorporados" e ele não conta duas vezes
+        proprio = os.path.join(self.diretorio, f"{os.getpid()}.json")
+        retratos = []
+        for caminho in glob.glob(os.path.join(self.diretorio, '*.json')):
+            if caminho != proprio and os.path.basename(caminho) != BASE:
+                estado = _ler_retrato(caminho)
+                if estado is not None:
+                    retratos.append(estado)
+        base = _ler_retrato(os.path.join(self.diretorio, BASE))
+        incorporados = set(base.get("incorporados", ())) if base else set()
+        for estado in retratos + ([base] if base else []):
+            if estado.get("processo") not in incorporados:
+                yield _decodificar(estado)
+
+    def agregado(self):
+        histogramas, contadores = self.retrato()
+        for outros_h, outros_c in self._retratos_de_outros_processos():
+            _somar_retrato(histogramas, contadores, outros_h, outros_c)
+        return histogramas, contadores
+
+    def exportar(self):
+        # Formato de exposição em texto do Prometheus (versão 0.0.4)
+        histogramas, contadores = self.agregado()
+        linhas = []
+
+        def rotulos_texto(rotulos, extra=()):
+            pares = list(rotulos) + list(extra)
+            if not pares:
+                return ''
+            return '{' + ','.join(f'{k}="{_escapar(v)}"' for k, v in pares) + '}'
+
+        nomes = sorted({n for n, _ in histogramas})
+        for nome in nomes:
+            completo = f"{self.prefixo}_{nome}"
+            linhas.append(f"# HELP {completo} {self._ajuda.get(nome, nome)}")
+            linhas.append(f"# TYPE {completo} histogram")
+            for (n, rotulos), valores in sorted(histogramas.items()):
+                if n != nome:
+                    continue
+                acumulado = 0
+                for limite, contagem in zip(BUCKETS + ('+Inf',), valores[:-1]):
+                    acumulado += contagem
+                    linhas.append(f"{completo}_bucket{rotulos_texto(rotulos, [('le', limite)])} {acumulado}")
+                linhas.append(f"{completo}_sum{rotulos_texto(rotulos)} {valores[-1]}")
+                linhas.append(f"{completo}_count{rotulos_texto(rotulos)} {acumulado}")
+
+        nomes = sorted({n for n, _ in contadores})
+        for nome in nomes:
+            completo = f"{self.prefixo}_{nome}"
+            linhas.append(f"# HELP {completo} {self._ajuda.get(nome, nome)}")
+            linhas.append(f"# TYPE {completo} counter")
+            for (n, rotulos), valor in sorted(contadores.items()):
+                if n == nome:
+                    linhas.append(f"{completo}{rotulos_texto(rotulos)} {valor}")
+
+        for nome, (funcao, rotulos) in sorted(self._medidores.items()):
+            completo = f"{self.prefixo}_{nome}"
+            extra = rotulos() if rotulos is not None else ()
+            linhas.append(f"# HELP {completo} {self._ajuda.get(nome, nome)}")
+            linhas.append(f"# TYPE {completo} gauge")
+            linhas.append(f"{completo}{rotulos_texto([('pid', os.getpid())], extra)} {float(funcao())}")
+
+        return '\n'.join(linhas) + '\n'
+
+
+# --- RETRATOS EM DISCO ---
+def _ler_retrato(caminho):
+    try:
+        with open(caminho) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def _gravar_retrato(destino, estado):
+    temporario = destino + ".tmp"
+    with open(temporario, 'w') as f:
+        json.dump(estado, f)
+    os.replace(temporario, destino)
+
+
+def _decodificar(estado):
+    return (
+        {(n, tuple(tuple(x) for x in r)): v for n, r, v in estado["histogramas"]},
+        {(n, tuple(tuple(x) for x in r)): v for n, r, v in estado["contadores"]},
+    )
+
+
+def _somar_retrato(histogramas, contadores, outros_h, outros_c):
+    for chave, valores in outros_h.items():
+        total = histogramas.setdefault(chave, [0] * len(valores[:-1]) + [0.0])
+        for i, v in enumerate(valores):
+            total[i] += v
+    for chave, valor in outros_c.items():
+        contadores[chave] = contadores.get(chave, 0) + valor
+
+
+def incorporar_processo(diretorio, pid):
+    # Chamado pelo mestre do gunicorn quando um worker morre ou é reciclado: soma o
+    # retrato dele em base.json e apaga o arquivo, para que contadores e histogramas
+    # continuem crescendo sem que os retratos de workers mortos se acumulem
+    caminho = os.path.join(diretorio, f"{pid}.json")
+    estado = _ler_retrato(caminho)
+    if estado is not None:
+        base = _ler_retrato(os.path.join(diretorio, BASE)) or {"histogramas": [], "contadores": []}
+        histogramas, contadores = _decodificar(base)
+        _somar_retrato(histogramas, contadores, *_decodificar(estado))
+        # "incorporados" só precisa cobrir retratos que ainda estão no disco
+        processo = estado.get("processo") or f"{pid}-"
+        incorporados = [p for p in base.get("incorporados", ())
+                        if p != processo and os.path.exists(os.path.join(diretorio, f"{p.split('-')[0]}.json"))]
+        _gravar_retrato(os.path.join(diretorio, BASE), {
+            "processo": BASE,
+            "incorporados": incorporados + [processo],
+            "histogramas": [[n, list(r), v] for (n, r), v in histogramas.items()],
+            "contadores": [[n, list(r), v] for (n, r), v in contadores.items()],
+        })
+    try:
+        os.remove(caminho)
+    except OSError:
+        pass
+
+
+def _escapar(valor):
+    return str(valor).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+class _HandlerFila(QueueHandler):
+    # QueueHandler que inicia o seu próprio QueueListener em cada processo: threads
+    # não sobrevivem ao fork dos workers, então o consumidor nasce no primeiro log
+    def __init__(self, destino):
+        super().__init__(queue.SimpleQueue())
+        self.destino = destino
+        self._pid = None
+
+    def enqueue(self, record):
+        if self._pid != os.getpid():
+            self._pid = os.getpid()
+            self.queue = queue.SimpleQueue()
+            ouvinte = QueueListener(self.queue, self.destino)
+            ouvinte.start()
+            # Esvazia a fila no encerramento do processo
+            atexit.register(ouvinte.stop)
+        super().enqueue(record)
+
+
+def configurar_log(nome='preditor', detalhado=False):
+    # Log das predições fora do caminho quente: a requisição apenas enfileira o registro
+    # e uma thread de fundo faz a escrita. Sem `detalhado`, só erros são registrados.
+    logger = logging.getLogger(nome)
+    if not logger.handlers:
+        destino = logging.StreamHandler()
+        destino.setFormatter(logging.Formatter('%(message)s'))
+        logger.addHandler(_HandlerFila(destino))
+        logger.propagate = False
+    logger.setLevel(logging.INFO if detalhado else logging.WARNING)
+    return logger
@@ -0,0 +1,309 @@
+# benchmarks/benchmark_inferencia.py
+# Benchmark reprodutível da inferência, usando os artefatos reais de produção
+# (api/modelo.pkl e api/scaler.pkl).
+#
+# Cenários:
+#   - API: predict() e predict_batch() via test client do Flask
+#   - Streamlit: análise local em processo, como em streamlit/main.py (predição,
+#     explicação e simulação de hábitos, sem e com o cache de predições)
+#   - Lote: pontuação de data/dados_limpos.csv inteiro (sklearn x floresta compilada,
+#     com travessia única e em blocos), e /predict/batch de 10k linhas sem cache
+#   - Concorrência: vários clientes simultâneos no /predict
+# Tamanhos de lote 1, 16, 256 e 10k. O resultado sai em JSON (vazão, p50/p95/p99,
+# tempos de importação/inicialização e o pico de RSS do processo do benchmark como
+# um todo, não por cenário) e pode ser comparado com uma execução de referência para
+# barrar regressões antes do deploy.
+#
+# Uso:
+#   python benchmarks/benchmark_inferencia.py --saida bench.json
+#   python benchmarks/benchmark_inferencia.py --comparar bench_referencia.json --tolerancia 0.25
+import os
+import sys
+import json
+import time
+import argparse
+import platform
+import resource
+import subprocess
+import threading
+import warnings
+
+import numpy as np
+import pandas as pd
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+PASTA_API = os.path.join(RAIZ, 'api')
+PASTA_STREAMLIT = os.path.join(RAIZ, 'streamlit')
+TAMANHOS_LOTE = (1, 16, 256, 10000)
+
+
+def percentis(tempos, linhas_por_chamada=1):
+    tempos = np.asarray(tempos)
+    total = tempos.sum()
+    return {
+        "chamadas": int(len(tempos)),
+        "linhas_por_chamada": int(linhas_por_chamada),
+        "vazao_linhas_s": float(len(tempos) * linhas_por_chamada / total) if total > 0 else None,
+        "p50_ms": float(np.percentile(tempos, 50) * 1000),
+        "p95_ms": float(np.percentile(tempos, 95) * 1000),
+        "p99_ms": float(np.percentile(tempos, 99) * 1000),
+    }
+
+
+def cronometrar(funcao, repeticoes, aquecimento=3):
+    for _ in range(aquecimento):
+        funcao()
+    tempos = []
+    for _ in range(repeticoes):
+        t0 = time.perf_counter()
+        funcao()
+        tempos.append(time.perf_counter() - t0)
+    return tempos
+
+
+def repeticoes_para(tamanho, orcamento_linhas):
+    return max(5, min(500, orcamento_linhas // tamanho))
+
+
+def pico_rss_processo_mb():
+    # Pico do processo inteiro até aqui (todos os cenários somados, inclusive o app e os
+    # artefatos carregados), não de um cenário isolado. ru_maxrss é em KB no Linux e em
+    # bytes no macOS
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return rss / (1024 * 1024) if sys.platform == 'darwin' else rss / 1024
+
+
+def medir_inicializacao():
+    # Importação dos módulos e carga do app em processos novos (partida a frio)
+    codigo = (
+        "import time; t0 = time.perf_counter(); {importacao}; "
+        "print(time.perf_counter() - t0)"
+    )
+    resultado = {}
+    for nome, importacao in [
+        ("import_bibliotecas_s", "import numpy, pandas, sklearn.ensemble, flask"),
+        ("carga_app_s", "import app"),
+    ]:
+        saida = subprocess.run(
+            [sys.executable, '-c', codigo.format(importacao=importacao)],
+            cwd=PASTA_API, capture_output=True, text=True, check=True,
+            env=dict(os.environ, CACHE_CAPACIDADE='0'),
+        )
+        resultado[nome] = float(saida.stdout.strip().splitlines()[-1])
+    return resultado
+
+
+def registros_originais(n, semente=42):
+    # Registros no formato aceito pela API, gerados a partir de data/Obesity.csv
+    from codificador import renomear_original
+    df = pd.read_csv(os.path.join(RAIZ, 'data', 'Obesity.csv'))
+    amostra = df.sample(n=n, replace=n > len(df), random_state=semente)
+    return [renomear_original(r) for r in amostra.drop(columns=['Obesity']).to_dict('records')]
+
+
+def cenarios_api(app_module, orcamento_linhas):
+    cliente = app_module.app.test_client()
+    resultados = []
+
+    registros = registros_originais(max(TAMANHOS_LOTE))
+    unico = registros[0]
+    resposta = cliente.post('/predict', json=unico)
+    assert resposta.status_code == 200, resposta.json
+
+    tempos = cronometrar(lambda: cliente.post('/predict', json=unico), repeticoes_para(1, orcamento_linhas))
+    resultados.append({"cenario": "api_predict", "lote": 1, **percentis(tempos)})
+
+    for tamanho in TAMANHOS_LOTE:
+        lote = registros[:tamanho]
+        tempos = cronometrar(lambda: cliente.post('/predict/batch', json=lote),
+                             repeticoes_para(tamanho, orcamento_linhas), aquecimento=1)
+        resultados.append({"cenario": "api_predict_batch", "lote": tamanho, **percentis(tempos, tamanho)})
+
+    # Lote grande com o cache esvaziado a cada chamada: mede a floresta (travessia em
+    # blocos) e não os acertos do cache que as repetições acima acumulam
+    tamanho = max(TAMANHOS_LOTE)
+    lote = registros[:tamanho]
+    cache = app_module.modelos.ativo.cache
+
+    def lote_sem_cache():
+        cache.limpar()
+        return cliente.post('/predict/batch?explicar=0', json=lote)
+
+    tempos = cronometrar(lote_sem_cache, repeticoes_para(tamanho, orcamento_linhas), aquecimento=1)
+    resultados.append({"cenario": "api_predict_batch_sem_cache", "lote": tamanho, **percentis(tempos, tamanho)})
+    return resultados
+
+
+def cenario_concorrente(app_module, clientes, requisicoes_por_cliente, url=None):
+    registros = registros_originais(clientes * requisicoes_por_cliente, semente=7)
+    tempos = [[] for _ in range(clientes)]
+
+    def trabalhador(k):
+        if url:
+            import requests
+            sessao = requests.Session()
+            enviar = lambda r: sessao.post(f"{url}/predict", json=r, timeout=10)
+        else:
+            cliente = app_module.app.test_client()
+            enviar = lambda r: cliente.post('/predict', json=r)
+        for r in registros[k::clientes]:
+            t0 = time.perf_counter()
+            enviar(r)
+            tempos[k].append(time.perf_counter() - t0)
+
+    inicio = time.perf_counter()
+    threads = [threading.Thread(target=trabalhador, args=(k,)) for k in range(clientes)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    duracao = time.perf_counter() - inicio
+
+    todos = [t for lista in tempos for t in lista]
+    resultado = {"cenario": "api_concorrente", "lote": 1, "clientes": clientes,
+                 "alvo": url or "test_client", **percentis(todos)}
+    resultado["vazao_linhas_s"] = len(todos) / duracao
+    return resultado
+
+
+def cenarios_streamlit(orcamento_linhas):
+    # Mesmo caminho de streamlit/main.py no modo local (streamlit/analise_local.py):
+    # cache de predições, explicação pela floresta compilada e simulação de hábitos.
+    # Sem cache (capacidade 0) cada análise chega ao modelo; com cache, o mesmo
+    # registro repetido só refaz a explicação e a simulação
+    import joblib
+    from codificador import COLUNAS_MODELO, CodificadorFeatures
+
+    sys.path.insert(0, PASTA_STREAMLIT)
+    from analise_local import AnaliseLocal
+
+    modelo = joblib.load(os.path.join(PASTA_API, 'modelo.pkl'))
+    scaler = joblib.load(os.path.join(PASTA_API, 'scaler.pkl'))
+    registro = registros_originais(1)[0]
+
+    resultados = []
+    for nome, capacidade in [("streamlit_local", 0), ("streamlit_local_cache", 10000)]:
+        analise = AnaliseLocal(modelo, scaler, CodificadorFeatures(), COLUNAS_MODELO, "local",
+                               capacidade_cache=capacidade)
+        tempos = cronometrar(lambda: analise.analisar(registro), repeticoes_para(1, orcamento_linhas // 20))
+        resultados.append({"cenario": nome, "lote": 1, **percentis(tempos)})
+    return resultados
+
+
+def cenarios_lote(orcamento_linhas):
+    # Pontuação em massa de dados_limpos.csv, com o sklearn e com a floresta compilada
+    import joblib
+    from codificador import COLUNAS_MODELO
+    from floresta import FlorestaCompilada
+
+    modelo = joblib.load(os.path.join(PASTA_API, 'modelo.pkl'))
+    scaler = joblib.load(os.path.join(PASTA_API, 'scaler.pkl'))
+    floresta = FlorestaCompilada.from_sklearn(modelo)
+    base = pd.read_csv(os.path.join(RAIZ, 'data', 'dados_limpos.csv'))[COLUNAS_MODELO].to_numpy(np.float64)
+
+    resultados = []
+    for tamanho in TAMANHOS_LOTE:
+        indices = np.resize(np.arange(len(base)), tamanho)
+        X = base[indices]
+        X_scaled = scaler.transform(pd.DataFrame(X, columns=COLUNAS_MODELO))
+        repeticoes = repeticoes_para(tamanho, orcamento_linhas)
+        for nome, funcao in [
+            ("lote_sklearn", lambda: modelo.predict_proba(X_scaled)),
+            ("lote_compilada", lambda: floresta.predict_proba(X_scaled)),
+            # Folhas pelo apply() do sklearn e probabilidades pela floresta: o caminho que a
+            # API usa acima de TRAVESSIA_SKLEARN_MIN_LINHAS
+            ("lote_compilada_apply", lambda: floresta.proba_folhas(
+                modelo.apply(X_scaled).T + floresta.raizes[:, np.newaxis])),
+        ]:
+            tempos = cronometrar(funcao, max(5, repeticoes // 4) if nome == "lote_sklearn" else repeticoes, 1)
+            resultados.append({"cenario": nome, "lote": tamanho, **percentis(tempos, tamanho)})
+    return resultados
+
+
+def comparar(atual, referencia, tolerancia):
+    # Regressão: p50 mais lento ou vazão menor que a referência além da tolerância
+    indice = {(r["cenario"], r["lote"]): r for r in referencia["cenarios"]}
+    regressoes = []
+    for r in atual["cenarios"]:
+        ref = indice.get((r["cenario"], r["lote"]))
+        if ref is None:
+            continue
+        if r["p50_ms"] > ref["p50_ms"] * (1 + tolerancia):
+            regressoes.append(f"{r['cenario']}[{r['lote']}]: p50 {ref['p50_ms']:.3f} -> {r['p50_ms']:.3f} ms")
+        if ref.get("vazao_linhas_s") and r["vazao_linhas_s"] < ref["vazao_linhas_s"] * (1 - tolerancia):
+            regressoes.append(f"{r['cenario']}[{r['lote']}]: vazão {ref['vazao_linhas_s']:.0f} -> "
+                              f"{r['vazao_linhas_s']:.0f} linhas/s")
+    return regressoes
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark de inferência do Preditor de Risco de Obesidade")
+    parser.add_argument('--saida', help="Arquivo JSON de saída (padrão: stdout)")
+    parser.add_argument('--orcamento-linhas', type=int, default=20000,
+                        help="Linhas aproximadas por cenário/tamanho de lote")
+    parser.add_argument('--clientes', type=int, default=8, help="Clientes simultâneos no cenário concorrente")
+    parser.add_argument('--requisicoes', type=int, default=100, help="Requisições por cliente no cenário concorrente")
+    parser.add_argument('--url', help="Mede o cenário concorrente contra um servidor já em execução")
+    parser.add_argument('--com-cache', action='store_true', help="Mantém o cache de predições da API ligado")
+    parser.add_argument('--comparar', help="JSON de referência para detectar regressões")
+    parser.add_argument('--tolerancia', type=float, default=0.25)
+    args = parser.parse_args()
+
+    # streamlit/main.py passa um array sem nomes de coluna ao scaler; o aviso do sklearn
+    # a cada chamada só poluiria a saída
+    warnings.filterwarnings('ignore', message='X does not have valid feature names')
+
+    if not args.com_cache:
+        os.environ['CACHE_CAPACIDADE'] = '0'
+
+    inicializacao = medir_inicializacao()
+
+    # app.py carrega os artefatos por caminho relativo
+    sys.path.insert(0, PASTA_API)
+    os.chdir(PASTA_API)
+    import sklearn
+    import app as app_module
+    from floresta import sha256_arquivo
+
+    cenarios = []
+    cenarios += cenarios_api(app_module, args.orcamento_linhas)
+    cenarios.append(cenario_concorrente(app_module, args.clientes, args.requisicoes, args.url))
+    cenarios += cenarios_streamlit(args.orcamento_linhas)
+    cenarios += cenarios_lote(args.orcamento_linhas)
+
+    relatorio = {
+        "ambiente": {
+            "python": platform.python_version(),
+            "numpy": np.__version__,
+            "pandas": pd.__version__,
+            "sklearn": sklearn.__version__,
+            "cpus": os.cpu_count(),
+            "maquina": platform.machine(),
+            "modelo_sha256": sha256_arquivo('modelo.pkl'),
+            "scaler_sha256": sha256_arquivo('scaler.pkl'),
+            "cache_api": args.com_cache,
+        },
+        "inicializacao": inicializacao,
+        "pico_rss_processo_mb": pico_rss_processo_mb(),
+        "cenarios": cenarios,
+    }
+
+    texto = json.dumps(relatorio, indent=2, ensure_ascii=False)
+    if args.saida:
+        with open(os.path.join(RAIZ, args.saida) if not os.path.isabs(args.saida) else args.saida, 'w') as f:
+            f.write(texto)
+    else:
+        print(texto)
+
+    if args.comparar:
+        with open(args.comparar if os.path.isabs(args.comparar) else os.path.join(RAIZ, args.comparar)) as f:
+            referencia = json.load(f)
+        regressoes = comparar(relatorio, referencia, args.tolerancia)
+        for r in regressoes:
+            print(f"🛑 Regressão: {r}", file=sys.stderr)
+        return 1 if regressoes else 0
+    return 0
+
+
+if __name__ == '__main__':
+    raise SystemExit(main())
@@ -0,0 +1,183 @@
+# streamlit/agregados.py
+# Agregados pré-calculados do Dashboard Analítico.
+#
+# Em vez de enviar a base linha a linha para o Plotly a cada sessão, o dashboard lê
+# um resumo compacto (KPIs, contagens por diagnóstico, quartis de idade, médias do
+# radar, percentuais por transporte e uma amostra por densidade do Peso x Altura).
+# O resumo é gravado em disco com o hash do CSV de origem no nome: só é recalculado
+# quando a base muda, e pode ser gerado de antemão junto com o ETL.
+#
+# Uso:
+#   python agregados.py data/Obesity.csv     (pré-calcula o resumo no cache)
+import os
+import sys
+import json
+import hashlib
+
+import numpy as np
+import pandas as pd
+
+VERSAO = 1
+PASTA_CACHE = os.environ.get('DASHBOARD_CACHE_DIR', os.path.join(os.path.dirname(os.path.abspath(__file__)), '.cache_dashboard'))
+LIMITE_PONTOS_DISPERSAO = 5000
+
+rename_map = {
+    'Age': 'Idade', 'Gender': 'Genero', 'Height': 'Altura', 'Weight': 'Peso',
+    'family_history_with_overweight': 'Hist_Familiar', 'NObeyesdad': 'Diagnostico',
+    'FAVC': 'Dieta_Hipercalorica', 'FCVC': 'Consumo_Vegetais', 'NCP': 'Refeicoes_Diarias',
+    'CAEC': 'Comer_Entre_Refeicoes', 'SMOKE': 'Fumante', 'CH2O': 'Ingestao_Agua',
+    'SCC': 'Monitoramento_Calorias', 'FAF': 'Atividade_Fisica', 'TUE': 'Tempo_Telas',
+    'CALC': 'Consumo_Alcool', 'MTRANS': 'Transporte',
+    'Obesidade': 'Diagnostico', 'Historico_Familiar_Excesso_De_Peso': 'Hist_Familiar',
+    'Num_refeicoes': 'Refeicoes_Diarias', 'Consumo_Agua': 'Ingestao_Agua',
+    'Freq_Atividade_Fisica': 'Atividade_Fisica', 'Tempo_uso_dispositivos_eletronicos': 'Tempo_Telas',
+    'Freq_Vegetais': 'Consumo_Vegetais', 'Consumo_Frequente_Alta_Caloria': 'Dieta_Hipercalorica'
+}
+
+val_map = {
+    "Insufficient_Weight": "Abaixo do Peso", "Normal_Weight": "Peso Normal",
+    "Overweight_Level_I": "Sobrepeso G. I", "Overweight_Level_II": "Sobrepeso G. II",
+    "Obesity_Type_I": "Obesidade G. I", "Obesity_Type_II": "Obesidade G. II",
+    "Obesity_Type_III": "Obesidade G. III", "yes": "Sim", "no": "Não",
+    "Public_Transportation": "Transp. Público", "Walking": "Caminhada",
+    "Automobile": "Automóvel", "Motorbike": "Moto", "Bike": "Bicicleta",
+    "Male": "Masculino", "Female": "Feminino"
+}
+
+ordem = ["Abaixo do Peso", "Peso Normal", "Sobrepeso G. I", "Sobrepeso G. II", "Obesidade G. I", "Obesidade G. II", "Obesidade G. III"]
+
+radar_map = {'Consumo_Vegetais': 'Vegetais', 'Refeicoes_Diarias': 'Refeições', 'Ingestao_Agua': 'Água', 'Atividade_Fisica': 'Exercício'}
+
+
+def preparar_dados(df):
+    # Mesmas renomeações e traduções do dashboard, com o mapeamento feito por coluna
+    # (categorias traduzidas uma única vez) em vez de um lambda por célula
+    df.columns = df.columns.str.strip()
+    df = df.rename(columns=rename_map)
+
+    if 'Diagnostico' not in df.columns:
+        df = df.rename(columns={df.columns[-1]: 'Diagnostico'})
+    if 'Hist_Familiar' not in df.columns:
+        for c in df.columns:
+            if 'historico' in c.lower() or 'family' in c.lower():
+                df = df.rename(columns={c: 'Hist_Familiar'})
+                break
+
+    for col in df.columns:
+        if pd.api.types.is_numeric_dtype(df[col]):
+            continue
+        # Categorical.map traduz cada categoria uma vez, não cada célula
+        df[col] = df[col].astype('category').map(lambda x: val_map.get(x, x))
+    return df
+
+
+def _quartis(valores):
+    # Estatísticas do box plot (quartis lineares e bigodes de Tukey, como o Plotly)
+    q1, mediana, q3 = np.percentile(valores, [25, 50, 75])
+    iqr = q3 - q1
+    dentro = valores[(valores >= q1 - 1.5 * iqr) & (valores <= q3 + 1.5 * iqr)]
+    return {
+        "q1": float(q1), "mediana": float(mediana), "q3": float(q3),
+        "bigode_inferior": float(dentro.min()), "bigode_superior": float(dentro.max()),
+        "media": float(valores.mean()),
+    }
+
+
+def amostrar_por_densidade(df, limite=LIMITE_PONTOS_DISPERSAO, grade=60, semente=42):
+    # Mantém até k pontos por célula de uma grade Peso x Altura, com k o maior valor
+    # que cabe no limite: regiões densas são afinadas, pontos isolados são preservados
+    if len(df) <= limite:
+        return df
+    peso, altura = df['Peso'].to_numpy(), df['Altura'].to_numpy()
+    celula_x = np.floor((peso - peso.min()) / (np.ptp(peso) or 1) * (grade - 1)).astype(np.int64)
+    celula_y = np.floor((altura - altura.min()) / (np.ptp(altura) or 1) * (grade - 1)).astype(np.int64)
+    celula = celula_x * grade + celula_y
+
+    embaralhado = np.random.default_rng(semente).permutation(len(df))
+    posicao = pd.Series(celula[embaralhado]).groupby(celula[embaralhado]).cumcount().to_numpy()
+
+    contagens = np.sort(np.bincount(celula))
+    contagens = contagens[contagens > 0]
+    k = 1
+    while k < contagens[-1] and np.minimum(contagens, k + 1).sum() <= limite:
+        k += 1
+    return df.iloc[np.sort(embaralhado[posicao < k])]
+
+
+def calcular_agregados(df):
+    df = df[df['Diagnostico'].notna()]
+    diagnostico = df['Diagnostico'].astype(str)
+    classes = [c for c in ordem if c in set(diagnostico)] + sorted(set(diagnostico) - set(ordem))
+
+    agregados = {
+        "versao": VERSAO,
+        "classes": classes,
+        "kpis": {
+            "vidas": int(len(df)),
+            "idade_media": float(df['Idade'].mean()),
+            "imc_medio": float((df['Peso'] / (df['Altura'] ** 2)).mean()),
+            "taxa_obesidade": float(diagnostico.str.contains('Obesidade').mean() * 100),
+        },
+        "contagem_classes": diagnostico.value_counts().reindex(classes, fill_value=0).astype(int).tolist(),
+        "idade_por_classe": {c: _quartis(df.loc[diagnostico == c, 'Idade'].to_numpy(np.float64)) for c in classes},
+    }
+
+    if 'Hist_Familiar' in df.columns:
+        contagem = pd.crosstab(diagnostico, df['Hist_Familiar'].astype(str)).reindex(classes, fill_value=0)
+        agregados["hist_familiar"] = {h: contagem[h].astype(int).tolist() for h in contagem.columns}
+
+    cols_radar = [c for c in radar_map if c in df.columns]
+    medias = df.groupby(diagnostico, observed=True)[cols_radar].mean()
+    agregados["radar"] = {
+        "colunas": cols_radar,
+        "medias": {c: medias.loc[c].astype(float).tolist() for c in medias.index},
+    }
+
+    if 'Transporte' in df.columns:
+        contagem = pd.crosstab(df['Transporte'].astype(str), diagnostico)
+        percentual = contagem.div(contagem.sum(axis=1), axis=0) * 100
+        agregados["transporte"] = {
+            "tipos": percentual.index.tolist(),
+            "percentual": {c: percentual[c].astype(float).tolist() for c in classes if c in percentual.columns},
+        }
+
+    amostra = amostrar_por_densidade(df)
+    agregados["dispersao"] = {
+        "total": int(len(df)),
+        "peso": amostra['Peso'].round(2).tolist(),
+        "altura": amostra['Altura'].round(3).tolist(),
+        "diagnostico": amostra['Diagnostico'].astype(str).tolist(),
+    }
+    return agregados
+
+
+def carregar_agregados(caminho, pasta_cache=PASTA_CACHE):
+    # Lê o resumo do cache em disco (chave = hash do CSV) ou o calcula e grava. O hash
+    # vem direto do hashlib: a réplica do Streamlit não importa os módulos de api/
+    with open(caminho, 'rb') as f:
+        sha = hashlib.file_digest(f, 'sha256').hexdigest()
+    destino = os.path.join(pasta_cache, f"agregados_v{VERSAO}_{sha[:16]}.json")
+    try:
+        with open(destino) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        pass
+
+    agregados = calcular_agregados(preparar_dados(pd.read_csv(caminho)))
+    agregados["origem_sha256"] = sha
+    try:
+        os.makedirs(pasta_cache, exist_ok=True)
+        temporario = f"{destino}.{os.getpid()}.tmp"
+        with open(temporario, 'w') as f:
+            json.dump(agregados, f, ensure_ascii=False)
+        os.replace(temporario, destino)
+    except OSError:
+        # Sistema de arquivos somente leitura: segue com o resumo em memória
+        pass
+    return agregados
+
+
+if __name__ == '__main__':
+    for caminho in sys.argv[1:] or ['data/Obesity.csv']:
+        resumo = carregar_agregados(caminho)
+        print(f"✅ {caminho}: {resumo['kpis']['vidas']} vidas, {len(resumo['dispersao']['peso'])} pontos na dispersão")
@@ -0,0 +1,73 @@
+# streamlit/analise_local.py
+# Inferência local do Streamlit (sem API_URL ou com FALLBACK_LOCAL=1), no mesmo
+# formato da API (/predict + /predict/simulacao).
+#
+# Um AnaliseLocal por versão do modelo, compartilhado pelas sessões: cache de
+# probabilidades por vetor de features, explicação da predição pela floresta compilada
+# (contribuição de cada feature no risco total) e simulação de hábitos com o próprio
+# modelo. Usa os módulos de api/ (cache, floresta, simulação), então só é importado
+# no modo local, com api/ no sys.path. O benchmark (benchmarks/benchmark_inferencia.py)
+# mede exatamente este caminho.
+import numpy as np
+
+from cache_predicoes import CachePredicoes
+from floresta import FlorestaCompilada
+from simulacao import SimuladorHabitos
+from agregados import ordem
+
+# Nomes das classes 0..6, na mesma ordem de diagnóstico do dashboard (agregados.py)
+TARGET_NAMES = ordem
+
+
+class AnaliseLocal:
+
+    def __init__(self, model, scaler, codificador, colunas, versao, floresta=None, explicar=True,
+                 capacidade_cache=10000):
+        self.model = model
+        self.scaler = scaler
+        self.codificador = codificador
+        self.colunas = list(colunas)
+        self.versao = versao
+        self.cache = CachePredicoes(capacidade=capacidade_cache)
+
+        # Floresta do pacote (tabela já mapeada) ou compilada do modelo, com a tabela de
+        # contribuições das folhas montada uma vez
+        self.explainer = None
+        if explicar:
+            self.explainer = floresta if floresta is not None else FlorestaCompilada.from_sklearn(model)
+            self.explainer.preparar_explicacao()
+
+        # Todas as combinações de hábitos modificáveis avaliadas de uma vez
+        self.simulador = SimuladorHabitos(
+            codificador,
+            lambda X: model.predict_proba(scaler.transform(X)),
+            self.resumir,
+        )
+
+    def resumir(self, probabilities):
+        return {
+            "diagnostico": TARGET_NAMES[int(self.model.classes_[np.argmax(probabilities)])],
+            # Risco Acumulado (soma das probabilidades de sobrepeso e obesidade)
+            "risco_total": float(np.sum(probabilities[2:])),
+        }
+
+    def analisar(self, registro, top=3):
+        input_data = self.codificador.codificar(registro)[np.newaxis, :]
+        probabilities = self.cache.obter(input_data[0])
+        if probabilities is None:
+            probabilities = self.model.predict_proba(self.scaler.transform(input_data))[0]
+            self.cache.guardar(input_data[0], probabilities)
+        analise = {**self.resumir(probabilities), "versao_modelo": self.versao}
+
+        if self.explainer is not None:
+            # Quanto cada resposta somou ou tirou do risco total nesta predição
+            _, base, contribuicoes = self.explainer.explicar(self.scaler.transform(input_data))
+            efeito = contribuicoes[0][:, 2:].sum(axis=1)
+            analise["explicacao"] = {
+                "base_risco": float(base[2:].sum()),
+                "contribuicoes": [{"feature": self.colunas[j], "risco_total": float(efeito[j])}
+                                  for j in np.argsort(-np.abs(efeito), kind='stable')],
+            }
+
+        analise["simulacao"] = self.simulador.simular(registro, top=top)
+        return analise
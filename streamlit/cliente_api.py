@@ -0,0 +1,167 @@
+# streamlit/cliente_api.py
+# Cliente da API de predição para o modo de inferência remota do Streamlit.
+#
+# Uma única requests.Session por processo, compartilhada por todas as sessões do
+# Streamlit, mantém um pool de conexões keep-alive com a API (API_URL). Cada chamada
+# tem timeout de conexão e de leitura; falhas de conexão e respostas 502/503/504 são
+# repetidas poucas vezes, com backoff limitado (ver MAX_TENTATIVAS). Um disjuntor
+# (circuit breaker) abre após falhas seguidas e passa a recusar as chamadas na hora,
+# sem esperar timeouts, até o intervalo de espera terminar; então uma chamada de teste
+# decide se ele fecha de novo.
+#
+# analisar() dispara /predict e /predict/simulacao em paralelo e devolve o resultado
+# completo da página de diagnóstico.
+#
+# Uso:
+#   python cliente_api.py http://localhost:5000      (verifica /ready e uma predição)
+import sys
+import time
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+
+# Repetições por chamada. POST é repetido de propósito: /predict, /predict/batch e
+# /predict/simulacao são idempotentes (a resposta depende só do corpo e não há efeito
+# colateral além de cache e métricas). Para que uma ação na página não empilhe
+# tentativas contra uma API com problema, o número de repetições é limitado, a espera
+# entre elas também (o Retry-After do servidor é ignorado) e timeouts de leitura não
+# são repetidos: a API recebeu o pedido e está lenta, repetir só somaria carga.
+MAX_TENTATIVAS = 2
+BACKOFF_MAX_S = 1.0
+
+
+class ErroAPI(Exception):
+
+    def __init__(self, mensagem, status=None):
+        super().__init__(mensagem)
+        self.status = status
+
+
+class CircuitoAberto(ErroAPI):
+    pass
+
+
+class Disjuntor:
+
+    def __init__(self, limite_falhas=5, espera_s=30.0):
+        self.limite_falhas = limite_falhas
+        self.espera_s = espera_s
+        self._falhas = 0
+        self._aberto_ate = None
+        self._testando = False
+        self._trava = threading.Lock()
+        self.aberturas = 0
+
+    @property
+    def estado(self):
+        if self._aberto_ate is None:
+            return "fechado"
+        return "meio-aberto" if time.monotonic() >= self._aberto_ate else "aberto"
+
+    def permitir(self):
+        # Fechado: tudo passa. Aberto: nada passa. Após a espera: só uma chamada de teste
+        with self._trava:
+            if self._aberto_ate is None:
+                return True
+            if time.monotonic() < self._aberto_ate or self._testando:
+                return False
+            self._testando = True
+            return True
+
+    def sucesso(self):
+        with self._trava:
+            self._falhas = 0
+            self._aberto_ate = None
+            self._testando = False
+
+    def falha(self):
+        with self._trava:
+            self._falhas += 1
+            if self._testando or self._falhas >= self.limite_falhas:
+                self._aberto_ate = time.monotonic() + self.espera_s
+                self.aberturas += 1
+            self._testando = False
+
+
+def _parametros_explicacao(explicar):
+    return {} if explicar is None else {"explicar": int(explicar)}
+
+
+class ClienteAPI:
+
+    def __init__(self, url, timeout_conexao=1.0, timeout_leitura=5.0, tentativas=2, backoff=0.2,
+                 tamanho_pool=16, limite_falhas=5, espera_disjuntor_s=30.0):
+        self.url = url.rstrip('/')
+        self.timeout = (timeout_conexao, timeout_leitura)
+        self.disjuntor = Disjuntor(limite_falhas, espera_disjuntor_s)
+
+        tentativas = max(0, min(int(tentativas), MAX_TENTATIVAS))
+        repeticao = Retry(
+            total=tentativas, connect=tentativas, read=0, status=tentativas, other=0,
+            backoff_factor=backoff, backoff_max=BACKOFF_MAX_S, respect_retry_after_header=False,
+            status_forcelist=(502, 503, 504), allowed_methods=frozenset({'GET', 'POST'}),
+            raise_on_status=False,
+        )
+        adaptador = HTTPAdapter(pool_connections=1, pool_maxsize=tamanho_pool, max_retries=repeticao)
+        self.sessao = requests.Session()
+        self.sessao.mount('http://', adaptador)
+        self.sessao.mount('https://', adaptador)
+
+        # Chamadas simultâneas de uma mesma página (predição + simulação)
+        self._executor = ThreadPoolExecutor(max_workers=tamanho_pool, thread_name_prefix="cliente-api")
+
+    def _chamar(self, metodo, rota, **kwargs):
+        if not self.disjuntor.permitir():
+            raise CircuitoAberto(f"API indisponível ({self.url}): disjuntor aberto")
+        try:
+            resposta = self.sessao.request(metodo, self.url + rota, timeout=self.timeout, **kwargs)
+        except requests.RequestException as e:
+            self.disjuntor.falha()
+            raise ErroAPI(f"Falha ao chamar {rota}: {e}")
+
+        if resposta.status_code >= 500:
+            self.disjuntor.falha()
+            raise ErroAPI(f"{rota} respondeu {resposta.status_code}", resposta.status_code)
+        # A API respondeu: erros 4xx são do registro enviado, não da disponibilidade
+        self.disjuntor.sucesso()
+        try:
+            corpo = resposta.json()
+        except ValueError:
+            raise ErroAPI(f"{rota} devolveu um corpo que não é JSON", resposta.status_code)
+        if resposta.status_code >= 400:
+            raise ErroAPI(corpo.get("erro", f"{rota} respondeu {resposta.status_code}"), resposta.status_code)
+        return corpo
+
+    # explicar=None deixa a API decidir (EXPLICACAO_PADRAO do servidor)
+    def prever(self, registro, explicar=None):
+        return self._chamar('POST', '/predict', json=registro, params=_parametros_explicacao(explicar))
+
+    def prever_lote(self, registros, explicar=None):
+        return self._chamar('POST', '/predict/batch', json=registros, params=_parametros_explicacao(explicar))
+
+    def simular(self, paciente, habitos=None, top=5):
+        return self._chamar('POST', '/predict/simulacao', json={"paciente": paciente, "habitos": habitos, "top": top})
+
+    def pronto(self):
+        return self._chamar('GET', '/ready')
+
+    def analisar(self, registro, top=3, explicar=None):
+        # Predição (com explicação) e simulação de hábitos em paralelo
+        predicao = self._executor.submit(self.prever, registro, explicar)
+        simulacao = self._executor.submit(self.simular, registro, None, top)
+        return {**predicao.result(), "simulacao": simulacao.result()}
+
+    def estatisticas(self):
+        return {"url": self.url, "disjuntor": self.disjuntor.estado, "aberturas": self.disjuntor.aberturas}
+
+
+if __name__ == '__main__':
+    cliente = ClienteAPI(sys.argv[1] if len(sys.argv) > 1 else 'http://localhost:5000')
+    print(f"✅ {cliente.url}: {cliente.pronto()}")
+    analise = cliente.analisar({"Genero": "Feminino", "Idade": 25, "Transporte": "Caminhada"})
+    print(f"✅ {analise['diagnostico']} | Risco Total: {analise['risco_total']*100:.1f}% | "
+          f"{analise['simulacao']['combinacoes']} combinações simuladas | modelo {analise.get('versao_modelo')}")
@@ -3,8 +3,11 @@ import pandas as pd
 import plotly.express as px
 import plotly.graph_objects as go
 import os
+import sys
 import joblib  # Adicionado para carregar o modelo direto
-import numpy as np # Adicionado para processar os dados da IA
+
+from agregados import carregar_agregados, radar_map
+from cliente_api import ClienteAPI, ErroAPI
 
 # CONFIGURAÇÃO DA PÁGINA 
 st.set_page_config(
@@ -15,24 +18,118 @@ st.set_page_config(
 )
 
 # --- 1. CARREGAMENTO DOS MODELOS DE IA (INTEGRADO) ---
+# Com API_URL (definida no docker-compose) a inferência é feita pela API, através de um
+# pool de conexões compartilhado por todas as sessões (cliente_api.py), e esta réplica
+# não carrega o modelo. O modelo local só é carregado sem API_URL ou, como alternativa
+# para quando a API estiver fora, com FALLBACK_LOCAL=1.
+API_URL = os.environ.get('API_URL')
+USAR_MODELO_LOCAL = not API_URL or os.environ.get('FALLBACK_LOCAL', '0') == '1'
+# Explicação da predição no modelo local, com o mesmo padrão da API (ligada). No modo
+# remoto a página não escolhe: vale o EXPLICACAO_PADRAO configurado na própria API
+EXPLICAR = os.environ.get('EXPLICACAO_PADRAO', '1') == '1'
+
 @st.cache_resource
-def load_ml_models():
-    model, scaler = None, None
-    # Procura na pasta api (padrão do seu projeto) ou na raiz
-    paths_model = ['api/modelo.pkl', 'modelo.pkl']
-    paths_scaler = ['api/scaler.pkl', 'scaler.pkl']
-    
-    for p in paths_model:
-        if os.path.exists(p):
-            model = joblib.load(p)
-            break
-    for p in paths_scaler:
-        if os.path.exists(p):
-            scaler = joblib.load(p)
+def load_api_client(url):
+    return ClienteAPI(
+        url,
+        timeout_conexao=float(os.environ.get('API_TIMEOUT_CONEXAO_S', 1.0)),
+        timeout_leitura=float(os.environ.get('API_TIMEOUT_LEITURA_S', 5.0)),
+        tentativas=int(os.environ.get('API_TENTATIVAS', 2)),
+        tamanho_pool=int(os.environ.get('API_POOL_TAMANHO', 16)),
+        limite_falhas=int(os.environ.get('API_LIMITE_FALHAS', 5)),
+        espera_disjuntor_s=float(os.environ.get('API_ESPERA_DISJUNTOR_S', 30)),
+    )
+
+api_client = load_api_client(API_URL) if API_URL else None
+
+# Só o modelo local usa os módulos da API (codificador, floresta, pacotes, cache e
+# simulação), lidos de api/. No modo remoto nada disso é importado e a réplica não
+# precisa da pasta da API: fala com ela só por HTTP.
+if USAR_MODELO_LOCAL:
+    for _pasta_api in ['api', os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'api')]:
+        if os.path.isdir(_pasta_api) and _pasta_api not in sys.path:
+            sys.path.append(_pasta_api)
+    from codificador import COLUNAS_MODELO, CodificadorFeatures
+    from pacote_modelo import PacoteModelo, versao_ativa
+    from analise_local import AnaliseLocal
+
+# Preferência pelo pacote versionado ativo (api/pacote_modelo.py), o mesmo servido pela
+# API: o ponteiro ATUAL é lido a cada execução do script, então uma nova versão é
+# adotada na interação seguinte, sem reiniciar. Sem pacotes, os .pkl soltos.
+PASTAS_MODELOS = [os.environ.get('MODELOS_DIR'), 'api/modelos', 'modelos']
+
+def active_bundle():
+    for pasta in PASTAS_MODELOS:
+        versao = versao_ativa(pasta) if pasta else None
+        if versao:
+            return pasta, versao
+    return None, None
+
+@st.cache_resource(max_entries=2)
+def load_bundle(pasta, versao):
+    pacote = PacoteModelo.carregar(os.path.join(pasta, versao))
+    pacote.aquecer()
+    return pacote
+
+# Sem pacotes: o primeiro modelo.pkl/scaler.pkl encontrado na pasta api (padrão do
+# projeto) ou na raiz. A assinatura (caminho, mtime, tamanho) é lida a cada execução do
+# script e é a chave dos recursos abaixo: trocar um .pkl em disco recarrega o modelo
+# e começa um cache de predições novo, sem reiniciar a réplica.
+ML_FILES = {'modelo': ['api/modelo.pkl', 'modelo.pkl'], 'scaler': ['api/scaler.pkl', 'scaler.pkl']}
+
+def ml_files_signature():
+    assinatura = []
+    for nome, caminhos in ML_FILES.items():
+        for p in caminhos:
+            try:
+                st_arquivo = os.stat(p)
+            except OSError:
+                continue
+            assinatura.append((nome, p, st_arquivo.st_mtime_ns, st_arquivo.st_size))
             break
-    return model, scaler
+    return tuple(assinatura)
+
+@st.cache_resource(max_entries=2)
+def load_ml_models(assinatura):
+    carregados = {nome: joblib.load(p) for nome, p, _, _ in assinatura}
+    return carregados.get('modelo'), carregados.get('scaler')
+
+# Análise local (streamlit/analise_local.py): cache de predições, explicação e simulação
+# de hábitos, uma por versão do modelo, compartilhada entre as sessões deste processo.
+# Os argumentos com "_" não entram na chave do st.cache_resource: a chave é a versão do
+# pacote ou a assinatura dos .pkl soltos, que identificam o modelo recebido
+@st.cache_resource(max_entries=2)
+def load_local_analysis(_model, _scaler, _codificador, _colunas, _pacote, versao, assinatura):
+    return AnaliseLocal(
+        _model, _scaler, _codificador, _colunas, versao,
+        floresta=_pacote.floresta if _pacote is not None else None,
+        explicar=EXPLICAR,
+        capacidade_cache=int(os.environ.get('CACHE_CAPACIDADE', 10000)),
+    )
+
+pacote, model, scaler, assinatura_ml = None, None, None, ()
+analise_local = None
+versao_modelo = "local"
+if USAR_MODELO_LOCAL:
+    # Mesmo codificador de features da API (ordem das colunas, mapas e one-hot)
+    codificador, colunas_modelo = CodificadorFeatures(), COLUNAS_MODELO
+    pasta_modelos, versao_pacote = active_bundle()
+    if versao_pacote:
+        pacote = load_bundle(pasta_modelos, versao_pacote)
+        model, scaler, versao_modelo = pacote.modelo, pacote.scaler, versao_pacote
+        # Mesmo esquema de features do pacote
+        codificador, colunas_modelo = pacote.codificador, pacote.colunas
+    else:
+        assinatura_ml = ml_files_signature()
+        model, scaler = load_ml_models(assinatura_ml)
+    if model is not None and scaler is not None:
+        analise_local = load_local_analysis(model, scaler, codificador, colunas_modelo, pacote,
+                                            versao_modelo, assinatura_ml)
 
-model, scaler = load_ml_models()
+
+def analisar_local(registro, top=3):
+    # Inferência nesta réplica, no mesmo formato da API (/predict + /predict/simulacao)
+    return analise_local.analisar(registro, top=top)
 
 # --- 2. CSS PROFISSIONAL (MANTIDO INTEGRALMENTE) ---
 st.markdown("""
@@ -75,58 +172,20 @@ COLOR_MAP = {
     "Não": "#1ABC9C"
 }
 
-# --- 3. CARREGAMENTO DE DADOS (MANTIDO INTEGRALMENTE) ---
+# --- 3. CARREGAMENTO DE DADOS (AGREGADOS PRÉ-CALCULADOS) ---
+# O dashboard usa apenas o resumo da base (ver agregados.py), guardado em disco pelo
+# hash do CSV; o tamanho e o mtime na chave fazem o Streamlit notar a troca do arquivo
 @st.cache_data
+def load_aggregates(caminho, tamanho, modificado):
+    return carregar_agregados(caminho)
+
 def load_data():
     caminhos = ['data/Obesity.csv', 'Obesity.csv', 'streamlit/data/Obesity.csv', '/mount/src/preditor-de-risco-de-obesidade/data/Obesity.csv']
-    df = None
     for p in caminhos:
         if os.path.exists(p):
-            df = pd.read_csv(p)
-            break
-            
-    if df is not None:
-        df.columns = df.columns.str.strip()
-        
-        rename_map = {
-            'Age': 'Idade', 'Gender': 'Genero', 'Height': 'Altura', 'Weight': 'Peso',
-            'family_history_with_overweight': 'Hist_Familiar', 'NObeyesdad': 'Diagnostico',
-            'FAVC': 'Dieta_Hipercalorica', 'FCVC': 'Consumo_Vegetais', 'NCP': 'Refeicoes_Diarias',
-            'CAEC': 'Comer_Entre_Refeicoes', 'SMOKE': 'Fumante', 'CH2O': 'Ingestao_Agua',
-            'SCC': 'Monitoramento_Calorias', 'FAF': 'Atividade_Fisica', 'TUE': 'Tempo_Telas',
-            'CALC': 'Consumo_Alcool', 'MTRANS': 'Transporte',
-            'Obesidade': 'Diagnostico', 'Historico_Familiar_Excesso_De_Peso': 'Hist_Familiar',
-            'Num_refeicoes': 'Refeicoes_Diarias', 'Consumo_Agua': 'Ingestao_Agua',
-            'Freq_Atividade_Fisica': 'Atividade_Fisica', 'Tempo_uso_dispositivos_eletronicos': 'Tempo_Telas',
-            'Freq_Vegetais': 'Consumo_Vegetais', 'Consumo_Frequente_Alta_Caloria': 'Dieta_Hipercalorica'
-        }
-        df = df.rename(columns=rename_map)
-        
-        if 'Diagnostico' not in df.columns:
-            df = df.rename(columns={df.columns[-1]: 'Diagnostico'})
-        if 'Hist_Familiar' not in df.columns:
-            for c in df.columns:
-                if 'historico' in c.lower() or 'family' in c.lower():
-                    df = df.rename(columns={c: 'Hist_Familiar'})
-                    break
-
-        val_map = {
-            "Insufficient_Weight":"Abaixo do Peso", "Normal_Weight":"Peso Normal",
-            "Overweight_Level_I":"Sobrepeso G. I", "Overweight_Level_II":"Sobrepeso G. II",
-            "Obesity_Type_I":"Obesidade G. I", "Obesity_Type_II":"Obesidade G. II",
-            "Obesity_Type_III":"Obesidade G. III", "yes":"Sim", "no":"Não",
-            "Public_Transportation": "Transp. Público", "Walking": "Caminhada",
-            "Automobile": "Automóvel", "Motorbike": "Moto", "Bike": "Bicicleta",
-            "Male": "Masculino", "Female": "Feminino"
-        }
-        for col in df.select_dtypes(include=['object']).columns:
-            df[col] = df[col].map(lambda x: val_map.get(x, x))
-        
-        ordem = ["Abaixo do Peso", "Peso Normal", "Sobrepeso G. I", "Sobrepeso G. II", "Obesidade G. I", "Obesidade G. II", "Obesidade G. III"]
-        df['Ordem'] = pd.Categorical(df['Diagnostico'], categories=ordem, ordered=True)
-        return df.sort_values('Ordem')
-            
-    return df
+            info = os.stat(p)
+            return load_aggregates(p, info.st_size, info.st_mtime_ns)
+    return None
 
 with st.sidebar:
     col_logo1, col_logo2, col_logo3 = st.columns([1, 2, 1])
@@ -141,26 +200,33 @@ if pagina == "📈 Dashboard Analítico":
     st.title("Visão Populacional")
     st.markdown("**Análise estratégica baseada em evidências científicas e cruzamento de dados biométricos.**")
     
-    df = load_data()
-    if df is not None:
+    resumo = load_data()
+    if resumo is not None:
+        classes = resumo['classes']
+        kpis = resumo['kpis']
         k1, k2, k3, k4 = st.columns(4)
-        k1.metric("Vidas Monitoradas", len(df))
-        k2.metric("Idade Média", f"{df['Idade'].mean():.0f} anos")
-        k3.metric("IMC Médio Global", f"{(df['Peso']/(df['Altura']**2)).mean():.1f}")
-        
-        taxa = (len(df[df['Diagnostico'].astype(str).str.contains('Obesidade')]) / len(df)) * 100
-        k4.metric("Taxa de Obesidade", f"{taxa:.1f}%")
+        k1.metric("Vidas Monitoradas", kpis['vidas'])
+        k2.metric("Idade Média", f"{kpis['idade_media']:.0f} anos")
+        k3.metric("IMC Médio Global", f"{kpis['imc_medio']:.1f}")
+        k4.metric("Taxa de Obesidade", f"{kpis['taxa_obesidade']:.1f}%")
 
         st.markdown("---")
         c1, c2 = st.columns(2)
         with c1:
             st.subheader("📊 Distribuição de Risco")
-            fig = px.pie(df, names='Diagnostico', color='Diagnostico', hole=0.5, color_discrete_map=COLOR_MAP)
+            df_classes = pd.DataFrame({'Diagnostico': classes, 'Pacientes': resumo['contagem_classes']})
+            fig = px.pie(df_classes, names='Diagnostico', values='Pacientes', color='Diagnostico', hole=0.5, color_discrete_map=COLOR_MAP)
             st.plotly_chart(fig, use_container_width=True)
         with c2:
             st.subheader("🔍 Clusters: Peso x Altura")
-            fig = px.scatter(df, x='Peso', y='Altura', color='Diagnostico', color_discrete_map=COLOR_MAP)
+            # WebGL e amostra por densidade: o navegador recebe no máximo alguns milhares de pontos
+            dispersao = resumo['dispersao']
+            df_dispersao = pd.DataFrame({'Peso': dispersao['peso'], 'Altura': dispersao['altura'], 'Diagnostico': dispersao['diagnostico']})
+            fig = px.scatter(df_dispersao, x='Peso', y='Altura', color='Diagnostico', color_discrete_map=COLOR_MAP,
+                             category_orders={'Diagnostico': classes}, render_mode='webgl')
             st.plotly_chart(fig, use_container_width=True)
+            if len(df_dispersao) < dispersao['total']:
+                st.caption(f"Amostra de {len(df_dispersao)} de {dispersao['total']} pacientes, preservando as regiões menos densas.")
 
         st.markdown(f"""
             <div class="insight-box">
@@ -173,14 +239,26 @@ if pagina == "📈 Dashboard Analítico":
         c3, c4 = st.columns(2)
         with c3:
             st.subheader("🧬 Fator Hereditário")
-            fig = px.histogram(df, x='Diagnostico', color='Hist_Familiar', barmode='group', 
-                               color_discrete_map=COLOR_MAP,
-                               labels={'Hist_Familiar': 'Histórico Familiar'})
-            fig.update_layout(yaxis_title="Pacientes", xaxis_title="Diagnóstico")
-            st.plotly_chart(fig, use_container_width=True)
+            if 'hist_familiar' in resumo:
+                df_hist = pd.DataFrame([
+                    {'Diagnostico': c, 'Hist_Familiar': h, 'Pacientes': n}
+                    for h, contagens in resumo['hist_familiar'].items() for c, n in zip(classes, contagens)
+                ])
+                fig = px.bar(df_hist, x='Diagnostico', y='Pacientes', color='Hist_Familiar', barmode='group',
+                             color_discrete_map=COLOR_MAP,
+                             labels={'Hist_Familiar': 'Histórico Familiar'})
+                fig.update_layout(yaxis_title="Pacientes", xaxis_title="Diagnóstico")
+                st.plotly_chart(fig, use_container_width=True)
         with c4:
             st.subheader("📅 Idade vs Diagnóstico")
-            fig = px.box(df, x='Diagnostico', y='Idade', color='Diagnostico', color_discrete_map=COLOR_MAP)
+            # Box plot a partir dos quartis já calculados
+            fig = go.Figure()
+            for c in classes:
+                q = resumo['idade_por_classe'][c]
+                fig.add_trace(go.Box(x=[c], q1=[q['q1']], median=[q['mediana']], q3=[q['q3']],
+                                     lowerfence=[q['bigode_inferior']], upperfence=[q['bigode_superior']],
+                                     name=c, marker_color=COLOR_MAP.get(c)))
+            fig.update_layout(xaxis_title="Diagnostico", yaxis_title="Idade", legend_title_text="Diagnostico")
             st.plotly_chart(fig, use_container_width=True)
 
         st.markdown(f"""
@@ -194,21 +272,27 @@ if pagina == "📈 Dashboard Analítico":
         c5, c6 = st.columns(2)
         with c5:
             st.subheader("🕸️ Radar de Hábitos Saudáveis")
-            radar_map = {'Consumo_Vegetais': 'Vegetais', 'Refeicoes_Diarias': 'Refeições', 'Ingestao_Agua': 'Água', 'Atividade_Fisica': 'Exercício'}
-            cols_radar = [c for c in radar_map.keys() if c in df.columns]
+            cols_radar = resumo['radar']['colunas']
             if cols_radar:
-                df_radar = df.groupby('Diagnostico')[cols_radar].mean().reset_index()
-                df_radar = df_radar[df_radar['Diagnostico'].isin(['Peso Normal', 'Obesidade G. III'])]
                 fig_radar = go.Figure()
-                for i, row in df_radar.iterrows():
-                    fig_radar.add_trace(go.Scatterpolar(r=row[cols_radar], theta=[radar_map[c] for c in cols_radar], fill='toself', name=row['Diagnostico'], line_color=COLOR_MAP.get(row['Diagnostico'])))
+                for diagnostico in ['Peso Normal', 'Obesidade G. III']:
+                    medias = resumo['radar']['medias'].get(diagnostico)
+                    if medias is None:
+                        continue
+                    fig_radar.add_trace(go.Scatterpolar(r=medias, theta=[radar_map[c] for c in cols_radar], fill='toself', name=diagnostico, line_color=COLOR_MAP.get(diagnostico)))
                 fig_radar.update_layout(polar=dict(radialaxis=dict(visible=True, range=[0, 4])), paper_bgcolor='rgba(0,0,0,0)')
                 st.plotly_chart(fig_radar, use_container_width=True)
         with c6:
             st.subheader("🚌 Impacto do Transporte no Risco")
-            fig = px.histogram(df, y="Transporte", color="Diagnostico", orientation='h', barnorm='percent', color_discrete_map=COLOR_MAP)
-            fig.update_layout(xaxis_title="Proporção Populacional (%)", yaxis_title="Tipo de Transporte")
-            st.plotly_chart(fig, use_container_width=True)
+            if 'transporte' in resumo:
+                transporte = resumo['transporte']
+                df_transp = pd.DataFrame([
+                    {'Transporte': t, 'Diagnostico': c, 'Percentual': p}
+                    for c, percentuais in transporte['percentual'].items() for t, p in zip(transporte['tipos'], percentuais)
+                ])
+                fig = px.bar(df_transp, y="Transporte", x="Percentual", color="Diagnostico", orientation='h', color_discrete_map=COLOR_MAP)
+                fig.update_layout(xaxis_title="Proporção Populacional (%)", yaxis_title="Tipo de Transporte")
+                st.plotly_chart(fig, use_container_width=True)
 
         st.markdown(f"""
             <div class="insight-box">
@@ -252,44 +336,44 @@ elif pagina == "🩺 Diagnóstico Individual":
         submit = st.form_submit_button("PROCESSAR ANÁLISE CLÍNICA")
 
     if submit:
-        if model is not None and scaler is not None:
-            map_freq = {"Não":0, "Não bebo":0, "Às vezes":1, "Freq.":2, "Sempre":3}
+        if api_client is not None or (model is not None and scaler is not None):
             imc_calc = peso / (altura ** 2)
             
-            # Montagem do array de entrada exatamente como o seu modelo espera
-            # Ordem: Genero, Idade, Hist_Familiar, Dieta_Hiper, Vegetais, Refeicoes, Comer_Entre, 
-            # Fumante, Agua, Monitora, Exercicio, Telas, Alcool, Bike, Motorbike, Public, Walking, Score, Atleta
-            input_data = np.array([[
-                1 if genero == "Masculino" else 0,
-                idade,
-                1 if historico == "Sim" else 0,
-                1 if favc == "Sim" else 0,
-                fcvc, ncp, map_freq.get(caec, 1),
-                1 if smoke == "Sim" else 0,
-                ch2o,
-                1 if scc == "Sim" else 0,
-                faf, tue, map_freq.get(calc, 0),
-                1 if transporte=="Bicicleta" else 0,
-                1 if transporte=="Moto" else 0,
-                1 if transporte=="Transp. Público" else 0,
-                1 if transporte=="Caminhada" else 0,
-                faf * 1.5,
-                1 if (faf >= 2 and imc_calc >= 25) else 0
-            ]])
+            # Registro do formulário; o codificador (da API ou do modelo local) monta o
+            # vetor na ordem que o modelo espera. Score_Atletico e Possivel_Atleta vão
+            # calculados no registro, como no formulário original, para a API (que
+            # preenche ausentes com 0) e o modelo local coincidirem
+            registro = {
+                "Genero": genero, "Idade": idade,
+                "Historico_Familiar_Excesso_De_Peso": historico,
+                "Consumo_Frequente_Alta_Caloria": favc,
+                "Freq_Vegetais": fcvc, "Num_refeicoes": ncp,
+                "Comes_Entre_Refeicoes": caec, "Fumante": smoke,
+                "Consumo_Agua": ch2o, "Monitora_Calorias": scc,
+                "Freq_Atividade_Fisica": faf,
+                "Tempo_uso_dispositivos_eletronicos": tue,
+                "Consumo_Alcool": calc, "Transporte": transporte,
+                "Peso": peso, "Altura": altura,
+                "Score_Atletico": faf * 1.5,
+                "Possivel_Atleta": 1 if (faf >= 2 and imc_calc >= 25) else 0,
+            }
 
             with st.spinner("IA Analisando..."):
                 try:
-                    # IA LOCAL: SEM REQUESTS.POST
-                    scaled_data = scaler.transform(input_data)
-                    prediction = model.predict(scaled_data)[0]
-                    probabilities = model.predict_proba(scaled_data)[0]
-                    
-                    # Risco Acumulado (soma das probabilidades de sobrepeso e obesidade)
-                    risco_total = np.sum(probabilities[2:])
-                    
-                    # Mapeamento do diagnóstico baseado na predição (ajuste se a ordem for diferente)
-                    target_names = ["Abaixo do Peso", "Peso Normal", "Sobrepeso G. I", "Sobrepeso G. II", "Obesidade G. I", "Obesidade G. II", "Obesidade G. III"]
-                    diag = target_names[prediction]
+                    # IA REMOTA (API_URL): predição e simulação em paralelo pelo pool de conexões.
+                    # IA LOCAL: modelo desta réplica, com cache por vetor de features
+                    if api_client is not None:
+                        try:
+                            analise = api_client.analisar(registro, top=3)
+                        except ErroAPI as e:
+                            # Erros do próprio registro (4xx) não mudam de resposta no modelo local
+                            if model is None or scaler is None or (e.status is not None and e.status < 500):
+                                raise
+                            st.warning(f"API de predição indisponível ({e}). Usando o modelo local.")
+                            analise = analisar_local(registro)
+                    else:
+                        analise = analisar_local(registro)
+                    diag, risco_total = analise["diagnostico"], analise["risco_total"]
 
                     st.markdown("---")
                     if imc_calc < 25 and "Obesidade" in diag:
@@ -311,6 +395,21 @@ elif pagina == "🩺 Diagnóstico Individual":
                     with r3: 
                         st.write("**Nível de Risco Geral:**")
                         st.progress(float(risco_total))
+                    st.caption(f"Versão do modelo: {analise.get('versao_modelo', versao_modelo)}")
+
+                    explicacao = analise.get("explicacao")
+                    if explicacao:
+                        # Quanto cada resposta somou ou tirou do risco total (já ordenado por impacto)
+                        fatores = [c for c in explicacao["contribuicoes"][:5] if abs(c["risco_total"]) >= 0.005]
+                        if fatores:
+                            st.markdown("### 🧭 Fatores que Mais Pesaram na Predição")
+                            df_fatores = pd.DataFrame([
+                                [c["feature"].replace("_", " "), f"{c['risco_total']*100:+.1f} p.p.", "⬆️ Aumenta" if c["risco_total"] > 0 else "⬇️ Reduz"]
+                                for c in fatores
+                            ], columns=["Fator", "Efeito no Risco", "Direção"])
+                            st.dataframe(df_fatores, hide_index=True, use_container_width=True)
+                            st.caption(f"Risco médio de partida do modelo: {explicacao['base_risco']*100:.1f}%. "
+                                       "Cada fator mostra quanto a resposta deslocou o risco a partir desse ponto.")
                     
                     st.markdown(f"""
                     <div style='font-size: 1.1em; margin: 15px 0;'>
@@ -340,6 +439,22 @@ elif pagina == "🩺 Diagnóstico Individual":
                         df_recs = pd.DataFrame(recs, columns=["Fator", "Situação Atual", "Conduta Recomendada"])
                         st.dataframe(df_recs, hide_index=True, use_container_width=True)
 
+                    # Impacto de cada mudança de hábito (todas as combinações avaliadas de uma vez)
+                    simulacao = analise["simulacao"]
+                    ganhos = [m for m in simulacao["mudancas"] if m["delta"] < 0][:5]
+                    if ganhos:
+                        st.markdown("### 🔬 Simulação de Impacto dos Hábitos (IA)")
+                        df_sim = pd.DataFrame([
+                            [m["habito"].replace("_", " "), f"{m['de']} → {m['para']}", f"{m['risco_total']*100:.1f}%", f"{m['delta']*100:+.1f} p.p."]
+                            for m in ganhos
+                        ], columns=["Hábito", "Mudança", "Risco Simulado", "Variação"])
+                        st.dataframe(df_sim, hide_index=True, use_container_width=True)
+                        if simulacao["melhores"]:
+                            melhor = simulacao["melhores"][0]
+                            mudancas_txt = ", ".join(f"{h.replace('_', ' ')}: {v}" for h, v in melhor["alteracoes"].items())
+                            st.caption(f"Melhor combinação entre {simulacao['combinacoes']} simuladas ({mudancas_txt}): "
+                                       f"risco de {risco_total*100:.1f}% para {melhor['risco_total']*100:.1f}%.")
+
                 except Exception as e: 
                     st.error(f"Erro na inferência da IA: {e}")
         else:
@@ -0,0 +1,31 @@
+# tests/conftest.py
+# Os módulos da API são importados pelo nome (como em api/app.py), a partir de api/
+import os
+import sys
+import importlib
+
+import pytest
+
+PASTA_API = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'api')
+if PASTA_API not in sys.path:
+    sys.path.insert(0, PASTA_API)
+
+# Testes que precisam dos artefatos treinados de api/ (modelo.pkl, scaler.pkl)
+com_modelo = pytest.mark.skipif(not os.path.exists(os.path.join(PASTA_API, 'modelo.pkl')),
+                                reason="modelo.pkl ausente")
+
+
+@pytest.fixture(scope="session")
+def app_api():
+    # A API carrega os artefatos relativos à pasta api/, como no container
+    anterior = os.getcwd()
+    os.chdir(PASTA_API)
+    try:
+        yield importlib.import_module('app')
+    finally:
+        os.chdir(anterior)
+
+
+@pytest.fixture
+def cliente(app_api):
+    return app_api.app.test_client()
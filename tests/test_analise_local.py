@@ -0,0 +1,48 @@
+# tests/test_analise_local.py
+# Análise local do Streamlit (o caminho medido no benchmark): mesmo diagnóstico e
+# risco da API, explicação que soma o risco total e resultado igual com e sem cache.
+import os
+import sys
+
+import joblib
+import pytest
+
+from conftest import PASTA_API, com_modelo
+
+sys.path.insert(0, os.path.join(PASTA_API, '..', 'streamlit'))
+from analise_local import AnaliseLocal  # noqa: E402
+from codificador import COLUNAS_MODELO, CodificadorFeatures  # noqa: E402
+
+# Como em streamlit/main.py, o scaler recebe um array sem nomes de coluna
+pytestmark = pytest.mark.filterwarnings('ignore:X does not have valid feature names')
+
+REGISTRO = {"Genero": "Feminino", "Idade": 25, "Altura": 1.6, "Peso": 80, "Transporte": "Caminhada"}
+
+
+def _analise(capacidade_cache):
+    modelo = joblib.load(os.path.join(PASTA_API, 'modelo.pkl'))
+    scaler = joblib.load(os.path.join(PASTA_API, 'scaler.pkl'))
+    return AnaliseLocal(modelo, scaler, CodificadorFeatures(), COLUNAS_MODELO, "local",
+                        capacidade_cache=capacidade_cache)
+
+
+@com_modelo
+def test_mesmo_resultado_com_e_sem_cache():
+    com_cache, sem_cache = _analise(10), _analise(0)
+    primeira = com_cache.analisar(REGISTRO)
+    assert com_cache.analisar(REGISTRO) == primeira
+    assert com_cache.cache.estatisticas()["acertos"] == 1
+    assert sem_cache.analisar(REGISTRO) == primeira
+
+    explicacao = primeira["explicacao"]
+    total = explicacao["base_risco"] + sum(c["risco_total"] for c in explicacao["contribuicoes"])
+    assert total == pytest.approx(primeira["risco_total"], abs=1e-9)
+    assert primeira["simulacao"]["combinacoes"] > 0
+
+
+@com_modelo
+def test_igual_a_api(cliente):
+    api = cliente.post('/predict', json=REGISTRO).json
+    local = _analise(0).analisar(REGISTRO)
+    assert local["diagnostico"] == api["diagnostico"]
+    assert local["risco_total"] == pytest.approx(api["risco_total"], abs=1e-9)
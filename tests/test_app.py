@@ -0,0 +1,107 @@
+# tests/test_app.py
+# Rotas de predição da API com os artefatos de api/ (modelo.pkl, scaler.pkl).
+import pytest
+
+from conftest import com_modelo
+from microlote import MicroLote
+
+pytestmark = com_modelo
+
+REGISTRO = {"Genero": "Feminino", "Idade": 25, "Freq_Atividade_Fisica": 2, "Transporte": "Caminhada"}
+
+
+def _soma_explicacao(explicacao):
+    return explicacao["base_risco"] + sum(c["risco_total"] for c in explicacao["contribuicoes"])
+
+
+def test_explicacao_ligada_por_padrao(cliente):
+    padrao = cliente.post('/predict', json=REGISTRO).get_json()
+    sem = cliente.post('/predict?explicar=0', json=REGISTRO).get_json()
+
+    assert "explicacao" in padrao
+    assert "explicacao" not in sem
+    assert sem["risco_total"] == padrao["risco_total"]
+    assert _soma_explicacao(padrao["explicacao"]) == pytest.approx(padrao["risco_total"], abs=1e-9)
+
+
+def test_explicacao_passa_pelo_cache(cliente, app_api):
+    registro = {**REGISTRO, "Idade": 61}
+    cache = app_api.modelos.ativo.cache
+    # Entrada só com probabilidades: quem pede a explicação recalcula e a entrada é completada
+    cliente.post('/predict?explicar=0', json=registro)
+    primeira = cliente.post('/predict', json=registro).get_json()
+    acertos = cache.acertos
+    segunda = cliente.post('/predict', json=registro).get_json()
+    sem = cliente.post('/predict?explicar=0', json=registro).get_json()
+
+    assert cache.acertos == acertos + 2
+    assert segunda == primeira
+    assert sem["risco_total"] == primeira["risco_total"]
+
+
+def test_explicacao_pelo_microlote(cliente, app_api, monkeypatch):
+    esperado = cliente.post('/predict', json={**REGISTRO, "Idade": 47}).get_json()
+    app_api.modelos.ativo.cache.limpar()
+    monkeypatch.setattr(app_api, 'microlote_explicacao', MicroLote(app_api.explicar_microlote, janela_ms=1.0))
+    assert cliente.post('/predict', json={**REGISTRO, "Idade": 47}).get_json() == esperado
+    assert app_api.microlote_explicacao.estatisticas()["linhas"] == 1
+
+
+def test_lote_explicado_igual_ao_predict(cliente):
+    registros = [REGISTRO, {**REGISTRO, "Idade": 33, "Transporte": "Moto"}]
+    lote = cliente.post('/predict/batch', json=registros).get_json()
+    assert len(lote["resultados"]) == 2
+    for registro, resultado in zip(registros, lote["resultados"]):
+        individual = cliente.post('/predict', json=registro).get_json()
+        assert resultado["explicacao"] == individual["explicacao"]
+        assert resultado["risco_total"] == individual["risco_total"]
+
+    sem = cliente.post('/predict/batch?explicar=0', json=registros).get_json()
+    assert all("explicacao" not in r for r in sem["resultados"])
+
+
+def test_troca_de_versao_cria_cache_novo_aquecido(cliente, app_api):
+    from pacote_modelo import PacoteModelo
+
+    cliente.post('/predict', json={**REGISTRO, "Idade": 47})
+    anterior = app_api.modelos.ativo
+    novo = PacoteModelo.carregar_arquivos()
+    app_api.preparar_pacote(novo, anterior)
+
+    assert novo.cache is not anterior.cache
+    assert len(novo.cache) == len(anterior.cache)
+    for linha in anterior.cache.vetores():
+        assert (novo.cache.obter(linha) == anterior.cache.obter(linha)).all()
+
+
+def test_lote_mantem_a_ordem_e_isola_erros(cliente):
+    registros = [
+        {**REGISTRO, "Idade": 20},
+        {**REGISTRO, "Transporte": "Teletransporte"},
+        "não é um objeto",
+        {**REGISTRO, "Idade": 55, "Genero": "Masculino"},
+    ]
+    lote = cliente.post('/predict/batch?explicar=0', json=registros).get_json()
+
+    assert (lote["total"], lote["sucesso"], lote["erros"]) == (4, 2, 2)
+    assert [r["indice"] for r in lote["resultados"]] == [0, 1, 2, 3]
+    assert [r["status"] for r in lote["resultados"]] == ["sucesso", "erro", "erro", "sucesso"]
+    assert "Transporte" in lote["resultados"][1]["erro"]
+    for i in (0, 3):
+        individual = cliente.post('/predict?explicar=0', json=registros[i]).get_json()
+        assert lote["resultados"][i]["risco_total"] == individual["risco_total"]
+
+
+def test_lote_ndjson_com_linha_ilegivel(cliente):
+    corpo = '{"Idade": 30}\n{quebrado\n\n{"Idade": 40}\n'
+    lote = cliente.post('/predict/batch', data=corpo, content_type='application/x-ndjson').get_json()
+    assert [r["status"] for r in lote["resultados"]] == ["sucesso", "erro", "sucesso"]
+    assert "JSON inválido" in lote["resultados"][1]["erro"]
+
+
+def test_lote_acima_do_limite(cliente, app_api, monkeypatch):
+    monkeypatch.setattr(app_api, 'BATCH_MAX_REGISTROS', 2)
+    resposta = cliente.post('/predict/batch', json=[REGISTRO] * 3)
+    assert resposta.status_code == 413
+    assert "limite de 2" in resposta.get_json()["erro"]
+    assert cliente.post('/predict/batch', json=[REGISTRO] * 2).status_code == 200
@@ -0,0 +1,65 @@
+# tests/test_cache_predicoes.py
+# Cache de predições: despejo LRU, TTL, chave canônica e acesso concorrente. Cada
+# versão do modelo tem o seu próprio cache, criado na troca de pacote da API.
+import threading
+import time
+
+import numpy as np
+
+from cache_predicoes import CachePredicoes
+
+
+def test_despejo_lru_preserva_os_mais_usados():
+    cache = CachePredicoes(capacidade=3)
+    for i in range(3):
+        cache.guardar([i], [float(i)])
+    assert cache.obter([0]) is not None   # 0 passa a ser o mais recente
+    cache.guardar([3], [3.0])
+
+    assert cache.obter([1]) is None
+    assert [cache.obter([i])[0] for i in (0, 2, 3)] == [0.0, 2.0, 3.0]
+    assert len(cache) == 3 and cache.despejos == 1
+
+
+def test_ttl_expira_entradas():
+    cache = CachePredicoes(capacidade=10, ttl=0.05)
+    cache.guardar([1.0], [0.5])
+    assert cache.obter([1.0]) is not None
+    time.sleep(0.06)
+    assert cache.obter([1.0]) is None
+    assert cache.expirados == 1 and len(cache) == 0
+
+
+def test_chave_canonica_e_copia_do_valor():
+    cache = CachePredicoes(capacidade=10)
+    lote = np.array([[0.1, 0.2], [0.3, 0.4]])
+    cache.guardar([-0.0, 1.0], lote[0])
+    lote[0] = 9.0
+    np.testing.assert_array_equal(cache.obter([0.0, 1.0 + 1e-12]), [0.1, 0.2])
+
+
+def test_acesso_concorrente():
+    cache = CachePredicoes(capacidade=50)
+    erros = []
+
+    def trabalhador(k):
+        try:
+            for i in range(2000):
+                linha = [float((i * 7 + k) % 80)]
+                valor = cache.obter(linha)
+                if valor is None:
+                    cache.guardar(linha, linha)
+                elif valor[0] != linha[0]:
+                    erros.append((linha, valor))
+        except Exception as e:
+            erros.append(e)
+
+    threads = [threading.Thread(target=trabalhador, args=(k,)) for k in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert not erros
+    assert len(cache) <= 50
+    assert cache.acertos + cache.falhas == 8 * 2000
@@ -0,0 +1,107 @@
+# tests/test_cliente_api.py
+# Disjuntor do cliente da API do Streamlit: fechado -> aberto -> meio-aberto -> fechado,
+# com uma única chamada de teste depois da espera; repetições limitadas por chamada.
+import os
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from conftest import PASTA_API
+
+sys.path.insert(0, os.path.join(PASTA_API, '..', 'streamlit'))
+import cliente_api  # noqa: E402
+from cliente_api import CircuitoAberto, ClienteAPI, Disjuntor  # noqa: E402
+
+
+@pytest.fixture
+def relogio(monkeypatch):
+    agora = [1000.0]
+    monkeypatch.setattr(cliente_api.time, 'monotonic', lambda: agora[0])
+    return agora
+
+
+def test_abre_apos_falhas_seguidas_e_fecha_com_teste_bem_sucedido(relogio):
+    disjuntor = Disjuntor(limite_falhas=3, espera_s=30.0)
+    for _ in range(2):
+        assert disjuntor.permitir()
+        disjuntor.falha()
+    assert disjuntor.estado == "fechado"
+    disjuntor.falha()
+    assert disjuntor.estado == "aberto" and disjuntor.aberturas == 1
+    assert not disjuntor.permitir()
+
+    relogio[0] += 30.0
+    assert disjuntor.estado == "meio-aberto"
+    assert disjuntor.permitir()
+    assert not disjuntor.permitir()     # só uma chamada de teste por vez
+    disjuntor.sucesso()
+    assert disjuntor.estado == "fechado"
+    assert disjuntor.permitir() and disjuntor.permitir()
+
+
+def test_falha_no_teste_reabre(relogio):
+    disjuntor = Disjuntor(limite_falhas=2, espera_s=10.0)
+    disjuntor.falha()
+    disjuntor.falha()
+    relogio[0] += 10.0
+    assert disjuntor.permitir()
+    disjuntor.falha()
+    assert disjuntor.estado == "aberto" and disjuntor.aberturas == 2
+    relogio[0] += 9.0
+    assert not disjuntor.permitir()
+
+
+def test_sucesso_zera_as_falhas(relogio):
+    disjuntor = Disjuntor(limite_falhas=2)
+    disjuntor.falha()
+    disjuntor.sucesso()
+    disjuntor.falha()
+    assert disjuntor.estado == "fechado"
+
+
+def test_cliente_recusa_na_hora_com_o_disjuntor_aberto():
+    # Porta 9 (discard) fechada: falha de conexão imediata, sem repetições
+    cliente = ClienteAPI('http://127.0.0.1:9', timeout_conexao=0.5, tentativas=0,
+                         limite_falhas=2, espera_disjuntor_s=60)
+    for _ in range(2):
+        with pytest.raises(cliente_api.ErroAPI):
+            cliente.pronto()
+    with pytest.raises(CircuitoAberto):
+        cliente.pronto()
+    assert cliente.estatisticas()["disjuntor"] == "aberto"
+
+
+def test_repeticoes_limitadas_contra_api_com_erro():
+    tentativas = []
+
+    class Indisponivel(BaseHTTPRequestHandler):
+        def do_POST(self):
+            tentativas.append(self.path)
+            self.rfile.read(int(self.headers.get('Content-Length', 0)))
+            self.send_response(503)
+            self.send_header('Retry-After', '30')
+            self.send_header('Content-Type', 'application/json')
+            self.end_headers()
+            self.wfile.write(b'{"erro": "sobrecarga"}')
+
+        def log_message(self, *args):
+            pass
+
+    servidor = ThreadingHTTPServer(('127.0.0.1', 0), Indisponivel)
+    threading.Thread(target=servidor.serve_forever, daemon=True).start()
+    try:
+        cliente = ClienteAPI(f'http://127.0.0.1:{servidor.server_port}', tentativas=10, backoff=0.01)
+        inicio = time.perf_counter()
+        with pytest.raises(cliente_api.ErroAPI) as erro:
+            cliente.prever({"Idade": 30})
+        # POST repetido (rota idempotente), mas no máximo MAX_TENTATIVAS vezes e sem
+        # esperar os 30 s pedidos pelo Retry-After
+        assert erro.value.status == 503
+        assert len(tentativas) == 1 + cliente_api.MAX_TENTATIVAS
+        assert time.perf_counter() - inicio < 5
+    finally:
+        servidor.shutdown()
+        servidor.server_close()
@@ -0,0 +1,47 @@
+# tests/test_codificador.py
+# Codificação das features: Score_Atletico e Possivel_Atleta ausentes valem 0 no
+# caminho da API (como no reindex(fill_value=0) original) e só são derivados sob pedido.
+#
+# Uso:
+#   python -m pytest tests
+import numpy as np
+import pandas as pd
+
+from codificador import COLUNAS_MODELO, CodificadorFeatures, perfil_atletico
+
+REGISTRO = {
+    "Genero": "Feminino", "Idade": 25, "Freq_Atividade_Fisica": 2,
+    "Transporte": "Caminhada", "Peso": 80, "Altura": 1.70,
+}
+I_SCORE = COLUNAS_MODELO.index('Score_Atletico')
+I_ATLETA = COLUNAS_MODELO.index('Possivel_Atleta')
+
+
+def test_api_preenche_atleticas_ausentes_com_zero():
+    codificador = CodificadorFeatures()
+    linha = codificador.codificar(REGISTRO)
+    assert linha[I_SCORE] == 0.0
+    assert linha[I_ATLETA] == 0.0
+
+    X, validos, erros = codificador.codificar_lote([REGISTRO])
+    np.testing.assert_array_equal(X[0], linha)
+    X_tabela, _, _ = codificador.codificar_tabela(pd.DataFrame([REGISTRO]))
+    np.testing.assert_array_equal(X_tabela[0], linha)
+
+
+def test_api_respeita_atleticas_informadas():
+    linha = CodificadorFeatures().codificar({**REGISTRO, "Score_Atletico": 1.5, "Possivel_Atleta": 1})
+    assert linha[I_SCORE] == 1.5
+    assert linha[I_ATLETA] == 1.0
+
+
+def test_derivacao_sob_pedido_segue_o_formulario():
+    codificador = CodificadorFeatures(derivar_atleticas=True)
+    linha = codificador.codificar(REGISTRO)
+    assert linha[I_SCORE] == 3.0
+    assert linha[I_ATLETA] == 1.0
+
+    X_tabela, _, _ = codificador.codificar_tabela(pd.DataFrame([REGISTRO]))
+    np.testing.assert_array_equal(X_tabela[0], linha)
+    # O registro do Streamlit com o perfil calculado dá o mesmo vetor no codificador da API
+    np.testing.assert_array_equal(CodificadorFeatures().codificar({**REGISTRO, **perfil_atletico(REGISTRO)}), linha)
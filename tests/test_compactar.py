@@ -0,0 +1,43 @@
+# tests/test_compactar.py
+# Floresta compactada: folhas quantizadas somam ESCALA e a explicação reproduz o
+# predict_proba servido.
+import os
+import sys
+
+import joblib
+import numpy as np
+
+from conftest import PASTA_API, com_modelo
+
+sys.path.insert(0, os.path.join(PASTA_API, '..', 'train'))
+from compactar import ESCALA, _quantizar, compactar  # noqa: E402
+
+pytestmark = com_modelo
+
+
+def test_quantizacao_preserva_a_soma():
+    valor = np.random.RandomState(0).dirichlet(np.ones(7), size=500)
+    quantizado = _quantizar(valor)
+    assert (quantizado.sum(axis=1, dtype=np.int64) == ESCALA).all()
+    assert np.abs(quantizado / ESCALA - valor).max() <= 1 / ESCALA
+
+
+def test_explicacao_da_floresta_compacta_soma_a_probabilidade():
+    modelo = joblib.load(os.path.join(PASTA_API, 'modelo.pkl'))
+    floresta = compactar(modelo, n_arvores=40, tolerancia_folhas=0.05)
+    X = np.random.RandomState(1).standard_normal((64, modelo.n_features_in_))
+
+    probabilidades, base, contribuicoes = floresta.explicar(X)
+    np.testing.assert_allclose(base + contribuicoes.sum(axis=1), probabilidades, atol=1e-9)
+    np.testing.assert_array_equal(probabilidades, floresta.predict_proba(X))
+
+
+def test_lote_grande_da_floresta_compacta_igual_ao_pequeno():
+    # Acima de LINHAS_TRAVESSIA_UNICA a travessia e a soma mudam de caminho (blocos e
+    # acumulação árvore a árvore), mas o resultado de cada linha é o mesmo
+    modelo = joblib.load(os.path.join(PASTA_API, 'modelo.pkl'))
+    floresta = compactar(modelo, n_arvores=40, tolerancia_folhas=0.05)
+    X = np.random.RandomState(2).standard_normal((3 * floresta.BLOCO_LINHAS, modelo.n_features_in_))
+
+    esperado = np.vstack([floresta.predict_proba(X[i:i + 256]) for i in range(0, len(X), 256)])
+    np.testing.assert_array_equal(floresta.predict_proba(X), esperado)
@@ -0,0 +1,51 @@
+# tests/test_floresta.py
+# Floresta compilada: probabilidades bit a bit idênticas ao predict_proba do sklearn,
+# na travessia única, na em blocos e com as folhas vindas do apply() do sklearn.
+import os
+
+import joblib
+import numpy as np
+import pandas as pd
+import pytest
+
+from conftest import PASTA_API, com_modelo
+
+from floresta import FlorestaCompilada
+
+pytestmark = com_modelo
+
+
+@pytest.fixture(scope="module")
+def modelo():
+    return joblib.load(os.path.join(PASTA_API, 'modelo.pkl'))
+
+
+@pytest.fixture(scope="module")
+def X_scaled():
+    # Os dados reais do projeto (repetidos até 10k linhas) mais valores fora da faixa
+    scaler = joblib.load(os.path.join(PASTA_API, 'scaler.pkl'))
+    dados = pd.read_csv(os.path.join(PASTA_API, '..', 'data', 'dados_limpos.csv'))
+    X = scaler.transform(dados[list(scaler.feature_names_in_)])
+    extremos = np.random.RandomState(0).standard_normal((500, X.shape[1])) * 5
+    return np.resize(np.vstack([X, extremos]), (10000, X.shape[1]))
+
+
+@pytest.mark.parametrize("n_linhas", [1, 100, 512, 513, 2049, 10000])
+def test_probabilidades_identicas_ao_sklearn(modelo, X_scaled, n_linhas):
+    floresta = FlorestaCompilada.from_sklearn(modelo)
+    X = X_scaled[:n_linhas]
+    assert np.array_equal(floresta.predict_proba(X), modelo.predict_proba(X))
+
+
+def test_folhas_do_apply_do_sklearn(modelo, X_scaled):
+    floresta = FlorestaCompilada.from_sklearn(modelo)
+    nos = modelo.apply(X_scaled).T + floresta.raizes[:, np.newaxis]
+    assert np.array_equal(nos, floresta.folhas(X_scaled))
+    assert np.array_equal(floresta.proba_folhas(nos), modelo.predict_proba(X_scaled))
+
+
+def test_artefato_carregado_mantem_a_identidade(modelo, X_scaled, tmp_path):
+    caminho = str(tmp_path / 'floresta.joblib')
+    FlorestaCompilada.from_sklearn(modelo).salvar(caminho)
+    floresta = FlorestaCompilada.carregar(caminho)
+    assert np.array_equal(floresta.predict_proba(X_scaled), modelo.predict_proba(X_scaled))
@@ -0,0 +1,80 @@
+# tests/test_microlote.py
+# Micro-lotes: chamadas simultâneas viram uma única avaliação, cada chamador recebe
+# a sua própria linha, e o timeout de quem espera é respeitado.
+import threading
+import time
+from concurrent.futures import TimeoutError
+
+import numpy as np
+import pytest
+
+from microlote import MicroLote
+
+
+def _submeter_em_paralelo(microlote, n):
+    resultados = [None] * n
+    barreira = threading.Barrier(n)
+
+    def chamador(i):
+        barreira.wait()
+        resultados[i] = microlote.submeter([float(i), 2.0 * i], timeout=5)
+
+    threads = [threading.Thread(target=chamador, args=(i,)) for i in range(n)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return resultados
+
+
+def test_chamadas_simultaneas_formam_um_lote():
+    tamanhos = []
+
+    def avaliar(X):
+        tamanhos.append(len(X))
+        return X.sum(axis=1)
+
+    microlote = MicroLote(avaliar, janela_ms=200.0, tamanho_max=64)
+    resultados = _submeter_em_paralelo(microlote, 8)
+
+    assert resultados == [3.0 * i for i in range(8)]
+    assert sum(tamanhos) == 8 and len(tamanhos) <= 2
+    assert microlote.estatisticas()["linhas"] == 8
+
+
+def test_tamanho_max_limita_o_lote():
+    tamanhos = []
+
+    def avaliar(X):
+        tamanhos.append(len(X))
+        return X[:, 0]
+
+    microlote = MicroLote(avaliar, janela_ms=200.0, tamanho_max=3)
+    assert _submeter_em_paralelo(microlote, 7) == [float(i) for i in range(7)]
+    assert max(tamanhos) <= 3 and sum(tamanhos) == 7
+
+
+def test_timeout_de_quem_espera():
+    liberar = threading.Event()
+
+    def avaliar(X):
+        liberar.wait(5)
+        return X[:, 0]
+
+    microlote = MicroLote(avaliar, janela_ms=1.0)
+    inicio = time.perf_counter()
+    with pytest.raises(TimeoutError):
+        microlote.submeter([1.0], timeout=0.05)
+    assert time.perf_counter() - inicio < 1.0
+    liberar.set()
+    # A thread de fundo segue atendendo depois do timeout
+    assert microlote.submeter([2.0], timeout=5) == 2.0
+
+
+def test_erro_da_avaliacao_chega_a_todos_do_lote():
+    def avaliar(X):
+        raise ValueError("floresta indisponível")
+
+    microlote = MicroLote(avaliar, janela_ms=1.0)
+    with pytest.raises(ValueError, match="indisponível"):
+        microlote.submeter(np.zeros(2), timeout=5)
@@ -0,0 +1,63 @@
+# tests/test_pacote_modelo.py
+# Pacote versionado servido só pela floresta compilada e pela tabela de explicação
+# mapeadas em memória, sem carregar o modelo sklearn.
+import os
+
+import numpy as np
+import pytest
+
+from conftest import PASTA_API, com_modelo
+import pacote_modelo
+from pacote_modelo import ErroPacote, GerenciadorModelos, PacoteModelo, publicar, verificar
+
+pytestmark = com_modelo
+
+
+def test_pacote_servido_sem_modelo_sklearn(tmp_path):
+    artefatos = [os.path.join(PASTA_API, nome) for nome in ('modelo.pkl', 'scaler.pkl', 'target_map.pkl')]
+    manifesto = publicar(*artefatos, pasta=str(tmp_path))
+    assert "target_map" not in manifesto
+    assert os.path.exists(tmp_path / manifesto["versao"] / "floresta_explicacao.joblib")
+
+    gerenciador = GerenciadorModelos(pasta=str(tmp_path), intervalo=0)
+    assert gerenciador.verificar_agora()
+    pacote = gerenciador.ativo
+    pacote.aquecer()
+    assert pacote._modelo is None
+    assert isinstance(pacote.floresta._contribuicoes_folhas, np.memmap)
+
+    X = np.random.RandomState(0).standard_normal((16, len(pacote.colunas)))
+    probabilidades, base, contribuicoes = pacote.floresta.explicar(X)
+    np.testing.assert_allclose(base + contribuicoes.sum(axis=1), probabilidades, atol=1e-9)
+    # Sob demanda, o modelo sklearn continua disponível e concorda com a floresta
+    np.testing.assert_array_equal(pacote.modelo.predict_proba(X), probabilidades)
+
+
+def test_lote_grande_com_folhas_do_sklearn(tmp_path, monkeypatch):
+    artefatos = [os.path.join(PASTA_API, nome) for nome in ('modelo.pkl', 'scaler.pkl', 'target_map.pkl')]
+    manifesto = publicar(*artefatos, pasta=str(tmp_path))
+    pacote = PacoteModelo.carregar(str(tmp_path / manifesto["versao"]))
+    X = np.random.RandomState(1).standard_normal((64, len(pacote.colunas)))
+
+    monkeypatch.setattr(pacote_modelo, 'TRAVESSIA_SKLEARN_MIN_LINHAS', 32)
+    probabilidades, base, contribuicoes = pacote.explicar(X)
+    assert pacote._modelo is not None
+    np.testing.assert_array_equal(pacote.predict_proba(X), pacote.floresta.predict_proba(X))
+    np.testing.assert_array_equal(probabilidades, pacote.floresta.predict_proba(X))
+    np.testing.assert_array_equal(contribuicoes, pacote.floresta.explicar(X)[2])
+
+
+def test_verificar_confere_os_artefatos_servidos(tmp_path):
+    artefatos = [os.path.join(PASTA_API, nome) for nome in ('modelo.pkl', 'scaler.pkl', 'target_map.pkl')]
+    manifesto = publicar(*artefatos, pasta=str(tmp_path))
+    assert {'floresta.joblib', 'floresta_explicacao.joblib'} <= set(manifesto["arquivos"])
+
+    pasta_versao = str(tmp_path / manifesto["versao"])
+    verificar(pasta_versao)
+    with open(os.path.join(pasta_versao, 'floresta_explicacao.joblib'), 'r+b') as f:
+        f.seek(-1, os.SEEK_END)
+        ultimo = f.read(1)
+        f.seek(-1, os.SEEK_END)
+        f.write(bytes([ultimo[0] ^ 0xFF]))
+    with pytest.raises(ErroPacote, match="floresta_explicacao.joblib"):
+        verificar(pasta_versao)
@@ -0,0 +1,56 @@
+# tests/test_pontuar_lote.py
+# Saída Parquet da pontuação em massa com rejeições só a partir do segundo bloco:
+# o esquema é fixo e não depende das colunas nulas do primeiro bloco.
+import os
+
+import pandas as pd
+import pytest
+
+pq = pytest.importorskip("pyarrow.parquet")
+
+import pontuar_lote
+from pontuar_lote import GravadorResultados, pontuar_arquivo
+
+PASTA_API = os.path.dirname(os.path.abspath(pontuar_lote.__file__))
+OBESITY_CSV = os.path.join(PASTA_API, '..', 'data', 'Obesity.csv')
+
+
+def test_gravador_aceita_erro_depois_de_bloco_sem_erros(tmp_path):
+    saida = str(tmp_path / "resultados.parquet")
+    gravador = GravadorResultados(saida)
+    bloco = {"linha": [0, 1], "classe": [1, 4], "diagnostico": ["Peso Normal", "Obesidade G. I"],
+             "confianca": [0.9, 0.8], "risco_total": [0.1, 0.9], "erro": [None, None], "Idade": [None, None]}
+    gravador.escrever(pd.DataFrame(bloco))
+    gravador.escrever(pd.DataFrame({
+        "linha": [2, 3], "classe": [-1, 2], "diagnostico": [None, "Sobrepeso G. I"],
+        "confianca": [float("nan"), 0.7], "risco_total": [float("nan"), 0.7],
+        "erro": ["'Idade' fora da faixa [0, 130]: 200", None], "Idade": [200, 30],
+    }))
+    gravador.fechar()
+
+    tabela = pq.read_table(saida)
+    assert str(tabela.schema.field("erro").type) == "string"
+    assert str(tabela.schema.field("classe").type) == "int64"
+    df = tabela.to_pandas()
+    assert df["linha"].tolist() == [0, 1, 2, 3]
+    assert df["erro"].iloc[2].startswith("'Idade' fora da faixa")
+    assert df["Idade"].iloc[2] == "200"
+
+
+@pytest.mark.skipif(not os.path.exists(os.path.join(PASTA_API, 'modelo.pkl')), reason="modelo.pkl ausente")
+def test_pontuar_arquivo_parquet_com_linha_invalida_no_segundo_bloco(tmp_path):
+    entrada = tmp_path / "pacientes.csv"
+    df = pd.read_csv(OBESITY_CSV, nrows=30, dtype=str)
+    df.loc[25, 'Age'] = "abc"
+    df.to_csv(entrada, index=False)
+    saida = str(tmp_path / "resultados.parquet")
+
+    total = pontuar_arquivo(str(entrada), saida, tamanho_bloco=10, processos=1,
+                            caminho_modelo=os.path.join(PASTA_API, 'modelo.pkl'),
+                            caminho_scaler=os.path.join(PASTA_API, 'scaler.pkl'))
+
+    resultado = pq.read_table(saida).to_pandas()
+    assert total == 30 and len(resultado) == 30
+    assert resultado["erro"].notna().tolist() == [i == 25 for i in range(30)]
+    assert resultado["classe"].iloc[25] == -1
+    assert (resultado["classe"].drop(index=25) >= 0).all()
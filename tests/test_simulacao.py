@@ -0,0 +1,40 @@
+# tests/test_simulacao.py
+# Simulação "e se": o risco atual é o do /predict e os parâmetros são validados.
+from conftest import com_modelo
+from simulacao import VALORES_HABITOS
+
+pytestmark = com_modelo
+
+PACIENTE = {
+    "Genero": "Masculino", "Idade": 30, "Freq_Atividade_Fisica": 2,
+    "Transporte": "Automóvel", "Peso": 90, "Altura": 1.70,
+}
+
+
+def test_risco_atual_igual_ao_predict(cliente):
+    predicao = cliente.post('/predict', json=PACIENTE).get_json()
+    simulacao = cliente.post('/predict/simulacao', json={"paciente": PACIENTE}).get_json()
+    assert simulacao["atual"]["risco_total"] == predicao["risco_total"]
+    assert simulacao["atual"]["diagnostico"] == predicao["diagnostico"]
+
+
+def test_mudanca_isolada_igual_ao_predict_do_registro_alterado(cliente):
+    simulacao = cliente.post('/predict/simulacao', json={"paciente": PACIENTE, "habitos": ["Consumo_Agua"]}).get_json()
+    for mudanca in simulacao["mudancas"]:
+        predicao = cliente.post('/predict', json={**PACIENTE, "Consumo_Agua": mudanca["para"]}).get_json()
+        assert mudanca["risco_total"] == predicao["risco_total"]
+
+
+def test_top_invalido_responde_400(cliente):
+    for top in (0, -3, "5", 2.5, True):
+        resposta = cliente.post('/predict/simulacao', json={"paciente": PACIENTE, "top": top})
+        assert resposta.status_code == 400, top
+        assert "'top'" in resposta.get_json()["erro"]
+
+    resposta = cliente.post('/predict/simulacao', json={"paciente": PACIENTE, "top": 2}).get_json()
+    assert len(resposta["melhores"]) <= 2
+
+
+def test_grade_padrao_segue_as_faixas():
+    assert VALORES_HABITOS['Tempo_uso_dispositivos_eletronicos'] == [0, 4, 8, 12, 16, 20, 24]
+    assert VALORES_HABITOS['Num_refeicoes'] == [1, 2, 3, 4]
@@ -0,0 +1,59 @@
+# tests/test_telemetria.py
+# Acumuladores por thread: threads encerradas não deixam acumuladores para trás,
+# mas as suas contagens continuam no retrato. O mesmo vale para os retratos em disco
+# de workers encerrados, incorporados à base do diretório.
+import os
+import json
+import shutil
+import threading
+
+from telemetria import Metricas, incorporar_processo
+
+
+def test_threads_encerradas_vao_para_a_base():
+    metricas = Metricas()
+
+    def requisicao():
+        metricas.incrementar('requisicoes_total')
+        metricas.observar('latencia_segundos', 0.001)
+
+    for _ in range(20):
+        thread = threading.Thread(target=requisicao)
+        thread.start()
+        thread.join()
+    metricas.incrementar('requisicoes_total')
+
+    for _ in range(2):
+        histogramas, contadores = metricas.retrato()
+        assert contadores[('requisicoes_total', ())] == 21
+        assert sum(histogramas[('latencia_segundos', ())][:-1]) == 20
+    assert len(metricas._acumuladores) == 1
+
+
+def _retrato(diretorio, pid, processo, valor):
+    with open(os.path.join(diretorio, f"{pid}.json"), 'w') as f:
+        json.dump({"processo": processo, "histogramas": [],
+                   "contadores": [["predicoes_total", [], valor]]}, f)
+
+
+def test_worker_encerrado_vai_para_a_base_do_diretorio(tmp_path):
+    diretorio = str(tmp_path)
+    metricas = Metricas(diretorio=diretorio)
+    _retrato(diretorio, 111, "111-1.0", 5)
+    _retrato(diretorio, 222, "222-1.0", 7)
+    assert metricas.agregado()[1][('predicoes_total', ())] == 12
+
+    incorporar_processo(diretorio, 111)
+    assert sorted(os.listdir(diretorio)) == ['222.json', 'base.json']
+    assert metricas.agregado()[1][('predicoes_total', ())] == 12
+
+    # Retrato lido antes de ser apagado não conta duas vezes com a base nova
+    _retrato(diretorio, 222, "222-1.0", 7)
+    shutil.copy(os.path.join(diretorio, '222.json'), os.path.join(diretorio, '333.json'))
+    incorporar_processo(diretorio, 222)
+    shutil.move(os.path.join(diretorio, '333.json'), os.path.join(diretorio, '222.json'))
+    assert metricas.agregado()[1][('predicoes_total', ())] == 12
+
+    # Pid reaproveitado por um worker novo é outro processo
+    _retrato(diretorio, 111, "111-2.0", 1)
+    assert metricas.agregado()[1][('predicoes_total', ())] == 13
@@ -0,0 +1,289 @@
+# train/Etl/etl.py
+# O ETL do TcETL.ipynb como módulo importável e executável.
+#
+# Mesmas etapas do notebook (renomeação, mapas binários e ordinais, arredondamentos,
+# dummies de Transporte, alvo, IMC, StandardScaler e perfil atlético), mas em blocos:
+#   1ª passada: transforma cada bloco e ajusta o scaler de forma incremental
+#               (partial_fit = média/variância acumuladas)
+#   2ª passada: normaliza e grava cada bloco em Parquet/Feather com tipos compactos
+# A memória fica limitada ao tamanho do bloco, qualquer que seja o tamanho da entrada.
+# Um manifesto com os hashes da entrada e do código permite pular fontes inalteradas.
+#
+# Uso:
+#   python etl.py ../../data/Obesity.csv --destino ../data
+#   python etl.py Obesity.csv --formato feather --csv     (também grava dados_limpos.csv)
+#
+# Parquet e Feather requerem o pacote pyarrow.
+import os
+import sys
+import json
+import time
+import argparse
+
+import joblib
+import numpy as np
+import pandas as pd
+from sklearn.preprocessing import StandardScaler
+
+# Hash de arquivos: o mesmo helper da API (manifestos de pacote e artefatos)
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', '..', 'api'))
+from floresta import sha256_arquivo  # noqa: E402
+
+# --- MAPEAMENTOS (os mesmos do notebook) ---
+mapa_colunas = {
+    'Gender': 'Genero', 'Age': 'Idade', 'Height': 'Altura', 'Weight': 'Peso',
+    'family_history': 'Historico_Familiar_Excesso_De_Peso',
+    'family_history_with_overweight': 'Historico_Familiar_Excesso_De_Peso',
+    'FAVC': 'Consumo_Frequente_Alta_Caloria', 'FCVC': 'Freq_Vegetais',
+    'NCP': 'Num_refeicoes', 'CAEC': 'Comes_Entre_Refeicoes', 'SMOKE': 'Fumante',
+    'CH2O': 'Consumo_Agua', 'SCC': 'Monitora_Calorias', 'FAF': 'Freq_Atividade_Fisica',
+    'TUE': 'Tempo_uso_dispositivos_eletronicos', 'CALC': 'Consumo_Alcool',
+    'MTRANS': 'Transporte', 'Obesity': 'Obesidade', 'NObeyesdad': 'Obesidade'
+}
+
+mapas_binarios = {
+    'Genero': {'Female': 0, 'Male': 1},
+    'Historico_Familiar_Excesso_De_Peso': {'yes': 1, 'no': 0},
+    'Consumo_Frequente_Alta_Caloria': {'yes': 1, 'no': 0},
+    'Fumante': {'yes': 1, 'no': 0},
+    'Monitora_Calorias': {'yes': 1, 'no': 0},
+}
+
+mapa_freq = {'no': 0, 'Sometimes': 1, 'Frequently': 2, 'Always': 3}
+
+cols_arredondar = ['Idade', 'Freq_Vegetais', 'Num_refeicoes', 'Consumo_Agua',
+                   'Freq_Atividade_Fisica', 'Tempo_uso_dispositivos_eletronicos']
+
+# Categorias fixas: um bloco pode não conter todas, e o get_dummies(drop_first=True)
+# do notebook descartava a primeira em ordem alfabética (Automobile)
+categorias_transporte = ['Automobile', 'Bike', 'Motorbike', 'Public_Transportation', 'Walking']
+cols_transporte = [f'Transporte_{c}' for c in categorias_transporte[1:]]
+
+mapa_obesidade = {
+    'Insufficient_Weight': 0, 'Normal_Weight': 1, 'Overweight_Level_I': 2,
+    'Overweight_Level_II': 3, 'Obesity_Type_I': 4, 'Obesity_Type_II': 5, 'Obesity_Type_III': 6
+}
+
+colunas_para_normalizar = [
+    'Idade', 'Altura', 'Peso', 'IMC',
+    'Freq_Vegetais', 'Num_refeicoes', 'Consumo_Agua',
+    'Freq_Atividade_Fisica', 'Tempo_uso_dispositivos_eletronicos',
+    'Comes_Entre_Refeicoes', 'Consumo_Alcool'
+]
+
+# Ordem das colunas de dados_limpos.csv gerado pelo notebook
+colunas_saida = [
+    'Genero', 'Idade', 'Altura', 'Peso', 'Historico_Familiar_Excesso_De_Peso',
+    'Consumo_Frequente_Alta_Caloria', 'Freq_Vegetais', 'Num_refeicoes', 'Comes_Entre_Refeicoes',
+    'Fumante', 'Consumo_Agua', 'Monitora_Calorias', 'Freq_Atividade_Fisica',
+    'Tempo_uso_dispositivos_eletronicos', 'Consumo_Alcool', 'Obesidade',
+    *cols_transporte, 'IMC', 'Score_Atletico', 'Possivel_Atleta'
+]
+
+# Colunas inteiras pequenas; todas as demais são contínuas (float32 por padrão)
+colunas_int8 = [*mapas_binarios, 'Obesidade', *cols_transporte, 'Possivel_Atleta']
+
+VERSAO_MANIFESTO = 1
+EXTENSOES = {'parquet': '.parquet', 'feather': '.feather'}
+
+
+# --- TRANSFORMAÇÕES ---
+def ler_blocos(entrada, tamanho_bloco):
+    for bloco in pd.read_csv(entrada, chunksize=tamanho_bloco):
+        yield bloco.rename(columns=mapa_colunas)
+
+
+def _mapear(df, coluna, mapa):
+    mapeado = df[coluna].map(mapa)
+    invalidos = mapeado.isna() & df[coluna].notna()
+    if invalidos.any():
+        raise ValueError(f"Valores desconhecidos em '{coluna}': {sorted(df.loc[invalidos, coluna].unique())}")
+    if mapeado.isna().any():
+        raise ValueError(f"Valores ausentes em '{coluna}'")
+    return mapeado
+
+
+def transformar_bloco(df):
+    # Tudo o que o notebook faz antes do scaler, aplicado a um único bloco
+    df = df.copy()
+    for coluna, mapa in mapas_binarios.items():
+        df[coluna] = _mapear(df, coluna, mapa)
+
+    # Ordinais (Escala de frequência)
+    df['Comes_Entre_Refeicoes'] = _mapear(df, 'Comes_Entre_Refeicoes', mapa_freq)
+    df['Consumo_Alcool'] = df['Consumo_Alcool'].map(mapa_freq).fillna(0)
+
+    df[cols_arredondar] = df[cols_arredondar].round()
+
+    # Dummies de Transporte com categorias fixas
+    for coluna, categoria in zip(cols_transporte, categorias_transporte[1:]):
+        df[coluna] = (df['Transporte'] == categoria).astype(np.int8)
+    df = df.drop(columns=['Transporte'])
+
+    df['Obesidade'] = _mapear(df, 'Obesidade', mapa_obesidade)
+    df['IMC'] = df['Peso'] / (df['Altura'] ** 2)
+    return df
+
+
+def finalizar_bloco(df, scaler, tipo_float=np.float32):
+    # Normalização, perfil atlético (calculado sobre os valores normalizados, como no
+    # notebook) e conversão para os tipos compactos da saída
+    df[colunas_para_normalizar] = scaler.transform(df[colunas_para_normalizar])
+    df['Score_Atletico'] = df['Freq_Atividade_Fisica'] * (df['IMC'] + 3)
+    df['Possivel_Atleta'] = (df['Score_Atletico'] > 5).astype(np.int8)
+    df = df[colunas_saida]
+    tipos = {c: (np.int8 if c in colunas_int8 else tipo_float) for c in colunas_saida}
+    return df.astype(tipos)
+
+
+def ajustar_scaler(entrada, tamanho_bloco=50000):
+    # StandardScaler ajustado bloco a bloco (média e variância acumuladas)
+    scaler = StandardScaler()
+    linhas = 0
+    for bloco in ler_blocos(entrada, tamanho_bloco):
+        bloco = transformar_bloco(bloco)
+        scaler.partial_fit(bloco[colunas_para_normalizar])
+        linhas += len(bloco)
+    if not linhas:
+        raise ValueError(f"Nenhuma linha em {entrada}")
+    return scaler
+
+
+# --- GRAVAÇÃO ---
+class GravadorColunar:
+
+    def __init__(self, caminho, formato):
+        try:
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+        except ImportError:
+            raise SystemExit("Saída Parquet/Feather requer o pacote pyarrow (pip install pyarrow)")
+        self._pa, self._pq = pa, pq
+        self.caminho = caminho
+        self.formato = formato
+        self._escritor = None
+
+    def escrever(self, df):
+        tabela = self._pa.Table.from_pandas(df, preserve_index=False)
+        if self._escritor is None:
+            if self.formato == 'parquet':
+                self._escritor = self._pq.ParquetWriter(self.caminho, tabela.schema)
+            else:
+                # Feather v2 é o formato de arquivo IPC do Arrow, gravado em lotes
+                self._escritor = self._pa.ipc.new_file(self.caminho, tabela.schema)
+        self._escritor.write_table(tabela)
+
+    def fechar(self):
+        if self._escritor is not None:
+            self._escritor.close()
+
+
+def carregar_dados_limpos(caminho):
+    # Leitura da base de treino em qualquer um dos formatos gerados
+    if caminho.endswith('.parquet'):
+        return pd.read_parquet(caminho)
+    if caminho.endswith('.feather'):
+        return pd.read_feather(caminho)
+    return pd.read_csv(caminho)
+
+
+# --- MANIFESTO ---
+def _ler_manifesto(caminho):
+    try:
+        with open(caminho) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def _atualizado(manifesto, assinatura, destino):
+    # Entrada, código e parâmetros iguais e saídas intactas desde a última execução
+    if not manifesto or manifesto.get('assinatura') != assinatura:
+        return False
+    for nome, sha in manifesto.get('saidas', {}).items():
+        caminho = os.path.join(destino, nome)
+        if not os.path.exists(caminho) or sha256_arquivo(caminho) != sha:
+            return False
+    return True
+
+
+def executar(entrada, destino='.', formato='parquet', tamanho_bloco=50000, precisao='float32',
+             csv=False, forcar=False):
+    os.makedirs(destino, exist_ok=True)
+    caminho_manifesto = os.path.join(destino, 'etl_manifesto.json')
+    assinatura = {
+        'versao': VERSAO_MANIFESTO,
+        'entrada_sha256': sha256_arquivo(entrada),
+        'codigo_sha256': sha256_arquivo(os.path.abspath(__file__)),
+        'formato': formato,
+        'precisao': precisao,
+        'csv': csv,
+    }
+    manifesto = _ler_manifesto(caminho_manifesto)
+    if not forcar and _atualizado(manifesto, assinatura, destino):
+        return manifesto, False
+
+    inicio = time.perf_counter()
+    scaler = ajustar_scaler(entrada, tamanho_bloco)
+
+    nome_dados = 'dados_limpos' + EXTENSOES[formato]
+    caminho_dados = os.path.join(destino, nome_dados)
+    caminho_csv = os.path.join(destino, 'dados_limpos.csv')
+    gravador = GravadorColunar(caminho_dados + '.tmp', formato)
+    linhas = 0
+    try:
+        for bloco in ler_blocos(entrada, tamanho_bloco):
+            bloco = finalizar_bloco(transformar_bloco(bloco), scaler, np.dtype(precisao))
+            gravador.escrever(bloco)
+            if csv:
+                bloco.to_csv(caminho_csv + '.tmp', mode='w' if linhas == 0 else 'a',
+                             header=linhas == 0, index=False)
+            linhas += len(bloco)
+    finally:
+        gravador.fechar()
+    os.replace(caminho_dados + '.tmp', caminho_dados)
+    if csv:
+        os.replace(caminho_csv + '.tmp', caminho_csv)
+
+    # Salva o Scaler e o dicionário do Target
+    joblib.dump(scaler, os.path.join(destino, 'scaler.pkl'))
+    joblib.dump(mapa_obesidade, os.path.join(destino, 'target_map.pkl'))
+
+    saidas = [nome_dados, 'scaler.pkl', 'target_map.pkl'] + (['dados_limpos.csv'] if csv else [])
+    manifesto = {
+        'assinatura': assinatura,
+        'entrada': os.path.abspath(entrada),
+        'linhas': linhas,
+        'duracao_s': round(time.perf_counter() - inicio, 3),
+        'saidas': {nome: sha256_arquivo(os.path.join(destino, nome)) for nome in saidas},
+    }
+    with open(caminho_manifesto, 'w') as f:
+        json.dump(manifesto, f, indent=2)
+    return manifesto, True
+
+
+def main():
+    parser = argparse.ArgumentParser(description="ETL da base de obesidade em blocos")
+    parser.add_argument('entrada', nargs='?', default='Obesity.csv')
+    parser.add_argument('--destino', default='.', help="Pasta de saída (dados, scaler.pkl, target_map.pkl)")
+    parser.add_argument('--formato', choices=sorted(EXTENSOES), default='parquet')
+    parser.add_argument('--tamanho-bloco', type=int, default=50000)
+    parser.add_argument('--precisao', choices=['float32', 'float64'], default='float32',
+                        help="Tipo das colunas contínuas")
+    parser.add_argument('--csv', action='store_true', help="Também grava dados_limpos.csv")
+    parser.add_argument('--forcar', action='store_true', help="Reprocessa mesmo com a entrada inalterada")
+    args = parser.parse_args()
+
+    manifesto, executou = executar(
+        args.entrada, args.destino, formato=args.formato, tamanho_bloco=args.tamanho_bloco,
+        precisao=args.precisao, csv=args.csv, forcar=args.forcar,
+    )
+    if executou:
+        print(f"✅ {manifesto['linhas']} linhas em {manifesto['duracao_s']:.1f}s. "
+              f"Arquivos gerados: {', '.join(manifesto['saidas'])}")
+    else:
+        print(f"Entrada inalterada, nada a fazer ({args.destino}/etl_manifesto.json)", file=sys.stderr)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,306 @@
+# train/compactar.py
+# Compactação do modelo treinado dentro de um orçamento de acurácia.
+#
+# Etapas aplicadas a cada árvore:
+#   - seleção das árvores: mantém apenas as k primeiras (as árvores da floresta são
+#     independentes, então qualquer prefixo é uma floresta menor não enviesada);
+#   - fusão de folhas redundantes: um nó cujos dois filhos são folhas com a mesma
+#     distribuição quantizada (ou a menos de `tolerancia_folhas`) vira folha, de baixo
+#     para cima; a distribuição do nó já é a média ponderada das dos filhos;
+#   - limiares em float32, arredondados para baixo (x > t equivale a x > t32 para
+#     toda entrada float32, a mesma conversão que o sklearn faz);
+#   - distribuições dos nós quantizadas em uint8 (p * 255 arredondado pelos maiores
+#     restos, de modo que cada nó some exatamente 255); as dos nós internos são
+#     mantidas para que FlorestaCompilada.explicar funcione também aqui, e com folhas
+#     que somam sempre 255 a base mais as contribuições reproduzem o predict_proba.
+#
+# A busca usa os mesmos 5 folds do treino: em cada fold a floresta é treinada com os
+# parâmetros do modelo atual e compactada com cada combinação candidata, e a acurácia
+# e o AUC médios na validação são comparados com os da floresta completa. A menor
+# floresta dentro da tolerância é então aplicada ao modelo final. O resultado é um
+# artefato da FlorestaCompilada (api/floresta.py) e um relatório de tamanho, tempo de
+# carga e latência por linha versus fidelidade.
+#
+# Uso:
+#   python compactar.py
+#   python compactar.py --tolerancia-acuracia 0.01 --tolerancia-auc 0.005 --saida ../api/floresta_compacta.joblib
+import os
+import sys
+import json
+import time
+import argparse
+
+import joblib
+import numpy as np
+from sklearn.base import clone
+from sklearn.metrics import accuracy_score, roc_auc_score
+from sklearn.preprocessing import label_binarize
+
+RAIZ = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(RAIZ, 'Etl'))
+sys.path.insert(0, os.path.join(RAIZ, '..', 'api'))
+from floresta import FlorestaCompilada, gravar_artefato, sha256_arquivo
+from treinar import preparar_dados, preparar_folds
+from etl import carregar_dados_limpos
+
+ESCALA = 255
+TOLERANCIAS_FOLHAS = (0.0, 0.05, 0.1, 0.2, 0.3)
+
+
+def _limiar_float32(limiar):
+    # Maior float32 <= limiar: preserva exatamente o lado de cada entrada float32
+    t32 = limiar.astype(np.float32)
+    acima = t32.astype(np.float64) > limiar
+    t32[acima] = np.nextafter(t32[acima], np.float32(-np.inf))
+    return t32
+
+
+def _quantizar(valor):
+    # p * ESCALA arredondado pelos maiores restos: cada linha soma exatamente ESCALA
+    escalado = valor * ESCALA
+    quantizado = np.floor(escalado)
+    falta = np.rint(escalado.sum(axis=1) - quantizado.sum(axis=1))
+    posicao = np.argsort(np.argsort(quantizado - escalado, axis=1, kind='stable'), axis=1, kind='stable')
+    quantizado += posicao < falta[:, np.newaxis]
+    return quantizado.astype(np.uint8)
+
+
+def _podar_arvore(arvore, n_classes, tolerancia_folhas):
+    esquerda, direita = arvore.children_left, arvore.children_right
+    valor = arvore.value[:, 0, :n_classes]
+    quantizado = _quantizar(valor)
+    folha = esquerda == -1
+
+    # Os filhos sempre têm índice maior que o pai: percorrer de trás para frente
+    # funde as folhas de baixo para cima
+    for no in range(arvore.node_count - 1, -1, -1):
+        if folha[no]:
+            continue
+        e, d = esquerda[no], direita[no]
+        if folha[e] and folha[d]:
+            iguais = np.array_equal(quantizado[e], quantizado[d])
+            if iguais or np.max(np.abs(valor[e] - valor[d])) <= tolerancia_folhas:
+                folha[no] = True
+
+    # Nós alcançáveis na árvore podada, em pré-ordem, com a nova numeração
+    mantidos, profundidades, pilha = [], {}, [(0, 0)]
+    while pilha:
+        no, nivel = pilha.pop()
+        mantidos.append(no)
+        profundidades[no] = nivel
+        if not folha[no]:
+            pilha.append((direita[no], nivel + 1))
+            pilha.append((esquerda[no], nivel + 1))
+    mantidos = np.asarray(mantidos)
+    novo = np.full(arvore.node_count, -1, dtype=np.int64)
+    novo[mantidos] = np.arange(len(mantidos))
+
+    eh_folha = folha[mantidos]
+    idx = np.arange(len(mantidos))
+    return {
+        "feature": np.where(eh_folha, 0, arvore.feature[mantidos]),
+        "limiar": np.where(eh_folha, np.inf, arvore.threshold[mantidos]),
+        "esquerda": np.where(eh_folha, idx, novo[esquerda[mantidos]]),
+        "direita": np.where(eh_folha, idx, novo[direita[mantidos]]),
+        # Nós internos guardam a própria distribuição: é dela que sai a atribuição por caminho
+        "valor": quantizado[mantidos],
+        "profundidade": max(profundidades.values()),
+    }
+
+
+def estado_compacto(modelo, n_arvores=None, tolerancia_folhas=0.0):
+    # Vetores da floresta compactada nos tipos do artefato (uint8/int32/float32)
+    arvores = [_podar_arvore(e.tree_, modelo.n_classes_, tolerancia_folhas)
+               for e in modelo.estimators_[:n_arvores]]
+
+    deslocamentos = np.cumsum([0] + [len(a["feature"]) for a in arvores])
+    filhos = np.concatenate([
+        np.column_stack([a["esquerda"], a["direita"]]) + d for a, d in zip(arvores, deslocamentos)
+    ])
+    tipo_feature = np.uint8 if modelo.n_features_in_ <= 255 else np.uint16
+    return dict(
+        feature=np.ascontiguousarray(np.concatenate([a["feature"] for a in arvores]).astype(tipo_feature)),
+        limiar=np.ascontiguousarray(_limiar_float32(np.concatenate([a["limiar"] for a in arvores]))),
+        filhos=np.ascontiguousarray(filhos.astype(np.int32)),
+        valores=np.ascontiguousarray(np.concatenate([a["valor"] for a in arvores])),
+        raizes=deslocamentos[:-1].astype(np.int32),
+        classes=np.asarray(modelo.classes_),
+        profundidade=max(a["profundidade"] for a in arvores),
+        n_features=modelo.n_features_in_,
+        escala=ESCALA,
+    )
+
+
+def compactar(modelo, n_arvores=None, tolerancia_folhas=0.0):
+    return FlorestaCompilada(**estado_compacto(modelo, n_arvores, tolerancia_folhas))
+
+
+def _n_nos(floresta):
+    return len(floresta.feature)
+
+
+def _auc(y, proba, classes):
+    return roc_auc_score(label_binarize(y, classes=list(classes)), proba, multi_class='ovr')
+
+
+def avaliar_candidatos(modelo, folds, passos_arvores, tolerancias_folhas):
+    # Acurácia e AUC médios na validação cruzada para a floresta completa e para cada
+    # (n_arvores, tolerancia_folhas) candidato
+    referencia = {"acuracia": [], "auc": []}
+    resultados = {}
+    for X_treino, y_treino, X_validacao, y_validacao in folds:
+        floresta_fold = clone(modelo).set_params(n_jobs=-1).fit(X_treino, y_treino)
+        proba = floresta_fold.predict_proba(X_validacao)
+        referencia["acuracia"].append(accuracy_score(y_validacao, floresta_fold.classes_[proba.argmax(axis=1)]))
+        referencia["auc"].append(_auc(y_validacao, proba, floresta_fold.classes_))
+
+        for n_arvores in passos_arvores:
+            for tolerancia in tolerancias_folhas:
+                compacta = compactar(floresta_fold, n_arvores, tolerancia)
+                proba = compacta.predict_proba(X_validacao)
+                r = resultados.setdefault((n_arvores, tolerancia), {"acuracia": [], "auc": [], "nos": []})
+                r["acuracia"].append(accuracy_score(y_validacao, compacta.classes[proba.argmax(axis=1)]))
+                r["auc"].append(_auc(y_validacao, proba, compacta.classes))
+                r["nos"].append(_n_nos(compacta))
+
+    media = lambda r: {k: float(np.mean(v)) for k, v in r.items()}
+    return media(referencia), {chave: media(r) for chave, r in resultados.items()}
+
+
+def escolher(referencia, resultados, tolerancia_acuracia, tolerancia_auc):
+    # Menor floresta (em nós) cuja acurácia e AUC ficam dentro da tolerância
+    aceitos = [
+        (r["nos"], n_arvores, tolerancia)
+        for (n_arvores, tolerancia), r in resultados.items()
+        if r["acuracia"] >= referencia["acuracia"] - tolerancia_acuracia
+        and r["auc"] >= referencia["auc"] - tolerancia_auc
+    ]
+    if not aceitos:
+        return None
+    _, n_arvores, tolerancia = min(aceitos)
+    return n_arvores, tolerancia
+
+
+def _latencia_por_linha(funcao, X, amostras=300):
+    tempos = []
+    for linha in X[:amostras]:
+        linha = linha[np.newaxis, :]
+        t0 = time.perf_counter()
+        funcao(linha)
+        tempos.append(time.perf_counter() - t0)
+    tempos = np.asarray(tempos) * 1e6
+    return {"p50_us": float(np.percentile(tempos, 50)), "p99_us": float(np.percentile(tempos, 99))}
+
+
+def _tempo_carga(funcao, repeticoes=5):
+    tempos = []
+    for _ in range(repeticoes):
+        t0 = time.perf_counter()
+        funcao()
+        tempos.append(time.perf_counter() - t0)
+    return float(np.median(tempos) * 1000)
+
+
+def relatorio_artefatos(modelo, caminho_modelo, compacta, caminho_compacta, X_scaled, y):
+    # Tamanho, tempo de carga, latência por linha e fidelidade ao modelo original
+    completa = FlorestaCompilada.from_sklearn(modelo)
+    caminho_completa = caminho_compacta + '.completa.tmp'
+    completa.salvar(caminho_completa)
+    try:
+        proba_original = modelo.predict_proba(X_scaled)
+        proba_compacta = compacta.predict_proba(X_scaled)
+        return {
+            "tamanho_bytes": {
+                "modelo_pkl": os.path.getsize(caminho_modelo),
+                "floresta_completa": os.path.getsize(caminho_completa),
+                "floresta_compacta": os.path.getsize(caminho_compacta),
+            },
+            "carga_ms": {
+                "modelo_pkl": _tempo_carga(lambda: joblib.load(caminho_modelo)),
+                "floresta_completa": _tempo_carga(lambda: FlorestaCompilada.carregar(caminho_completa, mmap=False)),
+                "floresta_compacta": _tempo_carga(lambda: FlorestaCompilada.carregar(caminho_compacta, mmap=False)),
+            },
+            "latencia_linha": {
+                "sklearn": _latencia_por_linha(modelo.predict_proba, X_scaled),
+                "floresta_completa": _latencia_por_linha(completa.predict_proba, X_scaled),
+                "floresta_compacta": _latencia_por_linha(compacta.predict_proba, X_scaled),
+            },
+            "estrutura": {
+                "arvores": [modelo.n_estimators, compacta.n_arvores],
+                "nos": [_n_nos(completa), _n_nos(compacta)],
+                "profundidade": [completa.profundidade, compacta.profundidade],
+            },
+            "fidelidade": {
+                "concordancia_classe": float(np.mean(proba_original.argmax(axis=1) == proba_compacta.argmax(axis=1))),
+                "diferenca_max_proba": float(np.max(np.abs(proba_original - proba_compacta))),
+                "diferenca_max_risco_total": float(np.max(np.abs(
+                    proba_original[:, 2:].sum(axis=1) - proba_compacta[:, 2:].sum(axis=1)))),
+                "auc_dados_completos": [float(_auc(y, proba_original, modelo.classes_)),
+                                        float(_auc(y, proba_compacta, compacta.classes))],
+            },
+        }
+    finally:
+        os.remove(caminho_completa)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compacta a floresta dentro de um orçamento de acurácia")
+    parser.add_argument('--modelo', default='modelo.pkl')
+    parser.add_argument('--dados', default='data/dados_limpos.csv')
+    parser.add_argument('--saida', default='floresta_compacta.joblib')
+    parser.add_argument('--tolerancia-acuracia', type=float, default=0.01,
+                        help="Queda máxima da acurácia média de CV (fração, 0.01 = 1 p.p.)")
+    parser.add_argument('--tolerancia-auc', type=float, default=0.005, help="Queda máxima do AUC médio de CV")
+    parser.add_argument('--passo-arvores', type=int, default=10, help="Incremento de árvores na busca")
+    parser.add_argument('--relatorio', default='relatorio_compactacao.json')
+    args = parser.parse_args()
+
+    inicio = time.perf_counter()
+    modelo = joblib.load(args.modelo)
+    X, y, _ = preparar_dados(carregar_dados_limpos(args.dados))
+    folds = preparar_folds(X, y)
+
+    passos = list(range(args.passo_arvores, modelo.n_estimators, args.passo_arvores)) + [modelo.n_estimators]
+    referencia, resultados = avaliar_candidatos(modelo, folds, passos, TOLERANCIAS_FOLHAS)
+    escolha = escolher(referencia, resultados, args.tolerancia_acuracia, args.tolerancia_auc)
+    if escolha is None:
+        raise SystemExit("🛑 Nenhuma floresta compacta ficou dentro da tolerância")
+    n_arvores, tolerancia_folhas = escolha
+
+    # Mesmo scaler do modelo final (o do treino com todos os dados)
+    caminho_scaler = os.path.join(os.path.dirname(os.path.abspath(args.modelo)), 'scaler.pkl')
+    scaler = joblib.load(caminho_scaler)
+    X_scaled = scaler.transform(X)
+
+    estado = estado_compacto(modelo, n_arvores, tolerancia_folhas)
+    # Temporário + os.replace: uma API que mapeia o artefato nunca vê um arquivo truncado
+    gravar_artefato(dict(estado, origem=sha256_arquivo(args.modelo)), args.saida)
+    compacta = FlorestaCompilada(**estado)
+
+    relatorio = {
+        "modelo": os.path.abspath(args.modelo),
+        "escolha": {"arvores": n_arvores, "tolerancia_folhas": tolerancia_folhas, "escala_folhas": ESCALA},
+        "orcamento": {"acuracia": args.tolerancia_acuracia, "auc": args.tolerancia_auc},
+        "cv_referencia": referencia,
+        "cv_compacta": resultados[escolha],
+        "candidatos": [
+            {"arvores": n, "tolerancia_folhas": t, **r} for (n, t), r in sorted(resultados.items())
+        ],
+        **relatorio_artefatos(modelo, args.modelo, compacta, args.saida, X_scaled, y),
+        "duracao_s": round(time.perf_counter() - inicio, 1),
+    }
+    with open(args.relatorio, 'w') as f:
+        json.dump(relatorio, f, indent=2, ensure_ascii=False)
+
+    tamanhos, latencia = relatorio["tamanho_bytes"], relatorio["latencia_linha"]
+    print(f"✅ {n_arvores} árvores (tolerância de folhas {tolerancia_folhas}) -> {args.saida}")
+    print(f"   CV: acurácia {referencia['acuracia']:.2%} -> {resultados[escolha]['acuracia']:.2%} | "
+          f"AUC {referencia['auc']:.4f} -> {resultados[escolha]['auc']:.4f}")
+    print(f"   Tamanho: {tamanhos['modelo_pkl'] / 1024:.0f} KB (modelo.pkl) -> {tamanhos['floresta_compacta'] / 1024:.0f} KB")
+    print(f"   Latência p50 por linha: {latencia['floresta_completa']['p50_us']:.0f} µs -> "
+          f"{latencia['floresta_compacta']['p50_us']:.0f} µs")
+    print(f"   Concordância de classe com o modelo original: {relatorio['fidelidade']['concordancia_classe']:.2%}")
+
+
+if __name__ == '__main__':
+    main()
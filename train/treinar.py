@@ -0,0 +1,237 @@
+# train/treinar.py
+# Busca de hiperparâmetros e treino final do modelo, como script.
+#
+# Substitui o GridSearchCV do MachineLearning.ipynb com a mesma grade, os mesmos folds
+# (StratifiedKFold(5, shuffle=True, random_state=42)) e o mesmo critério (acurácia
+# média), mas sem o retrabalho:
+#   - o StandardScaler de cada fold é ajustado uma única vez e as matrizes
+#     normalizadas são reaproveitadas por todos os candidatos;
+#   - n_estimators é explorado com warm_start: a floresta de 150 árvores é a de 100
+#     mais 50 novas, em vez de um treino do zero (resultado idêntico ao fit direto);
+#   - opcionalmente, successive halving descarta os piores candidatos a cada degrau
+#     de n_estimators;
+#   - (candidato, fold) são treinados em paralelo em todos os núcleos.
+# Gera modelo.pkl, scaler.pkl e target_map.pkl e um relatório JSON de tempos e métricas;
+# com --publicar, os três viram um pacote versionado (api/pacote_modelo.py) que a API
+# adota sem reiniciar.
+#
+# Uso:
+#   python treinar.py
+#   python treinar.py --dados Etl/dados_limpos.parquet --max-depth 6,8,10 --halving
+#   python treinar.py --publicar ../api/modelos
+import os
+import sys
+import json
+import math
+import time
+import argparse
+import itertools
+
+import joblib
+import numpy as np
+from joblib import Parallel, delayed
+from sklearn.model_selection import StratifiedKFold
+from sklearn.preprocessing import StandardScaler, label_binarize
+from sklearn.ensemble import RandomForestClassifier
+from sklearn.metrics import accuracy_score, classification_report, roc_auc_score
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), 'Etl'))
+from etl import carregar_dados_limpos
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'api'))
+from pacote_modelo import publicar
+
+
+def preparar_dados(df):
+    # Removemos dados físicos para focar na predição por comportamento e genética
+    X = df.drop(['Obesidade', 'Peso', 'Altura', 'IMC'], axis=1, errors='ignore')
+    y = df['Obesidade']
+
+    # Mesmo mapeamento de categorias do notebook (ordem de aparição no arquivo)
+    target_map = {idx: label for idx, label in enumerate(y.unique())}
+    y_encoded = y.map({v: k for k, v in target_map.items()})
+    return X, y_encoded.to_numpy(), target_map
+
+
+def preparar_folds(X, y, n_splits=5, random_state=42):
+    # Scaler ajustado uma vez por fold; as matrizes servem a todos os candidatos
+    cv = StratifiedKFold(n_splits=n_splits, shuffle=True, random_state=random_state)
+    folds = []
+    for treino, validacao in cv.split(X, y):
+        scaler = StandardScaler().fit(X.iloc[treino])
+        folds.append((
+            scaler.transform(X.iloc[treino]), y[treino],
+            scaler.transform(X.iloc[validacao]), y[validacao],
+        ))
+    return folds
+
+
+def _crescer(floresta, n_estimators, fold):
+    # Acrescenta árvores à floresta do fold (warm_start) e mede a acurácia na validação
+    X_treino, y_treino, X_validacao, y_validacao = fold
+    floresta.set_params(n_estimators=n_estimators)
+    floresta.fit(X_treino, y_treino)
+    return accuracy_score(y_validacao, floresta.predict(X_validacao))
+
+
+def buscar(folds, grade, random_state=42, n_jobs=-1, halving=False, eta=2):
+    # Candidatos na mesma ordem do ParameterGrid (chaves em ordem alfabética), para
+    # que empates sejam desfeitos como no GridSearchCV
+    degraus = sorted(grade['n_estimators'])
+    chaves = sorted(k for k in grade if k != 'n_estimators')
+    configuracoes = [dict(zip(chaves, valores)) for valores in itertools.product(*(grade[k] for k in chaves))]
+
+    florestas = {
+        (c, f): RandomForestClassifier(random_state=random_state, warm_start=True, n_jobs=1, **configuracoes[c])
+        for c in range(len(configuracoes)) for f in range(len(folds))
+    }
+    scores = {}     # (configuração, n_estimators) -> acurácias por fold
+    ativos = list(range(len(configuracoes)))
+
+    # Threads: o treino das árvores libera o GIL e as florestas continuam em memória
+    # entre os degraus, prontas para receber mais árvores
+    with Parallel(n_jobs=n_jobs, prefer='threads') as paralelo:
+        for i, n_estimators in enumerate(degraus):
+            tarefas = [(c, f) for c in ativos for f in range(len(folds))]
+            resultados = paralelo(delayed(_crescer)(florestas[t], n_estimators, folds[t[1]]) for t in tarefas)
+            for (c, f), acuracia in zip(tarefas, resultados):
+                scores.setdefault((c, n_estimators), [None] * len(folds))[f] = acuracia
+
+            if halving and i < len(degraus) - 1:
+                manter = max(1, math.ceil(len(ativos) / eta))
+                ativos = sorted(ativos, key=lambda c: -np.mean(scores[(c, n_estimators)]))[:manter]
+                ativos.sort()
+                for chave in [k for k in florestas if k[0] not in ativos]:
+                    del florestas[chave]
+
+    candidatos = []
+    for c, configuracao in enumerate(configuracoes):
+        for n_estimators in degraus:
+            if (c, n_estimators) in scores:
+                s = np.asarray(scores[(c, n_estimators)])
+                candidatos.append({
+                    "params": {**configuracao, "n_estimators": n_estimators},
+                    "media": float(s.mean()), "desvio": float(s.std()), "folds": s.tolist(),
+                })
+    return candidatos
+
+
+def melhor_candidato(candidatos):
+    # Maior acurácia média; no empate, o primeiro na ordem da grade (como o GridSearchCV)
+    medias = np.array([round(c["media"], 12) for c in candidatos])
+    return candidatos[int(np.argmax(medias))]
+
+
+def treinar(caminho_dados, grade, destino='.', n_jobs=-1, halving=False, eta=2, random_state=42):
+    tempos = {}
+    inicio = time.perf_counter()
+
+    t = time.perf_counter()
+    X, y, target_map = preparar_dados(carregar_dados_limpos(caminho_dados))
+    tempos["carga_s"] = time.perf_counter() - t
+
+    t = time.perf_counter()
+    folds = preparar_folds(X, y, random_state=random_state)
+    tempos["folds_s"] = time.perf_counter() - t
+
+    t = time.perf_counter()
+    candidatos = buscar(folds, grade, random_state=random_state, n_jobs=n_jobs, halving=halving, eta=eta)
+    melhor = melhor_candidato(candidatos)
+    tempos["busca_s"] = time.perf_counter() - t
+
+    # Treino final com todos os dados, como o refit do GridSearchCV
+    t = time.perf_counter()
+    scaler_final = StandardScaler().fit(X)
+    X_scaled = scaler_final.transform(X)
+    modelo_final = RandomForestClassifier(random_state=random_state, n_jobs=n_jobs, **melhor["params"])
+    modelo_final.fit(X_scaled, y)
+    modelo_final.set_params(n_jobs=None)
+    tempos["treino_final_s"] = time.perf_counter() - t
+
+    # Métricas Detalhadas (Precision, Recall, F1) e AUC, como no relatório do notebook
+    t = time.perf_counter()
+    y_pred = modelo_final.predict(X_scaled)
+    report = classification_report(y, y_pred, output_dict=True)
+    y_prob = modelo_final.predict_proba(X_scaled)
+    y_bin = label_binarize(y, classes=list(target_map.keys()))
+    auc_score = roc_auc_score(y_bin, y_prob, multi_class='ovr')
+    tempos["avaliacao_s"] = time.perf_counter() - t
+
+    os.makedirs(destino, exist_ok=True)
+    joblib.dump(modelo_final, os.path.join(destino, 'modelo.pkl'))
+    joblib.dump(scaler_final, os.path.join(destino, 'scaler.pkl'))
+    joblib.dump(target_map, os.path.join(destino, 'target_map.pkl'))
+    tempos["total_s"] = time.perf_counter() - inicio
+
+    return {
+        "dados": os.path.abspath(caminho_dados),
+        "linhas": int(len(X)),
+        "grade": grade,
+        "halving": halving,
+        "melhores_parametros": melhor["params"],
+        "metricas": {
+            "acuracia_cv": melhor["media"],
+            "desvio_cv_2x": melhor["desvio"] * 2,
+            "precisao_macro": report['macro avg']['precision'],
+            "recall_macro": report['macro avg']['recall'],
+            "f1_macro": report['macro avg']['f1-score'],
+            "auc_ovr": float(auc_score),
+        },
+        "tempos": {k: round(v, 3) for k, v in tempos.items()},
+        "candidatos": candidatos,
+    }
+
+
+def _lista(tipo):
+    def converter(texto):
+        return [None if v == 'None' else tipo(v) for v in texto.split(',')]
+    return converter
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Busca de hiperparâmetros e treino do modelo de obesidade")
+    parser.add_argument('--dados', default='data/dados_limpos.csv', help="CSV, Parquet ou Feather gerado pelo ETL")
+    parser.add_argument('--destino', default='.', help="Pasta de saída de modelo.pkl, scaler.pkl e target_map.pkl")
+    parser.add_argument('--n-estimators', type=_lista(int), default=[100, 150])
+    parser.add_argument('--max-depth', type=_lista(int), default=[6, 8])
+    parser.add_argument('--min-samples-leaf', type=_lista(int), default=[10, 20])
+    parser.add_argument('--max-features', type=_lista(str), default=['sqrt'])
+    parser.add_argument('--halving', action='store_true',
+                        help="Descarta os piores candidatos a cada degrau de n_estimators")
+    parser.add_argument('--eta', type=int, default=2, help="Fator de redução do successive halving")
+    parser.add_argument('--n-jobs', type=int, default=-1)
+    parser.add_argument('--relatorio', default='relatorio_treino.json')
+    parser.add_argument('--publicar', metavar='PASTA', help="Publica e ativa um pacote versionado nesta pasta (MODELOS_DIR da API)")
+    args = parser.parse_args()
+
+    grade = {
+        'n_estimators': args.n_estimators,
+        'max_depth': args.max_depth,
+        'min_samples_leaf': args.min_samples_leaf,
+        'max_features': args.max_features,
+        'bootstrap': [True],
+    }
+    relatorio = treinar(args.dados, grade, args.destino, n_jobs=args.n_jobs, halving=args.halving, eta=args.eta)
+    with open(os.path.join(args.destino, args.relatorio), 'w') as f:
+        json.dump(relatorio, f, indent=2, ensure_ascii=False)
+
+    metricas, tempos = relatorio["metricas"], relatorio["tempos"]
+    print("Arquivos salvos: modelo.pkl, scaler.pkl, target_map.pkl")
+    print(f"Melhor Acurácia (CV): {metricas['acuracia_cv']:.2%}")
+    print(f"Desvio Padrão exato: +/- {metricas['desvio_cv_2x']:.2%}")
+    print(f"Precisão Média: {metricas['precisao_macro']:.2%}")
+    print(f"Recall Médio: {metricas['recall_macro']:.2%}")
+    print(f"F1-Score Médio: {metricas['f1_macro']:.2%}")
+    print(f"AUC Score Global: {metricas['auc_ovr']:.4f}")
+    print(f"Melhores Parâmetros encontrados: {relatorio['melhores_parametros']}")
+    print(f"Tempo total: {tempos['total_s']:.1f}s (busca {tempos['busca_s']:.1f}s, "
+          f"{len(relatorio['candidatos'])} candidatos)")
+
+    if args.publicar:
+        manifesto = publicar(*(os.path.join(args.destino, nome) for nome in ('modelo.pkl', 'scaler.pkl', 'target_map.pkl')),
+                             pasta=args.publicar)
+        print(f"✅ Pacote {manifesto['versao']} publicado e ativo em {args.publicar}")
+
+
+if __name__ == '__main__':
+    main()